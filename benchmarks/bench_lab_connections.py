@@ -0,0 +1,51 @@
+# Benchmark of connection reuse in lab.api.API (request user-021)
+#
+# Sends N sequential POSTs to the local stand-in for the Remote Lab
+# API (causalchamber/lab/test/stand_in.py) over loopback HTTP, first
+# with a new connection per request (plain requests.post, as API did
+# before) and then through the pooled session of API.make_request,
+# and reports the mean time per request.
+#
+# Setup used for the numbers in the commit message: N = 1000, best of
+# 3. Against the real endpoint the saving is larger, since every new
+# connection also costs the TCP and TLS handshakes.
+#
+# Usage: PYTHONPATH=./ python benchmarks/bench_lab_connections.py [N]
+
+import sys
+import time
+
+import requests
+
+from causalchamber.lab.api import API
+from causalchamber.lab.test.stand_in import StandInServer
+
+CREDENTIALS = ("user", "password")
+
+
+def best_of(fun, n, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for i in range(n):
+            response = fun({"i": i})
+            assert response.status_code == 200
+        times.append(time.perf_counter() - start)
+    return min(times) / n
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    server = StandInServer(credentials=CREDENTIALS)
+    url = server.endpoint + "/echo"
+    try:
+        print(f"{n} sequential POSTs to the stand-in API, best of 3")
+        previous = best_of(
+            lambda body: requests.post(url, json=body, auth=CREDENTIALS), n
+        )
+        print(f"  new connection per request: {previous * 1000:.2f} ms/request")
+        with API(credentials=CREDENTIALS, endpoint=server.endpoint) as api:
+            current = best_of(lambda body: api.make_request("POST", "echo", body), n)
+        print(f"  pooled session (API):       {current * 1000:.2f} ms/request")
+    finally:
+        server.stop()
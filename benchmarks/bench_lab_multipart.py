@@ -0,0 +1,87 @@
+# Benchmark of the parsing of measurement responses from the Remote
+# Lab API (request user-025)
+#
+# Builds the multipart body of a measurement with N noisy 200x200 JPEG
+# images (base64-encoded, as sent by the API) with the stand-in API of
+# causalchamber/lab/test/stand_in.py, and parses it with the previous
+# parser (text body, rebuilt as an email message) and with
+# lab.chamber._parse_multipart_response (bytes). Reports the time and
+# the peak memory allocated while parsing (tracemalloc).
+#
+# Setup used for the numbers in the commit message: N = 500 (16.8 MB
+# body), images decoded on a single thread, best of 3. The decoding of
+# the body to text needed by the previous parser is not counted.
+#
+# Usage: PYTHONPATH=./ python benchmarks/bench_lab_multipart.py [N]
+
+import base64
+import io
+import sys
+import time
+import tracemalloc
+from email import message_from_string
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from causalchamber.lab.chamber import _parse_multipart_response
+from causalchamber.lab.test.stand_in import multipart
+
+
+def previous_parse(content, content_type):
+    """_parse_multipart_response before it parsed bytes"""
+    boundary = content_type.split("boundary=")[1].strip()
+    message = message_from_string(f"Content-Type: {content_type}\r\n\r\n{content}")
+    csv_data, images = None, []
+    for part in message.walk():
+        if part.get_content_type() == "text/csv":
+            csv_data = pd.read_csv(io.StringIO(part.get_payload()))
+        elif part.get_content_type() == "image/jpeg":
+            jpeg = part.get_payload()
+            if part.get("Content-Transfer-Encoding", "") == "base64":
+                jpeg = base64.b64decode(jpeg)
+            images.append(np.array(Image.open(io.BytesIO(jpeg))))
+    return csv_data, images
+
+
+def noisy_jpeg(rng, size=200):
+    buffer = io.BytesIO()
+    array = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    Image.fromarray(array).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def measure(fun, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fun()
+        times.append(time.perf_counter() - start)
+    del result
+    tracemalloc.start()
+    result = fun()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak, result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = np.random.default_rng(42)
+    rows = [dict(n=i + 1, red=i % 256, pol_1=0.5 * i) for i in range(n)]
+    images = [noisy_jpeg(rng) for _ in range(n)]
+    content_type, body = multipart(rows, images)
+    text = body.decode()
+    print(f"{n} base64 JPEGs (200x200), {len(body) / 1e6:.1f} MB body, best of 3")
+    previous, previous_peak, expected = measure(
+        lambda: previous_parse(text, content_type)
+    )
+    print(f"  previous: {previous:.2f} s, {previous_peak / 1e6:.0f} MB peak")
+    current, current_peak, result = measure(
+        lambda: _parse_multipart_response(body, content_type, n_jobs=1)
+    )
+    print(f"  current:  {current:.2f} s, {current_peak / 1e6:.0f} MB peak")
+    pd.testing.assert_frame_equal(result[0], expected[0])
+    assert all(np.array_equal(a, b) for a, b in zip(result[1], expected[1]))
+    print("  outputs are equal")
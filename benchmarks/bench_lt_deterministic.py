@@ -0,0 +1,145 @@
+# Benchmark of the lt.Deterministic sensor simulator (request user-018)
+#
+# Times Deterministic.simulate_from_inputs on N rows of random inputs
+# (integer diode/exposure settings) against the previous, per-sensor
+# implementation, and checks that both agree to rtol 1e-12.
+#
+# Setup used for the numbers in the commit message: N = 10M rows,
+# single core (BLAS threads pinned to 1 below), best of 3.
+#
+# Usage: PYTHONPATH=./ python benchmarks/bench_lt_deterministic.py [N]
+
+import os
+
+for var in ["OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"]:
+    os.environ.setdefault(var, "1")
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import causalchamber.simulators.lt as lt
+
+PARAMETERS = dict(
+    S=np.array([[4.34, 2.86, 1.92], [0.89, 1.59, 2.68]]),
+    d1=np.array(0.1),
+    d2=np.array(0.17),
+    d3=np.array(0.25),
+    Ts=np.array([0.43, 0.41, 0.47]),
+    Tp=np.array([0.29, 0.3, 0.31]),
+    Tc=np.array([0.004, 0.014, 0.02]),
+    Q=np.array([0.128, 0.129, 0.131]),
+    C0=np.array(58.1),
+    A=np.array(1.42),
+    a1=np.array(506.8),
+    a2=np.array(511.0),
+)
+
+
+class PreviousDeterministic(lt.Deterministic):
+    """lt.Deterministic before the response matrix was stacked"""
+
+    def _simulate(
+        self,
+        red,
+        green,
+        blue,
+        pol_1,
+        pol_2,
+        diode_ir_1,
+        diode_ir_2,
+        diode_ir_3,
+        diode_vis_1,
+        diode_vis_2,
+        diode_vis_3,
+        t_ir_1,
+        t_ir_2,
+        t_ir_3,
+        t_vis_1,
+        t_vis_2,
+        t_vis_3,
+        v_c,
+        v_angle_1,
+        v_angle_2,
+        S,
+        d1,
+        d2,
+        d3,
+        Ts,
+        Tp,
+        Tc,
+        Q,
+        C0,
+        A,
+        a1,
+        a2,
+    ):
+        RGB = np.array([red, green, blue])
+
+        # First sensor
+        SRGB = S @ RGB
+        ir_1 = 2 ** (diode_ir_1 + t_ir_1) * SRGB[0]
+        vis_1 = 2 ** (diode_vis_1 + t_vis_1) * SRGB[1]
+
+        # Second sensor
+        SRGB = S @ np.diag(Ts) @ ((d1 / d2) ** 2 * RGB)
+        ir_2 = 2 ** (diode_ir_2 + t_ir_2) * SRGB[0]
+        vis_2 = 2 ** (diode_vis_2 + t_vis_2) * SRGB[1]
+
+        # Third sensor
+        malus = np.atleast_2d(np.cos(np.deg2rad(pol_1 - pol_2)) ** 2)
+        CRGB = (d1 / d3) ** 2 * RGB
+        CRGB = np.diag(Tp - Tc) @ (malus * CRGB) + np.diag(Tc) @ CRGB
+        SRGB = S @ CRGB
+        ir_3 = 2 ** (diode_ir_3 + t_ir_3) * SRGB[0]
+        vis_3 = 2 ** (diode_vis_3 + t_vis_3) * SRGB[1]
+
+        # Current
+        current = (Q @ RGB + C0) * 5.0 / v_c
+
+        # Angles
+        angle_1 = np.minimum((A * pol_1 + a1) * 5.0 / v_angle_1, 1023)
+        angle_2 = np.minimum((A * pol_2 + a2) * 5.0 / v_angle_2, 1023)
+
+        return ir_1, vis_1, ir_2, vis_2, ir_3, vis_3, current, angle_1, angle_2
+
+
+def inputs(n, random_state=42):
+    rng = np.random.default_rng(random_state)
+    df = pd.DataFrame(
+        dict((k, rng.uniform(0, 255, n)) for k in ["red", "green", "blue"])
+    )
+    df["pol_1"], df["pol_2"] = rng.uniform(-180, 180, (2, n))
+    for name in ["ir_1", "vis_1", "ir_2", "vis_2", "ir_3", "vis_3"]:
+        df["diode_" + name] = rng.integers(0, 3, n)
+        df["t_" + name] = rng.integers(0, 4, n)
+    df["v_c"], df["v_angle_1"], df["v_angle_2"] = 5.0, 2.56, 1.1
+    return df
+
+
+def best_of(fun, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fun()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    df = inputs(n)
+    print(f"lt.Deterministic, {n} rows, best of 3")
+    previous, expected = best_of(
+        lambda: PreviousDeterministic(**PARAMETERS).simulate_from_inputs(df)
+    )
+    print(f"  previous: {previous:.2f} s")
+    current, outputs = best_of(
+        lambda: lt.Deterministic(**PARAMETERS).simulate_from_inputs(df)
+    )
+    print(f"  current:  {current:.2f} s")
+    for a, b in zip(outputs, expected):
+        np.testing.assert_allclose(a, b, rtol=1e-12)
+    print("  outputs agree to rtol 1e-12")
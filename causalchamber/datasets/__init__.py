@@ -1,2 +1,9 @@
 __all__ = []
 from .main import *
+
+
+def __getattr__(name):
+    # Resolve lazily loaded attributes of .main (e.g., directory)
+    from . import main
+
+    return getattr(main, name)
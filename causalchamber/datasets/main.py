@@ -29,29 +29,164 @@ import pandas as pd
 import yaml
 from PIL import Image
 import numpy as np
+import functools
+import io
 import os
+import tempfile
+import threading
+import time
+import weakref
+import zipfile
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 """
 This module defines the functions to download datasets and load them as pandas dataframes or numpy arrays.
 """
 
 # --------------------------------------------------------------------
-# Download the list of available datasets when this module is imported
+# List of available datasets
+
+# The directory is fetched lazily, i.e., the first time it is needed
+# (e.g., by list_available or Dataset), and cached on disk so that
+# subsequent imports / processes do not need to contact the server.
+
 DIRECTORY_URL = (
     "https://causalchamber.s3.eu-central-1.amazonaws.com/downloadables/directory.yaml"
 )
 
-print(f"\nFetching list of available datasets from\n  {DIRECTORY_URL} ...", end="")
+# Time (in seconds) after which the cached directory is revalidated
+# against the server. Can be overriden with the environment variable
+# CAUSALCHAMBER_DIRECTORY_TTL.
+DIRECTORY_TTL = 24 * 3600
+
+_directory = None
+
+
+def load_directory(refresh=False, offline=None, verbose=True):
+    """Load the directory of available datasets.
+
+    The directory is downloaded from `DIRECTORY_URL` and stored in
+    the local cache (see `causalchamber.datasets.utils.cache_dir`),
+    together with its ETag. While the cached copy is younger than
+    `DIRECTORY_TTL` seconds it is used directly; afterwards, it is
+    revalidated with a conditional request, which only transfers the
+    file if it changed on the server. If the server cannot be reached,
+    the last cached copy is used.
+
+    Parameters
+    ----------
+    refresh : bool, optional
+        If True, revalidate the cached directory against the server
+        even if it has not expired. Defaults to False.
+    offline : bool or None, optional
+        If True, never contact the server and only use the cached
+        directory. If None (default), offline mode is enabled by
+        setting the environment variable CAUSALCHAMBER_OFFLINE=1.
+    verbose : bool, optional
+        If True (default), print a trace when the directory is
+        fetched from the server.
+
+    Returns
+    -------
+    dict
+        The parsed directory.
+
+    Raises
+    ------
+    ConnectionError
+        If the directory could not be fetched and there is no cached
+        copy.
+    FileNotFoundError
+        If running in offline mode and there is no cached copy.
+
+    """
+    global _directory
+    if _directory is not None and not refresh:
+        return _directory
+    if offline is None:
+        offline = os.environ.get("CAUSALCHAMBER_OFFLINE", "0") not in ["", "0"]
+    ttl = float(os.environ.get("CAUSALCHAMBER_DIRECTORY_TTL", DIRECTORY_TTL))
+    cache_path = Path(utils.cache_dir(), "directory.yaml")
+    metadata_path = Path(utils.cache_dir(), "directory.meta.yaml")
+    # Read the cached directory and its metadata (ETag, time of last check)
+    cached, metadata = None, {}
+    if os.path.isfile(cache_path):
+        with open(cache_path, "rb") as f:
+            cached = f.read()
+        if os.path.isfile(metadata_path):
+            with open(metadata_path, "r") as f:
+                metadata = yaml.safe_load(f) or {}
+    if offline:
+        if cached is None:
+            raise FileNotFoundError(
+                f'Offline mode: no cached directory of datasets found at "{cache_path}".'
+            )
+        content = cached
+    elif (
+        cached is not None
+        and not refresh
+        and time.time() - metadata.get("last_checked", 0) < ttl
+    ):
+        content = cached
+    else:
+        content = _fetch_directory(cached, metadata, cache_path, metadata_path, verbose)
+    _directory = yaml.load(content, Loader=yaml.Loader)
+    return _directory
+
+
+def _fetch_directory(cached, metadata, cache_path, metadata_path, verbose):
+    """Revalidate / download the directory from DIRECTORY_URL, updating the
+    cache. Returns the raw content of the directory."""
+    print(
+        f"\nFetching list of available datasets from\n  {DIRECTORY_URL} ...", end=""
+    ) if verbose else None
+    headers = {}
+    if cached is not None and metadata.get("etag") is not None:
+        headers["If-None-Match"] = metadata["etag"]
+    try:
+        r = requests.get(DIRECTORY_URL, headers=headers, timeout=30)
+    except requests.exceptions.RequestException as e:
+        if cached is None:
+            raise ConnectionError(
+                f"Could not fetch list of available datasets: {e}"
+            ) from e
+        print(" failed; using cached copy.") if verbose else None
+        return cached
+    if r.status_code == 304:
+        content = cached
+    elif r.status_code == 200:
+        content = r.content
+        metadata["etag"] = r.headers.get("ETag")
+    elif cached is not None:
+        print(
+            f' failed (HTTP status code "{r.status_code}"); using cached copy.'
+        ) if verbose else None
+        return cached
+    else:
+        raise ConnectionError(f'Unexpected HTTP status code "{r.status_code}: {r}".')
+    metadata["last_checked"] = time.time()
+    # Write atomically, so concurrent processes never read a partial file
+    try:
+        os.makedirs(cache_path.parent, exist_ok=True)
+        utils.atomic_write(cache_path, content)
+        utils.atomic_write(metadata_path, yaml.safe_dump(metadata).encode())
+    except OSError:
+        pass  # A read-only cache should not prevent using the package
+    print(" done.") if verbose else None
+    return content
+
 
-r = requests.get(DIRECTORY_URL)
-if r.status_code != 200:
-    raise ConnectionError(f'Unexpected HTTP status code "{r.status_code}: {r}".')
-directory = yaml.load(r.content, Loader=yaml.Loader)
-print(" done.")
+def __getattr__(name):
+    # Backwards compatibility: the directory used to be fetched on
+    # import and stored in the module attribute `directory`
+    if name == "directory":
+        return load_directory()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def list_available():
+    directory = load_directory()
     available_datasets = directory["datasets"].keys()
     print(f"Available datasets (last changes on {directory['last_updated']}):\n")
     for d in available_datasets:
@@ -67,7 +202,50 @@ def list_available():
 
 
 class Dataset:
-    def __init__(self, name, root, download=True):
+    def __init__(
+        self,
+        name,
+        root=None,
+        download=True,
+        n_connections=1,
+        experiments=None,
+        image_sizes=None,
+        n_jobs=1,
+    ):
+        """Load a dataset, downloading it into root if necessary.
+
+        Parameters
+        ----------
+        name : str
+            The name of the dataset, see `list_available`.
+        root : str, pathlib.Path or None, optional
+            The directory where the dataset is downloaded and extracted.
+            If None (default), the dataset is stored in the cache shared
+            by all processes on this machine (see
+            `causalchamber.datasets.utils.SharedCache`), where it is
+            downloaded only once. The dataset is then kept from being
+            evicted from the cache until it is closed (see
+            `Dataset.close`).
+        download : bool, optional
+            If True (default), download the dataset if it is not found
+            in root.
+        n_connections : int, optional
+            Number of parallel connections used to download the
+            dataset. Defaults to 1.
+        experiments : list of str or None, optional
+            If given, only these experiments are extracted from the
+            downloaded archive. If None (default), all are.
+        image_sizes : list of str or None, optional
+            For image datasets, only images of these sizes are
+            extracted, e.g., `["64"]`; images of other sizes are read
+            directly from the archive when requested. If None (default),
+            all sizes are extracted.
+        n_jobs : int, optional
+            Number of threads used to extract the archive; -1 means one
+            per CPU. Defaults to 1.
+
+        """
+        directory = load_directory()
         available_datasets = directory["datasets"].keys()
         if name not in available_datasets:
             string = ""
@@ -81,16 +259,52 @@ class Dataset:
         self.root = root
         self.image = directory["datasets"][name]["image"]
         self.chamber = directory["datasets"][name]["chamber"]
+        self.url = directory["datasets"][name]["url"]
+        self.checksum = directory["datasets"][name]["md5"]
+        members = None
+        if experiments is not None or image_sizes is not None:
+            members = functools.partial(
+                _select_member, name, self.image, experiments, image_sizes
+            )
+        self._release = None
+        if root is None:
+            # The lease keeps the dataset from being evicted from the
+            # cache until it is released by close (or when this object
+            # is garbage collected)
+            self._lease = utils.SharedCache().acquire(
+                self.checksum,
+                self.url,
+                download=download,
+                members=members,
+                n_connections=n_connections,
+                n_jobs=n_jobs,
+            )
+            self.root = self._lease.path
+            self._release = weakref.finalize(self, self._lease.release)
+        self.archive = utils.download_path(self.url, self.root)
         # Check if dataset has already been downloaded to root
         dataset_dir = Path(self.root, self.name)
-        if os.path.isdir(dataset_dir):
+        # Files may have been extracted into a (partial) cache entry
+        refresh = root is None and self._lease.extracted
+        if root is None:
+            print(f'Dataset {self.name} found in the shared cache "{dataset_dir}".')
+        elif os.path.isdir(dataset_dir):
             print(f'Dataset {self.name} found in "{dataset_dir}".')
+            # Extract any selected files missing from a previous, partial extraction
+            if members is not None and os.path.isfile(self.archive):
+                n_files = utils.extract(self.archive, self.root, members, n_jobs=n_jobs)
+                refresh = n_files > 0
         else:
             if download:
                 # Download, verify and extract
-                self.url = directory["datasets"][name]["url"]
-                self.checksum = directory["datasets"][name]["md5"]
-                utils.download_and_extract(self.url, self.root, self.checksum)
+                utils.download_and_extract(
+                    self.url,
+                    self.root,
+                    self.checksum,
+                    n_connections=n_connections,
+                    members=members,
+                    n_jobs=n_jobs,
+                )
             else:
                 raise FileNotFoundError(
                     f'Could not find dataset directory "{dataset_dir}". Set download=True or choose another root directory (root).'
@@ -100,63 +314,635 @@ class Dataset:
         #   If an image dataset, each experiment is a folder
         #   containing the .csv file with measurements and a subfolder
         #   with the images
+        # Experiments are listed in a manifest, which is written the first
+        # time the dataset is opened; the experiment objects are only
+        # created when requested with get_experiment.
+        self._manifest = self._load_manifest(refresh=refresh)
+        assert len(self._manifest) > 0
+        self._experiments = {}
+        # Images which were not extracted are read from the archive
+        self._archive = _Archive(self.archive, self.name) if self.image else None
 
-        if self.image:
-            experiment_names = [p.name for p in Path(self.root).glob(f"{self.name}/*")]
-            csv_paths = [
-                Path(self.root, self.name, e, f"{e}.csv") for e in experiment_names
-            ]
-            experiments = [ImageExperiment(self.name, path) for path in csv_paths]
-        else:
-            csv_paths = [p for p in Path(self.root).glob(f"{self.name}/*.csv")]
-            experiments = [Experiment(self.name, path) for path in csv_paths]
-        # Store experiment dictionary
-        assert len(experiments) > 0
-        self.__experiments = dict((e.name, e) for e in experiments)
+    def close(self):
+        """Release the resources held by the dataset, i.e., its lease on
+        the shared cache (if root=None) and the downloaded archive,
+        if images were read from it. Closing it again has no effect.
+        The dataset can also be used as a context manager, which closes
+        it on exit."""
+        if self._archive is not None:
+            self._archive.close()
+        if self._release is not None:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     def available_experiments(self):
         """Return the list of available experiments in this dataset."""
-        return list(self.__experiments.keys())
+        return list(self._manifest.keys())
 
     def get_experiment(self, name):
         """Return a particular experiment given its name (see Experiment or ImageExperiment classes)."""
-        return self.__experiments[name]
+        if name not in self._experiments:
+            entry = self._manifest[name]
+            csv_path = Path(self.root, self.name, entry["csv"])
+            if self.image:
+                experiment = ImageExperiment(
+                    self.name,
+                    csv_path,
+                    self._archive,
+                    columns=entry["columns"],
+                    image_sizes=entry["image_sizes"],
+                )
+            else:
+                experiment = Experiment(self.name, csv_path, columns=entry["columns"])
+            self._experiments[name] = experiment
+        return self._experiments[name]
+
+    def convert(self, force=False):
+        """Write a binary, columnar copy of every experiment in the
+        dataset, to speed up loading them (see `Experiment.convert`)."""
+        for name in self.available_experiments():
+            self.get_experiment(name).convert(force=force)
+
+    @property
+    def manifest_path(self):
+        """Path to the manifest listing the experiments of the dataset."""
+        return Path(self.root, f".{self.name}.manifest.yaml")
+
+    def _load_manifest(self, refresh=False):
+        """Return the manifest of the dataset, i.e., a dictionary with the
+        .csv file, columns and image sizes of each experiment. Each
+        experiment in the manifest file is stamped with the modification
+        times of its .csv file and, for image datasets, of its folder
+        (which change when image sizes are added or removed); only new
+        experiments and those whose stamp changed are scanned, reading
+        the header of their .csv file, and the manifest is rewritten.
+        If refresh is True (e.g., after extracting more files), all
+        experiments are scanned."""
+        try:
+            with open(self.manifest_path, "r") as f:
+                known = yaml.safe_load(f)["experiments"]
+        except (OSError, yaml.YAMLError, KeyError, TypeError):
+            known = {}
+        dataset_dir = Path(self.root, self.name)
+        if self.image:
+            csv_paths = [
+                Path(p, f"{p.name}.csv") for p in dataset_dir.glob("*") if p.is_dir()
+            ]
+        else:
+            csv_paths = list(dataset_dir.glob("*.csv"))
+        experiments = {}
+        for path in sorted(csv_paths):
+            stamp = [os.stat(path).st_mtime_ns]
+            if self.image:
+                stamp.append(os.stat(path.parent).st_mtime_ns)
+            entry = known.get(path.stem)
+            if refresh or not isinstance(entry, dict) or entry.get("stamp") != stamp:
+                entry = {
+                    "csv": str(path.relative_to(dataset_dir)),
+                    "stamp": stamp,
+                    "columns": pd.read_csv(path, nrows=0).columns.tolist(),
+                }
+                if self.image:
+                    entry["image_sizes"] = sorted(
+                        p.name.split("_")[1] for p in path.parent.glob("images_*")
+                    )
+            experiments[path.stem] = entry
+        if experiments != known:
+            try:
+                content = {"experiments": experiments}
+                utils.atomic_write(
+                    self.manifest_path, yaml.safe_dump(content).encode()
+                )
+            except OSError:
+                pass  # A read-only root should not prevent using the dataset
+        return experiments
 
 
 class Experiment:
-    def __init__(self, dataset_name, csv_path):
+    def __init__(self, dataset_name, csv_path, columns=None, n_rows=None):
         self.dataset = dataset_name
         self.csv_path = csv_path
         self.name = csv_path.stem
-        self.columns = pd.read_csv(self.csv_path, nrows=0).columns.tolist()
+        # The columns and number of rows can be given (e.g., from the
+        # dataset's manifest) to avoid reading the .csv file
+        if columns is None:
+            columns = pd.read_csv(self.csv_path, nrows=0).columns.tolist()
+        self.columns = columns
+        self._n_rows = n_rows
+
+    @property
+    def n_rows(self):
+        """Number of rows (observations) in the experiment."""
+        if self._n_rows is None:
+            self._n_rows = _count_rows(self.csv_path)
+        return self._n_rows
+
+    @property
+    def columnar_path(self):
+        """Path to the directory with the binary, columnar copy of the
+        experiment data (see `Experiment.convert`)."""
+        return Path(self.csv_path.parent, f".{self.name}.columns")
+
+    def convert(self, force=False):
+        """Write a binary, columnar copy of the experiment data next to
+        its .csv file, with one .npy file per column. Once converted,
+        `as_pandas_dataframe` reads from this copy instead of parsing the
+        .csv file, memory-mapping only the selected columns and rows.
+
+        The copy is only written once, and is ignored (and rewritten
+        by this method) if the .csv file changes.
+
+        Parameters
+        ----------
+        force : bool, optional
+            If True, rewrite the copy even if it is up to date. Defaults
+            to False.
 
-    def as_pandas_dataframe(self):
-        """Returns a pandas dataframe with the experiment data (excl. images)"""
-        return pd.read_csv(self.csv_path)
+        Returns
+        -------
+        pathlib.Path
+            The directory where the columnar copy is stored.
+
+        """
+        if force or self._columnar_index() is None:
+            df = pd.read_csv(self.csv_path)
+            utils.write_columns(df, self.columnar_path, self._csv_stamp())
+        return self.columnar_path
+
+    def as_pandas_dataframe(self, columns=None, skiprows=0, nrows=None, dtype=None):
+        """Returns a pandas dataframe with the experiment data (excl. images).
+
+        If the experiment has been converted (see
+        `Experiment.convert`), the data is read from the columnar copy;
+        otherwise, it is parsed from the .csv file.
+
+        Parameters
+        ----------
+        columns : list of str or None, optional
+            The columns to load, in the given order. If None (default),
+            all columns are loaded.
+        skiprows : int, optional
+            Number of rows (observations) to skip from the start of the
+            experiment. Defaults to 0.
+        nrows : int or None, optional
+            Number of rows to load after the skipped ones. If None
+            (default), all remaining rows are loaded.
+        dtype : dict or None, optional
+            A map from column names to dtypes, e.g., as returned by
+            `causalchamber.ground_truth.dtypes`; entries for columns
+            which are not loaded are ignored. If None (default), the
+            dtypes are inferred from the data.
+
+        Returns
+        -------
+        pandas.DataFrame
+            The selected columns and rows, indexed from 0.
+
+        """
+        if columns is not None:
+            columns = list(columns)
+            unknown = [c for c in columns if c not in self.columns]
+            if len(unknown) > 0:
+                raise ValueError(
+                    f"Columns {unknown} not found in experiment {self.name}."
+                )
+        if dtype is not None:
+            selected = self.columns if columns is None else columns
+            dtype = dict((c, t) for c, t in dtype.items() if c in selected)
+        index = self._columnar_index()
+        if index is not None:
+            stop = None if nrows is None else skiprows + nrows
+            df = utils.read_columns(
+                self.columnar_path, columns, skiprows, stop, index=index
+            )
+            return df if not dtype else df.astype(dtype)
+        # Only parse the selected columns and rows (the first line of
+        # the file is the header)
+        df = pd.read_csv(
+            self.csv_path,
+            usecols=columns,
+            skiprows=range(1, skiprows + 1) if skiprows > 0 else None,
+            nrows=nrows,
+            dtype=dtype,
+        )
+        # usecols does not preserve the order of the given columns
+        return df if columns is None else df[columns]
+
+    def _csv_stamp(self):
+        stat = os.stat(self.csv_path)
+        return {"csv_size": stat.st_size, "csv_mtime_ns": stat.st_mtime_ns}
+
+    def _columnar_index(self):
+        """Return the index of the columnar copy, or None if there is no
+        copy or it is out of date with respect to the .csv file."""
+        index = utils.read_columns_index(self.columnar_path)
+        if index is None or index.get("metadata") != self._csv_stamp():
+            return None
+        return index
 
     def as_image_array(self):
         raise NotImplementedError("This is not an image dataset!")
 
 
 class ImageExperiment(Experiment):
-    def __init__(self, dataset_name, csv_path):
-        super().__init__(dataset_name, csv_path)
+    def __init__(
+        self,
+        dataset_name,
+        csv_path,
+        archive=None,
+        columns=None,
+        n_rows=None,
+        image_sizes=None,
+    ):
+        super().__init__(dataset_name, csv_path, columns, n_rows)
         self.image_folders = {}
-        for path in [p for p in Path(csv_path.parents[0]).glob("images_*")]:
-            size = path.stem.split("_")[1]
-            self.image_folders[size] = path
+        if image_sizes is None:
+            image_sizes = [
+                p.stem.split("_")[1] for p in Path(csv_path.parents[0]).glob("images_*")
+            ]
+        for size in image_sizes:
+            self.image_folders[size] = Path(csv_path.parents[0], f"images_{size}")
+        # Downloaded archive of the dataset, to read images which were not extracted
+        self._archive = archive
+        self._image_filenames = None
 
     def available_sizes(self):
         """Returns the available image sizes. Size is given in pixels, where `full` means `2000x2000 px'."""
-        return list(self.image_folders.keys())
+        sizes = list(self.image_folders.keys())
+        return sizes + [s for s in self._archived_folders() if s not in sizes]
+
+    def as_image_array(self, size, n_jobs=-1, cache=False, mmap=False):
+        """Returns a numpy array with all the images along the first dimension (axis-0).
+
+        The images are decoded in parallel, directly into a
+        preallocated array. Optionally, the decoded images can be
+        stored in a .npy file next to the experiment's .csv file, which
+        is then used by subsequent calls instead of decoding the images
+        again.
 
-    def as_image_array(self, size):
-        """Returns a numpy array with all the images along the first dimension (axis-0)"""
-        if size not in self.image_folders.keys():
+        Parameters
+        ----------
+        size : str
+            The size of the images, see `available_sizes`.
+        n_jobs : int, optional
+            Number of threads used to decode the images; -1 (default)
+            means one per CPU.
+        cache : bool, optional
+            If True, store the decoded images in a .npy file (see
+            `image_cache_path`) if it does not exist yet. If the file
+            exists, it is always used. Note that decoded images take
+            much more disk space than the compressed ones. Defaults to
+            False.
+        mmap : bool, optional
+            If True, return the (read-only) memory-mapped images from
+            the .npy file instead of loading them into memory; implies
+            `cache=True`. Defaults to False.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of shape (n_images, height, width, 3) with dtype
+            uint8, or a numpy.memmap if `mmap=True`.
+
+        """
+        self._check_size(size)
+        if not self._image_cache_valid(size):
+            if not (cache or mmap):
+                return _read_images(self._image_paths(size), n_jobs=n_jobs)
+            self._write_image_cache(size, n_jobs)
+        return np.load(self.image_cache_path(size), mmap_mode="r" if mmap else None)
+
+    def get_images(self, indices, size, n_jobs=-1):
+        """Return the images at the given row indices, only decoding the
+        requested files (or reading them from the .npy cache, if it has
+        been written by `as_image_array`).
+
+        Parameters
+        ----------
+        indices : int, slice, list of int or numpy.ndarray
+            The row indices of the images, as for a numpy array; negative
+            indices and boolean masks are allowed.
+        size : str
+            The size of the images, see `available_sizes`.
+        n_jobs : int, optional
+            Number of threads used to decode the images; -1 (default)
+            means one per CPU.
+
+        Returns
+        -------
+        numpy.ndarray
+            A single image of shape (height, width, 3) if `indices` is an
+            integer, or an array of shape (len(indices), height, width, 3)
+            otherwise.
+
+        Raises
+        ------
+        IndexError
+            If an index is out of bounds.
+        ValueError
+            If the given size is not available.
+
+        """
+        self._check_size(size)
+        n_images = len(self.image_files)
+        positions = _positions(indices, n_images)
+        if self._image_cache_valid(size):
+            images = np.load(self.image_cache_path(size), mmap_mode="r")
+            return np.array(images[positions])
+        if np.ndim(positions) == 0:
+            return _read_images(self._image_paths(size, [positions]), n_jobs=1)[0]
+        if len(positions) == 0:
+            # An empty selection keeps the dimensions of the images
+            first = self._image_paths(size, [0] if n_images else [])
+            shape, dtype = _image_shape(first)
+            return np.empty((0,) + shape[1:], dtype=dtype)
+        return _read_images(self._image_paths(size, positions), n_jobs=n_jobs)
+
+    def images(self, size, n_jobs=-1):
+        """Return a lazy, array-like view of the images of the given size,
+        which supports `len`, iteration and indexing by row (see
+        `ImageSequence`); images are only decoded when accessed."""
+        self._check_size(size)
+        return ImageSequence(self, size, n_jobs)
+
+    def image_iterator(self, size):
+        """Return an iterator over the images of the given size, which are
+        numpy arrays of dimension (height, width, 3). Images are loaded
+        lazily from disk only when requested."""
+        return iter(self.images(size))
+
+    def image_cache_path(self, size):
+        """Path to the .npy file with the decoded images of the given size
+        (see `as_image_array`)."""
+        return Path(self.csv_path.parent, f".{self.name}.images_{size}.npy")
+
+    def _check_size(self, size):
+        extracted = self.image_folders.keys()
+        if size not in extracted and size not in self._archived_folders():
             raise ValueError(
-                f" Size {size} not available; available image sizes: {list(self.image_folders.keys())}."
+                f" Size {size} not available; available image sizes: {self.available_sizes()}."
+            )
+
+    def _archived_folders(self):
+        return {} if self._archive is None else self._archive.folders(self.name)
+
+    def _image_cache_valid(self, size):
+        # The cache is only valid if written after the .csv file
+        cache_path = self.image_cache_path(size)
+        return os.path.isfile(cache_path) and os.path.getmtime(
+            cache_path
+        ) >= os.path.getmtime(self.csv_path)
+
+    def _image_paths(self, size, positions=None):
+        # Only the paths of the images at the given positions are built
+        files = self.image_files
+        if positions is not None:
+            files = [files[i] for i in positions]
+        if size in self.image_folders:
+            image_folder = self.image_folders[size]
+            return [Path(image_folder, f) for f in files]
+        image_folder = self._archived_folders()[size]
+        return [_ArchiveMember(self._archive, f"{image_folder}/{f}") for f in files]
+
+    @property
+    def image_files(self):
+        """The image filenames of the experiment, in row order (i.e., the
+        `image_file` column of its data). They are read once and stored
+        in an index file next to the experiment's .csv file, which is
+        shared by all image loaders."""
+        if self._image_filenames is None:
+            index_path = Path(self.csv_path.parent, f".{self.name}.image_files.npy")
+            if os.path.isfile(index_path) and os.path.getmtime(
+                index_path
+            ) >= os.path.getmtime(self.csv_path):
+                self._image_filenames = np.load(index_path).tolist()
+            else:
+                df = super().as_pandas_dataframe(columns=["image_file"])
+                self._image_filenames = df.image_file.tolist()
+                buffer = io.BytesIO()
+                np.save(buffer, np.array(self._image_filenames, dtype=str))
+                try:
+                    utils.atomic_write(index_path, buffer.getvalue())
+                except OSError:
+                    pass  # A read-only dataset directory only disables the index
+        return self._image_filenames
+
+    def as_pandas_dataframe(self, columns=None, skiprows=0, nrows=None, dtype=None):
+        df = super().as_pandas_dataframe(columns, skiprows, nrows, dtype)
+        # Keep the image filenames, if loaded anyway
+        if (
+            self._image_filenames is None
+            and "image_file" in df.columns
+            and skiprows == 0
+            and nrows is None
+        ):
+            self._image_filenames = df.image_file.tolist()
+        return df
+
+    as_pandas_dataframe.__doc__ = Experiment.as_pandas_dataframe.__doc__
+
+    def _write_image_cache(self, size, n_jobs):
+        """Decode the images into a temporary .npy file, which is renamed
+        once complete so readers never see a partial cache."""
+        paths = self._image_paths(size)
+        cache_path = self.image_cache_path(size)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".npy")
+        os.close(fd)
+        try:
+            shape, dtype = _image_shape(paths)
+            images = np.lib.format.open_memmap(
+                tmp_path, mode="w+", dtype=dtype, shape=shape
+            )
+            _read_images(paths, out=images, n_jobs=n_jobs)
+            images.flush()
+            del images
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+class ImageSequence:
+    """Lazy, array-like view of the images of an ImageExperiment, as
+    returned by `ImageExperiment.images`. Indexing by row (an integer,
+    slice, list of indices or boolean mask) only decodes the requested
+    images, e.g., to sample minibatches without loading the whole
+    experiment into memory.
+
+    """
+
+    def __init__(self, experiment, size, n_jobs=-1):
+        self.experiment = experiment
+        self.size = size
+        self.n_jobs = n_jobs
+
+    def __len__(self):
+        return len(self.experiment.image_files)
+
+    def __getitem__(self, indices):
+        return self.experiment.get_images(indices, self.size, n_jobs=self.n_jobs)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.experiment.get_images(i, self.size)
+
+
+def _positions(indices, n):
+    """Return the positions selected by indexing a sequence of length n
+    with the given indices (see `ImageExperiment.get_images`), as an
+    integer or an array of non-negative integers. Unlike indexing
+    `np.arange(n)`, the cost does not grow with n for integer and
+    slice indices."""
+    if isinstance(indices, (int, np.integer, slice)):
+        positions = range(n)[indices]
+        if isinstance(positions, int):
+            return positions
+        return np.array(positions, dtype=int)
+    indices = np.asarray(indices)
+    if indices.dtype == bool:
+        if indices.shape != (n,):
+            raise IndexError(
+                f"Boolean index of shape {indices.shape} does not match {n} images"
             )
-        image_filenames = pd.read_csv(self.csv_path).image_file
-        image_folder = self.image_folders[size]
-        image_paths = [Path(image_folder, f) for f in image_filenames]
-        return np.array([np.array(Image.open(f)) for f in image_paths])
+        return np.flatnonzero(indices)
+    if indices.size == 0:
+        return np.empty(indices.shape, dtype=int)
+    if not np.issubdtype(indices.dtype, np.integer):
+        raise IndexError(
+            "Only integers, slices and integer or boolean arrays are valid indices"
+        )
+    if ((indices < -n) | (indices >= n)).any():
+        raise IndexError(f"Index out of bounds for {n} images")
+    return np.where(indices < 0, indices + n, indices)
+
+
+def _count_rows(csv_path, block_size=1024 * 1024):
+    """Count the rows of a .csv file (excluding its header) by counting
+    its line breaks, without parsing it."""
+    lines, last = 0, b"\n"
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    # The last line may not end with a line break
+    lines += last != b"\n"
+    return max(lines - 1, 0)
+
+
+class _Archive:
+    """Index of the images in the downloaded archive of an image
+    dataset, used to read images which were not extracted. The archive
+    is only opened (and its central directory read) when needed."""
+
+    def __init__(self, path, dataset_name):
+        self.path = Path(path)
+        self.dataset = dataset_name
+        self._folders = None
+        self._zipfile = None
+        self._lock = threading.Lock()
+
+    def folders(self, experiment):
+        """Return a dictionary mapping the image sizes of the experiment
+        to their folders in the archive."""
+        with self._lock:
+            if self._folders is None:
+                self._folders = {}
+                for name in self._open().namelist() if self.path.is_file() else []:
+                    parts = name.split("/")
+                    if (
+                        len(parts) > 3
+                        and parts[0] == self.dataset
+                        and parts[2].startswith("images_")
+                    ):
+                        size = parts[2].split("_")[1]
+                        folders = self._folders.setdefault(parts[1], {})
+                        folders[size] = "/".join(parts[:3])
+        return self._folders.get(experiment, {})
+
+    def read(self, name):
+        """Return the contents of the given file in the archive."""
+        with self._lock:
+            return self._open().read(name)
+
+    def close(self):
+        """Close the archive; it is opened again if needed."""
+        with self._lock:
+            if self._zipfile is not None:
+                self._zipfile.close()
+                self._zipfile = None
+
+    def _open(self):
+        if self._zipfile is None:
+            self._zipfile = zipfile.ZipFile(self.path, "r")
+        return self._zipfile
+
+
+class _ArchiveMember:
+    """An image stored in the archive of a dataset."""
+
+    def __init__(self, archive, name):
+        self.archive = archive
+        self.name = name
+
+
+def _select_member(dataset, image, experiments, image_sizes, name):
+    """Return True if the file with the given name, in the archive of a
+    dataset, belongs to the selected experiments and image sizes."""
+    parts = name.split("/")
+    if len(parts) < 2 or parts[0] != dataset:
+        return True
+    # Experiments are folders in image datasets and .csv files otherwise
+    experiment = parts[1] if image else Path(parts[1]).stem
+    if experiments is not None and experiment not in experiments:
+        return False
+    if image_sizes is not None and image and len(parts) > 3:
+        if parts[2].startswith("images_"):
+            return parts[2].split("_")[1] in image_sizes
+    return True
+
+
+def _open_image(path):
+    if isinstance(path, _ArchiveMember):
+        # Only reading from the archive is serialized; decoding is not
+        return Image.open(io.BytesIO(path.archive.read(path.name)))
+    return Image.open(path)
+
+
+def _image_shape(paths):
+    """Return the shape and dtype of the array holding the given
+    images, which are assumed to have the same size and mode as the
+    first one."""
+    if len(paths) == 0:
+        return (0,), np.uint8
+    with _open_image(paths[0]) as image:
+        first = np.asarray(image)
+    return (len(paths),) + first.shape, first.dtype
+
+
+def _read_images(paths, out=None, n_jobs=-1):
+    """Decode the images at the given paths into `out` (a new array if
+    None) using `n_jobs` threads; PIL releases the GIL while decoding,
+    so the images are decoded in parallel."""
+    if out is None:
+        shape, dtype = _image_shape(paths)
+        out = np.empty(shape, dtype=dtype)
+    n_jobs = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+
+    def read(i):
+        with _open_image(paths[i]) as image:
+            out[i] = image
+
+    if n_jobs == 1 or len(paths) <= 1:
+        for i in range(len(paths)):
+            read(i)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # Consume the results to propagate any exception
+            list(executor.map(read, range(len(paths))))
+    return out
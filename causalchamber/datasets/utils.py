@@ -29,15 +29,192 @@ extract .zip files and check their MD5 checksums.
 """
 
 import numpy as np
+import pandas as pd
+import yaml
+import os
+import shutil
+import tempfile
+import threading
+import time
 import zipfile
 import requests
 from pathlib import Path
 import hashlib
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
+
+# --------------------------------------------------------------------
+# Local cache
+
+
+def cache_dir():
+    """Return the path to the local cache of the package.
+
+    The location can be set with the environment variable
+    CAUSALCHAMBER_CACHE_DIR; otherwise it defaults to
+    `$XDG_CACHE_HOME/causalchamber` (or `~/.cache/causalchamber`).
+
+    """
+    path = os.environ.get("CAUSALCHAMBER_CACHE_DIR")
+    if path is None:
+        base = os.environ.get("XDG_CACHE_HOME") or Path(Path.home(), ".cache")
+        path = Path(base, "causalchamber")
+    return Path(path)
+
+
+def atomic_write(path, content):
+    """Write the given bytes to the file at path, by first writing them
+    to a temporary file in the same directory and then renaming it. A
+    concurrent reader sees either the old or the new file, but never
+    a partially written one.
+
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+# --------------------------------------------------------------------
+# Columnar storage of dataframes
+
+# A dataframe is stored as a directory with one .npy file per column,
+# plus an index (index.yaml) with the column names, the number of rows
+# and any additional metadata. Columns are read back as memory-mapped
+# arrays, so loading a subset of the columns and/or rows only touches
+# the corresponding bytes on disk.
+
+
+def write_columns(df, path, metadata=None):
+    """Write a dataframe to the directory at path, with one .npy file
+    per column. Numeric and boolean columns are stored with their
+    dtype; any other column is stored as fixed-width unicode strings,
+    together with a mask of its missing values. The directory is
+    written under a temporary name and then renamed, so concurrent
+    readers never see a partially written copy.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe to store.
+    path : str or pathlib.Path
+        The directory where the columns are stored. If it already
+        exists, it is replaced.
+    metadata : dict or None, optional
+        Additional entries to store in the index, e.g., to later
+        check that the stored copy is still valid.
+
+    """
+    path = Path(path)
+    tmp_path = Path(tempfile.mkdtemp(dir=path.parent, prefix=f".{path.name}."))
+    try:
+        index = {"n_rows": len(df), "columns": [], "metadata": metadata or {}}
+        for i, (name, column) in enumerate(df.items()):
+            entry = {"name": str(name), "file": f"{i}.npy"}
+            if pd.api.types.is_numeric_dtype(column.dtype):
+                values = column.to_numpy()
+            else:
+                nulls = column.isna().to_numpy()
+                values = column.astype(object).where(~nulls, "").astype(str)
+                values = values.to_numpy(dtype=str)
+                if nulls.any():
+                    entry["nulls"] = f"{i}.nulls.npy"
+                    np.save(Path(tmp_path, entry["nulls"]), nulls)
+            np.save(Path(tmp_path, entry["file"]), values)
+            index["columns"].append(entry)
+        with open(Path(tmp_path, "index.yaml"), "w") as f:
+            yaml.safe_dump(index, f, sort_keys=False)
+        os.chmod(tmp_path, 0o755)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def read_columns_index(path):
+    """Return the index of a dataframe stored with `write_columns`, or
+    None if there is no (complete) copy at path."""
+    try:
+        with open(Path(path, "index.yaml"), "r") as f:
+            return yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return None
+
+
+def read_columns(path, columns=None, start=0, stop=None, index=None):
+    """Read (a subset of) a dataframe stored with `write_columns`.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The directory where the columns are stored.
+    columns : list of str or None, optional
+        The columns to read, in the given order. If None (default),
+        all columns are read.
+    start, stop : int or None, optional
+        Read only the rows in the range [start, stop).
+    index : dict or None, optional
+        The index of the stored dataframe, if it has already been read
+        with `read_columns_index`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The selected columns and rows, with a fresh (0-based) index.
+
+    """
+    index = read_columns_index(path) if index is None else index
+    entries = dict((e["name"], e) for e in index["columns"])
+    columns = list(entries.keys()) if columns is None else columns
+    data = {}
+    for name in columns:
+        entry = entries[name]
+        # Copy the selected rows out of the memory map
+        values = _load_column(Path(path, entry["file"]))[start:stop]
+        values = pd.Series(np.array(values))
+        if "nulls" in entry:
+            nulls = _load_column(Path(path, entry["nulls"]))[start:stop]
+            values = values.mask(np.array(nulls))
+        data[name] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+def _load_column(path):
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays cannot be memory-mapped
+        return np.load(path)
+
 
 # --------------------------------------------------------------------
 # Functions to download, extract and verify datasets
 
+# Size (in bytes) of the blocks in which files are downloaded and hashed
+BLOCK_SIZE = 1024 * 1024
+
+# Timeout (in seconds) for connecting to / receiving data from the server
+TIMEOUT = 60
+
+# Number of times an interrupted download is resumed before giving
+# up, and delay (in seconds, growing linearly) between attempts
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0
+
+_RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
 
 def download_and_extract(
     url,
@@ -45,8 +222,19 @@ def download_and_extract(
     checksum=None,
     algorithm='md5',
     verbose=True,
+    block_size=None,
+    n_connections=1,
+    members=None,
+    n_jobs=1,
 ):
     """
+    Download a .zip file, verify its checksum and extract (some of) its contents.
+
+    The checksum is computed while the file is downloaded, so
+    verifying it does not require reading the file again. Partially
+    downloaded files (e.g., after an interruption) are resumed
+    instead of downloaded again.
+
     Parameters
     ----------
     url : string
@@ -62,6 +250,20 @@ def download_and_extract(
     verbose : bool, optional
         If True, traces are printed and a download progress bar is shown. If False no
         outputs are produced. Defauls to True.
+    block_size : int or None, optional
+        Size (in bytes) of the blocks in which the file is downloaded,
+        written and hashed. If None (default), `BLOCK_SIZE` is used.
+    n_connections : int, optional
+        If larger than 1 and the server supports range requests, the
+        file is downloaded in n_connections parts in parallel. Defaults
+        to 1.
+    members : callable or None, optional
+        A function which takes the name of a file in the archive and
+        returns True if it should be extracted (see `extract`). If None
+        (default), all files are extracted.
+    n_jobs : int, optional
+        Number of threads used to extract the files; -1 means one per
+        CPU. Defaults to 1.
 
     Returns
     -------
@@ -69,50 +271,317 @@ def download_and_extract(
 
     """
     # Check input
-    if algorithm == 'md5':
-        hasher = _compute_md5
-    elif algorithm == 'sha256':
-        hasher = _compute_sha256
-    else:
+    if algorithm not in ['md5', 'sha256']:
         raise ValueError("algorithm must be 'md5' or 'sha256'")
-    
-    local_zipfile = "causal_chamber_" + hashlib.md5(url.encode()).hexdigest() + ".zip"
-    zip_path = Path(root, local_zipfile)
-    # Download
-    _download(url, zip_path, verbose=verbose)
-    # Verify    
+    block_size = BLOCK_SIZE if block_size is None else block_size
+
+    zip_path = download_path(url, root)
+    # Download, computing the checksum on the fly
+    computed = _download(
+        url,
+        zip_path,
+        verbose=verbose,
+        algorithm=algorithm,
+        block_size=block_size,
+        n_connections=n_connections,
+    )
+    # Verify
     if checksum is not None:
         print("  Verifying checksum...", end="") if verbose else None
-        computed = hasher(zip_path)
         if checksum != computed:
+            # Remove the file, so it is not resumed by the next attempt
+            os.remove(zip_path)
             raise Exception(
                 f'Checksum does not match!\n  expected: "{checksum}"\n  computed: "{computed}"'
             )
         else:
             print(" done.") if verbose else None
-    # Extract    
+    # Extract
+    extract(zip_path, root, members=members, n_jobs=n_jobs, verbose=verbose)
+
+
+def download_path(url, root):
+    """Return the path where download_and_extract stores the file
+    downloaded from url into root."""
+    local_zipfile = "causal_chamber_" + hashlib.md5(url.encode()).hexdigest() + ".zip"
+    return Path(root, local_zipfile)
+
+
+def extract(path, root, members=None, n_jobs=1, verbose=True):
+    """Extract (some of) the contents of the .zip file at path into root.
+
+    Only the central directory of the archive is read to select the
+    files; files which have already been extracted (i.e., exist with
+    the same size) are skipped.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The path to the .zip file.
+    root : str or pathlib.Path
+        The directory where the contents are extracted.
+    members : callable or None, optional
+        A function which takes the name of a file in the archive and
+        returns True if it should be extracted. If None (default), all
+        files are extracted.
+    n_jobs : int, optional
+        Number of threads used to decompress the files in parallel; -1
+        means one per CPU. Defaults to 1.
+    verbose : bool, optional
+        If True (default), traces are printed.
+
+    Returns
+    -------
+    int
+        The number of files extracted, i.e., 0 if all of the selected
+        files had already been extracted.
+
+    """
     print(f'  Extracting zip-file contents to "{root}"...', end="") if verbose else None
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        zip_ref.extractall(root)
+    n_jobs = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+    with zipfile.ZipFile(path, "r") as zip_ref:
+        infos = [
+            info
+            for info in zip_ref.infolist()
+            if not info.is_dir()
+            and (members is None or members(info.filename))
+            and not _is_extracted(info, root)
+        ]
+        # Create the directories beforehand, as threads would race to do it
+        for directory in set(os.path.dirname(info.filename) for info in infos):
+            os.makedirs(Path(root, directory), exist_ok=True)
+        if n_jobs == 1 or len(infos) <= 1:
+            for info in infos:
+                zip_ref.extract(info, root)
+        else:
+            # Each thread reads the archive through its own file handle
+            local = threading.local()
+
+            def extract_member(info):
+                if not hasattr(local, "zip_ref"):
+                    local.zip_ref = zipfile.ZipFile(path, "r")
+                local.zip_ref.extract(info, root)
+                return local.zip_ref
+
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                handles = set(executor.map(extract_member, infos))
+            for handle in handles:
+                handle.close()
     print(" done.") if verbose else None
+    return len(infos)
+
+
+def _is_extracted(info, root):
+    target = Path(root, info.filename)
+    return os.path.isfile(target) and os.path.getsize(target) == info.file_size
+
+
+def _download(
+    url,
+    output_path,
+    verbose,
+    algorithm=None,
+    block_size=None,
+    n_connections=1,
+    max_retries=MAX_RETRIES,
+):
+    """Function to actually download the file from the given URL into
+    the given output_path.
+
+    If output_path already contains part of the file (e.g., from an
+    interrupted download), only the remaining bytes are requested with
+    an HTTP Range request; interrupted transfers are also resumed (up
+    to max_retries times). If n_connections > 1 and the server supports
+    range requests, the file is instead split into n_connections parts
+    which are downloaded in parallel.
 
+    If an algorithm (e.g., 'md5') is given, returns the hex digest of
+    the downloaded file, computed while writing it to disk (or, for
+    parallel downloads, by reading it afterwards).
 
-def _download(url, output_path, verbose):
-    """Function to actually download the file from the given URL into the given output_path."""
+    """
     print(f'Downloading dataset from "{url}" into "{output_path}"\n') if verbose else None
-    response = requests.get(url, stream=True)
-    total_size_in_bytes = int(response.headers.get("content-length", 0))
-    block_size = 1024  # 1 Kibibyte
-    if verbose:
-        progress_bar = tqdm(total=total_size_in_bytes, unit="iB", unit_scale=True)
-    with open(output_path, "wb") as file:
-        for data in response.iter_content(block_size):
-            progress_bar.update(len(data)) if verbose else None
-            file.write(data)
-    if verbose:
+    block_size = BLOCK_SIZE if block_size is None else block_size
+    # Parallel downloads (start from scratch; partial files are resumed
+    # by a single connection, as it is not known which parts are complete)
+    if n_connections > 1 and not os.path.isfile(output_path):
+        total_size = _ranged_size(url)
+        if total_size is not None and total_size >= n_connections:
+            _download_parallel(
+                url,
+                output_path,
+                total_size,
+                n_connections,
+                block_size,
+                verbose,
+                max_retries,
+            )
+            if algorithm is not None:
+                return _compute_checksum(output_path, algorithm, block_size)
+            return None
+    return _download_resumable(
+        url, output_path, algorithm, block_size, verbose, max_retries
+    )
+
+
+def _download_resumable(url, output_path, algorithm, block_size, verbose, max_retries):
+    hasher = None
+    written = os.path.getsize(output_path) if os.path.isfile(output_path) else 0
+    progress_bar = None
+    retries = 0
+    while True:
+        headers = {"Range": f"bytes={written}-"} if written > 0 else {}
+        try:
+            response = requests.get(url, stream=True, headers=headers, timeout=TIMEOUT)
+            if response.status_code == 416:
+                # Requested range starts at the end of the file, i.e., it was
+                # already complete; otherwise, start over
+                total = response.headers.get("content-range", "").split("/")[-1]
+                if total == str(written):
+                    if hasher is None and algorithm is not None:
+                        hasher = _hash_prefix(
+                            output_path, algorithm, written, block_size
+                        )
+                    break
+                written = 0
+                continue
+            response.raise_for_status()
+            if response.status_code != 206:
+                # The server sent the whole file
+                written, hasher = 0, None
+            if hasher is None and algorithm is not None:
+                hasher = _hash_prefix(output_path, algorithm, written, block_size)
+            total_size_in_bytes = written + int(
+                response.headers.get("content-length", 0)
+            )
+            if verbose:
+                if progress_bar is not None:
+                    progress_bar.close()
+                progress_bar = tqdm(
+                    total=total_size_in_bytes,
+                    initial=written,
+                    unit="iB",
+                    unit_scale=True,
+                )
+            with open(output_path, "r+b" if written > 0 else "wb") as file:
+                # Drop any bytes that were written but not accounted for
+                file.truncate(written)
+                file.seek(written)
+                for data in response.iter_content(block_size):
+                    file.write(data)
+                    hasher.update(data) if hasher is not None else None
+                    written += len(data)
+                    progress_bar.update(len(data)) if verbose else None
+            if (
+                response.headers.get("content-length") is not None
+                and written < total_size_in_bytes
+            ):
+                raise requests.exceptions.ChunkedEncodingError(
+                    "Connection closed before the download completed"
+                )
+            break
+        except _RETRY_EXCEPTIONS as e:
+            retries += 1
+            if retries > max_retries:
+                raise
+            print(f"\n  Download interrupted ({e}); resuming...") if verbose else None
+            time.sleep(RETRY_DELAY * retries)
+    if progress_bar is not None:
         progress_bar.close()
-        if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-            print("ERROR, something went wrong")
+    return None if hasher is None else hasher.hexdigest()
+
+
+def _download_parallel(
+    url, output_path, total_size, n_connections, block_size, verbose, max_retries
+):
+    """Download the file in n_connections parts (HTTP Range requests),
+    each written directly into its position of the output file."""
+    with open(output_path, "wb") as file:
+        file.truncate(total_size)
+    part_size = -(-total_size // n_connections)
+    parts = [
+        (start, min(start + part_size, total_size))
+        for start in range(0, total_size, part_size)
+    ]
+    progress_bar = (
+        tqdm(total=total_size, unit="iB", unit_scale=True) if verbose else None
+    )
+    lock = threading.Lock()
+
+    def fetch(part):
+        position, stop = part
+        retries = 0
+        with open(output_path, "r+b") as file:
+            while position < stop:
+                headers = {"Range": f"bytes={position}-{stop - 1}"}
+                try:
+                    response = requests.get(
+                        url, stream=True, headers=headers, timeout=TIMEOUT
+                    )
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.exceptions.HTTPError(
+                            f"Range request failed: HTTP status code {response.status_code}"
+                        )
+                    file.seek(position)
+                    for data in response.iter_content(block_size):
+                        data = data[: stop - position]
+                        file.write(data)
+                        position += len(data)
+                        if verbose:
+                            with lock:
+                                progress_bar.update(len(data))
+                    if position < stop:
+                        raise requests.exceptions.ChunkedEncodingError(
+                            "Connection closed before the download completed"
+                        )
+                except _RETRY_EXCEPTIONS:
+                    retries += 1
+                    if retries > max_retries:
+                        raise
+                    time.sleep(RETRY_DELAY * retries)
+
+    try:
+        with ThreadPoolExecutor(max_workers=n_connections) as executor:
+            list(executor.map(fetch, parts))
+    except BaseException:
+        # An incomplete file cannot be resumed by parts later
+        os.remove(output_path)
+        raise
+    finally:
+        progress_bar.close() if verbose else None
+
+
+def _ranged_size(url):
+    """Return the size of the file at url if the server supports range
+    requests for it, and None otherwise."""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=TIMEOUT)
+    except requests.exceptions.RequestException:
+        return None
+    size = response.headers.get("content-length")
+    if (
+        response.status_code != 200
+        or response.headers.get("accept-ranges") != "bytes"
+        or size is None
+    ):
+        return None
+    return int(size)
+
+
+def _hash_prefix(path, algorithm, length, block_size):
+    """Return a hasher updated with the first length bytes of the file at path."""
+    hasher = hashlib.new(algorithm)
+    if length == 0:
+        return hasher
+    with open(path, "rb") as f:
+        while length > 0:
+            block = f.read(min(block_size, length))
+            if not block:
+                break
+            hasher.update(block)
+            length -= len(block)
+    return hasher
 
 
 def _unzip(path, output_dir):
@@ -124,22 +593,371 @@ def _unzip(path, output_dir):
         zip_ref.extractall(output_dir)
 
 
-def _compute_md5(path):
+def _compute_md5(path, block_size=None):
     """Compute the MD5 checksum of a file at the given path."""
-    hasher = hashlib.md5()
-    with open(path, "rb") as f:
-        data = f.read()
-        hasher.update(data)
-    return hasher.hexdigest()
+    return _compute_checksum(path, "md5", block_size)
+
 
-def _compute_sha256(path):
+def _compute_sha256(path, block_size=None):
     """Compute the SHA-256 checksum of a file at the given path."""
-    hasher = hashlib.sha256()
+    return _compute_checksum(path, "sha256", block_size)
+
+
+def _compute_checksum(path, algorithm, block_size=None):
+    """Compute the checksum of a file at the given path, reading it in
+    blocks so memory use does not grow with the file size."""
+    block_size = BLOCK_SIZE if block_size is None else block_size
+    hasher = hashlib.new(algorithm)
     with open(path, "rb") as f:
-        data = f.read()
-        hasher.update(data)
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
     return hasher.hexdigest()
 
+
+# --------------------------------------------------------------------
+# Shared, content-addressed cache of datasets
+
+# Datasets can be stored in a cache shared by all processes (and users
+# with access to it) on a machine, instead of a user-given root
+# directory. Each entry is keyed by the checksum of the dataset archive
+# and contains the archive and its extracted contents. Entries are
+# downloaded into a staging directory and renamed into place once
+# complete, together with a marker file recording their checksum and
+# size, and whether only some of the archive's files were extracted
+# (a partial entry). Processes using an entry hold a shared lock on it, which
+# prevents it from being evicted; entries are evicted in least-recently
+# used order once the cache exceeds its maximum size.
+
+try:
+    import fcntl
+except ImportError:  # e.g., Windows
+    fcntl = None
+
+# Name of the file marking a complete cache entry
+MARKER = ".complete.yaml"
+
+
+class SharedCache:
+    """Content-addressed cache of datasets, safe to share between
+    processes on one machine (see `Dataset` with `root=None`).
+
+    On platforms without `fcntl` (e.g., Windows), entries are not
+    locked and therefore never evicted.
+
+    A cache can be shared with users who have read-only access to it:
+    they can use its complete entries, as shared locks only need to
+    read the (existing) lock files, but not add, extend or evict
+    entries. Lock files are created with the default permissions,
+    i.e., as allowed by the umask of the user creating them.
+
+    Parameters
+    ----------
+    path : str, pathlib.Path or None, optional
+        The directory of the cache. If None (default), the subdirectory
+        `datasets` of the local cache (see `cache_dir`).
+    max_size : int, float or None, optional
+        Maximum size of the cache in bytes, after which least-recently
+        used entries are evicted. If None (default), it is read from
+        the environment variable CAUSALCHAMBER_CACHE_MAX_SIZE; if that
+        is not set either, the size is not bounded.
+
+    """
+
+    def __init__(self, path=None, max_size=None):
+        self.path = Path(cache_dir(), "datasets") if path is None else Path(path)
+        if max_size is None:
+            max_size = os.environ.get("CAUSALCHAMBER_CACHE_MAX_SIZE")
+        self.max_size = None if max_size is None else int(float(max_size))
+
+    def entries(self):
+        """Return a dictionary with the (complete) entries in the cache,
+        mapping their keys to their markers."""
+        entries = {}
+        if not os.path.isdir(self.path):
+            return entries
+        for path in self.path.iterdir():
+            # Skip lock files, and staging and trash directories
+            if path.name.startswith(".") or not path.is_dir():
+                continue
+            marker = _read_marker(path)
+            if marker is not None:
+                entries[path.name] = marker
+        return entries
+
+    def size(self):
+        """Return the total size (in bytes) of the entries in the cache."""
+        return sum(marker["size"] for marker in self.entries().values())
+
+    def acquire(
+        self,
+        key,
+        url,
+        download=True,
+        members=None,
+        n_connections=1,
+        n_jobs=1,
+        verbose=True,
+    ):
+        """Return a lease on the cache entry for the given key, downloading
+        and extracting the file at url into it if necessary. While the
+        lease is held, the entry is not evicted.
+
+        Parameters
+        ----------
+        key : str
+            The key of the entry, i.e., the MD5 checksum of the file.
+        url : str
+            The download URL of the file.
+        download : bool, optional
+            If False and the entry is not in the cache, raise a
+            FileNotFoundError instead of downloading it. Defaults to
+            True.
+        members, n_connections, n_jobs, verbose :
+            See `download_and_extract`. If members is given and the
+            entry exists, any missing members are extracted into it.
+            Entries created with members are marked as partial; if
+            members is None and the entry is partial, the rest of the
+            archive is extracted into it.
+
+        Returns
+        -------
+        CacheLease
+            The lease, whose attribute `path` is the entry's directory
+            and `extracted` is True if files were extracted into an
+            existing entry.
+
+        """
+        os.makedirs(self.path, exist_ok=True)
+        entry = Path(self.path, key)
+        reader = _FileLock(Path(self.path, f"{key}.lock"))
+        reader.acquire(exclusive=False)
+        try:
+            marker = _read_marker(entry)
+            archive = download_path(url, entry)
+            extracted = False
+            if marker is None or (
+                _needs_extraction(marker, members) and os.path.isfile(archive)
+            ):
+                # Only one process at a time downloads / extracts an entry
+                writer = _FileLock(Path(self.path, f"{key}.write.lock"))
+                writer.acquire(exclusive=True)
+                try:
+                    marker = _read_marker(entry)
+                    if marker is None:
+                        if not download:
+                            raise FileNotFoundError(
+                                f'Could not find entry "{key}" in the cache at "{self.path}".'
+                            )
+                        self._add(key, url, members, n_connections, n_jobs, verbose)
+                    elif _needs_extraction(marker, members):
+                        n_files = extract(
+                            archive, entry, members, n_jobs=n_jobs, verbose=verbose
+                        )
+                        marker["size"] = _directory_size(entry)
+                        partial = marker.get("partial", False)
+                        marker["partial"] = partial and members is not None
+                        _write_marker(entry, marker)
+                        extracted = n_files > 0
+                finally:
+                    writer.release()
+            # Record the time of last use, for eviction
+            try:
+                os.utime(Path(entry, MARKER))
+            except OSError:
+                pass  # e.g., an entry created by another user
+        except BaseException:
+            reader.release()
+            raise
+        try:
+            self.evict(keep=[key])
+        except OSError:
+            pass  # Failing to evict other entries does not affect this one
+        except BaseException:
+            reader.release()
+            raise
+        return CacheLease(entry, reader, extracted)
+
+    def evict(self, keep=()):
+        """Evict least-recently used entries until the cache is within its
+        maximum size. Entries which are in use, or given in keep, are
+        not evicted.
+
+        Several processes may evict entries at the same time; entries
+        removed by another process are skipped.
+
+        Returns
+        -------
+        list of str
+            The keys of the evicted entries.
+
+        """
+        if self.max_size is None:
+            return []
+        entries = self.entries()
+        total = sum(marker["size"] for marker in entries.values())
+        last_use = {}
+        for key in entries:
+            try:
+                last_use[key] = os.path.getmtime(Path(self.path, key, MARKER))
+            except FileNotFoundError:
+                total -= entries[key]["size"]  # Evicted by another process
+        evicted = []
+        for key in sorted(last_use, key=last_use.get):
+            if total <= self.max_size:
+                break
+            if key in keep:
+                continue
+            if self._remove(key):
+                evicted.append(key)
+            if not os.path.isdir(Path(self.path, key)):
+                total -= entries[key]["size"]
+        # Remove the trash left by evictions which did not finish
+        for path in self.path.glob(".*.trash*"):
+            shutil.rmtree(path, ignore_errors=True)
+        return evicted
+
+    def _remove(self, key):
+        """Remove an entry if it is not in use, returning True if it was
+        removed by this call."""
+        reader = _FileLock(Path(self.path, f"{key}.lock"))
+        writer = _FileLock(Path(self.path, f"{key}.write.lock"))
+        try:
+            if not reader.acquire(exclusive=True, blocking=False):
+                return False
+            if not writer.acquire(exclusive=True, blocking=False):
+                return False
+            # Rename first, so no one sees a partially deleted entry; the
+            # trash directory is unique, as other processes may be
+            # evicting (or may have failed to evict) the same entry
+            trash = tempfile.mkdtemp(dir=self.path, prefix=f".{key}.trash.")
+            try:
+                os.replace(Path(self.path, key), trash)
+            except FileNotFoundError:
+                shutil.rmtree(trash, ignore_errors=True)
+                return False  # Evicted by another process
+            shutil.rmtree(trash, ignore_errors=True)
+            return True
+        except PermissionError:
+            return False  # e.g., a cache shared read-only by another user
+        finally:
+            writer.release()
+            reader.release()
+
+    def _add(self, key, url, members, n_connections, n_jobs, verbose):
+        """Download and extract an entry into a staging directory and
+        rename it into place once complete. The staging directory is
+        kept on failure, so the download is resumed by the next
+        attempt."""
+        staging = Path(self.path, f".{key}.partial")
+        os.makedirs(staging, exist_ok=True)
+        download_and_extract(
+            url,
+            staging,
+            checksum=key,
+            verbose=verbose,
+            n_connections=n_connections,
+            members=members,
+            n_jobs=n_jobs,
+        )
+        marker = {
+            "checksum": key,
+            "url": url,
+            "size": _directory_size(staging),
+            "partial": members is not None,
+        }
+        _write_marker(staging, marker)
+        os.chmod(staging, 0o755)
+        entry = Path(self.path, key)
+        if os.path.isdir(entry):
+            # An incomplete entry (e.g., without marker)
+            shutil.rmtree(entry)
+        os.replace(staging, entry)
+
+
+class CacheLease:
+    """A lease on an entry of the SharedCache, which prevents it from
+    being evicted until it is released. It can be used as a context
+    manager, which releases it on exit."""
+
+    def __init__(self, path, lock, extracted=False):
+        self.path = path
+        self.extracted = extracted
+        self._lock = lock
+
+    def release(self):
+        """Release the lease; releasing it again has no effect."""
+        self._lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class _FileLock:
+    """An advisory lock (fcntl.flock) on the file at path; shared locks
+    may be held by several processes at once, exclusive ones by one."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self, exclusive=True, blocking=True):
+        """Acquire the lock, returning True if successful. Non-blocking
+        attempts return False if the lock is held by someone else (or
+        file locking is not available)."""
+        if fcntl is None:
+            return blocking
+        if self._file is None:
+            # Shared locks only need to read the file, e.g., in a cache
+            # shared read-only by another user
+            try:
+                self._file = open(self.path, "a+" if exclusive else "r")
+            except FileNotFoundError:
+                self._file = open(self.path, "a+")
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(self._file, flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        # Closing the file releases the lock
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _read_marker(entry):
+    """Return the marker of a complete cache entry, or None."""
+    try:
+        with open(Path(entry, MARKER), "r") as f:
+            return yaml.safe_load(f)
+    except (OSError, yaml.YAMLError):
+        return None
+
+
+def _needs_extraction(marker, members):
+    """Return True if files may be missing from a complete cache entry,
+    i.e., some members are selected (which may not have been
+    extracted), or all are and the entry is partial."""
+    return members is not None or marker.get("partial", False)
+
+
+def _write_marker(entry, marker):
+    atomic_write(Path(entry, MARKER), yaml.safe_dump(marker).encode())
+
+
+def _directory_size(path):
+    size = 0
+    for directory, _, files in os.walk(path):
+        size += sum(os.path.getsize(Path(directory, f)) for f in files)
+    return size
+
+
 # --------------------------------------------------------------------
 # Functions used by experiment protocol generators
 
@@ -1 +1 @@
-from .main import latex_name, graph
+from .main import latex_name, graph, variables, dtypes
@@ -394,6 +394,39 @@ def variables(chamber, configuration):
         raise ValueError(f"Unknown chamber/configuration: {chamber}/{configuration}")
 
 
+def dtypes(chamber, configuration, dtype="float64"):
+    """
+    Return a map from the variables provided by the given chamber in the given configuration to a numeric dtype, e.g., to pass as the `dtype` argument when loading an experiment with `Experiment.as_pandas_dataframe` or `pandas.read_csv`.
+
+    Parameters
+    ----------
+    chamber : str
+        The chamber e.g., 'lt' for the light tunnel, 'wt' for the wind tunnel.
+    configuration : str
+        The configuration of the chamber. e.g., 'standard', 'camera', 'pressure-control'.
+    dtype : str or numpy.dtype, optional
+        The dtype assigned to every variable. Defaults to 'float64';
+        'float32' halves the memory used by the loaded data.
+
+    Returns
+    -------
+    dict
+        A dictionary mapping each variable (as it appears in the columns of the .csv files in datasets) to the given dtype. The image variable `im` is not included, as it is not a column.
+
+    Raises
+    ------
+    ValueError
+        If the chamber/configuration combination is unknown.
+
+    >>> len(dtypes('lt', 'camera'))
+    41
+    >>> dtypes('wt', 'standard', 'float32')['rpm_in']
+    'float32'
+
+    """
+    return dict((v, dtype) for v in variables(chamber, configuration) if v != "im")
+
+
 def edges(chamber, configuration):
     """
     Return the edges in the ground truth graph of the given chamber in the given configuration.
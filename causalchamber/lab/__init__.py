@@ -20,5 +20,5 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
-from .chamber import Chamber
-from .lab import Lab
+from .chamber import Chamber, AsyncChamber
+from .lab import Lab, AsyncLab
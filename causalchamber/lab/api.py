@@ -29,9 +29,12 @@ implemented here.
 """
 
 # Packages from the standard library
+import asyncio
 import configparser
+import functools
 import statistics
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 # Third party libraries
 import requests
@@ -39,6 +42,11 @@ import requests
 # Imports from this package
 from causalchamber.lab.exceptions import LabError, UserError
 
+# Default size of the connection pool and timeout (in seconds) to
+# establish a connection to the API
+POOL_SIZE = 10
+CONNECT_TIMEOUT = 10
+
 
 class API():
     """
@@ -46,7 +54,8 @@ class API():
     
     The class handles authentication and HTTP requests to the API. It manages
     credentials, tracks request timing statistics, and provides error handling
-    for various response codes.
+    for various response codes. Requests are sent through a persistent
+    session, which keeps the connections to the API open and reuses them.
     
     Attributes
     ----------
@@ -54,7 +63,7 @@ class API():
         Base URL for the API endpoint.
     """
 
-    def __init__(self, credentials_file=None, endpoint='https://api.causalchamber.ai/v0', credentials=None):
+    def __init__(self, credentials_file=None, endpoint='https://api.causalchamber.ai/v0', credentials=None, pool_size=POOL_SIZE, timeout=(CONNECT_TIMEOUT, None)):
         """Initialize the API client with credentials and endpoint.
         
         Reads authentication credentials from a configuration file and sets up
@@ -80,6 +89,18 @@ class API():
             A tuple (<user>, <password>) with the user and password
             for the API. Either credentials or credentials_file
             must be provided. If both are, credentials is used.
+        pool_size : int, optional
+            The maximum number of connections to the API that are kept
+            open for reuse, i.e., the number of requests that can be
+            made concurrently (e.g., from several threads) without
+            opening new connections. Default is 10.
+        timeout : float, tuple or None, optional
+            Timeout (in seconds) of the requests to the API, passed to
+            `requests`: a single value, or a tuple (connect timeout,
+            read timeout). None means waiting indefinitely. By default,
+            establishing a connection times out after 10 seconds, and
+            there is no limit on the time to wait for a response (e.g.,
+            for long measurements).
         
         Raises
         ------
@@ -158,6 +179,25 @@ class API():
                 raise UserError(0, f"Could not find header '[api_keys]' in credentials file at '{credentials_file}'. Check your credentials file and try again.")
         else:
             raise ValueError("Either credentials_file or credentials must be provided.")
+        
+        # Persistent session, reusing connections (keep-alive) from a
+        # pool shared by all requests to the API
+        self._timeout = timeout
+        self._session = requests.Session()
+        self._session.auth = (self._api_user, self._api_password)
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_size)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def close(self):
+        """Close the connections to the API kept open by the client."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     @property
     def user_id(self):
@@ -175,7 +215,7 @@ class API():
         """
         return self._endpoint
         
-    def make_request(self, method, path, parameters=None):
+    def make_request(self, method, path, parameters=None, stream=False):
         """Make an HTTP request to the API endpoint.
         
         Sends an authenticated HTTP request to the API and handles various
@@ -194,6 +234,11 @@ class API():
             Dictionary of parameters to send as JSON body in the
             request. If None, the request is made with an empty
             body. Default is None
+        stream : bool, optional
+            If True, only the headers of a successful response are
+            read, and its body can be consumed incrementally (e.g.,
+            with response.iter_content). The response must then be
+            closed to release the connection. Default is False.
         
         Returns
         -------
@@ -208,8 +253,8 @@ class API():
             If the API returns a 400, 401, 403 or 409 HTTP error, indicating a
             client-side error.
         LabError
-            If it is impossible to connect to the API, or the API
-            returns any other HTTP code, including error codes (e.g.,
+            If it is impossible to connect to the API, the request
+            times out, or the API returns any other HTTP code, including error codes (e.g.,
             404, 405 and 5XX) which indicate a server error or point
             to a potential error in this client.
         
@@ -250,20 +295,21 @@ class API():
         url = self._endpoint.rstrip('/') + '/' + path.lstrip('/')
 
         try:
-            response = requests.request(
+            response = self._session.request(
                 method=method,
                 url=url,
                 json=parameters,
-                auth=(self._api_user, self._api_password)
+                timeout=self._timeout,
+                stream=stream,
             )
         except requests.exceptions.ConnectionError as e:
             raise LabError(1, f'Could not connect to the API at {self.endpoint}. If the problem persists, contact us at support@causalchamber.ai or through any of the provided support channels. Error details: {e}')
+        except requests.exceptions.Timeout as e:
+            raise LabError(1, f'The request to the API at {self.endpoint} timed out. If the problem persists, contact us at support@causalchamber.ai or through any of the provided support channels. Error details: {e}')
 
         # Store request roundtime in stats dictionary
         key = f'{method} {url}'
-        if key not in self._stats_timing:
-            self._stats_timing[key] = []
-        self._stats_timing[key].append(response.elapsed.total_seconds())
+        self._stats_timing.setdefault(key, []).append(response.elapsed.total_seconds())
 
         # Return succesful requests
         if response.status_code == 200:
@@ -334,6 +380,104 @@ class API():
             print(string)
 
 
+class AsyncAPI():
+    """
+    asyncio version of the API client, for use with the lab.AsyncChamber
+    and lab.AsyncLab classes.
+
+    Requests are sent through the persistent session of a lab.api.API
+    client, from a pool of `pool_size` threads, so that one event loop
+    can wait on many requests (e.g., to several chambers) at once.
+
+    Attributes
+    ----------
+    endpoint : str
+        Base URL for the API endpoint.
+    """
+
+    def __init__(self, credentials_file=None, endpoint='https://api.causalchamber.ai/v0', credentials=None, pool_size=POOL_SIZE, timeout=(CONNECT_TIMEOUT, None)):
+        """Initialize the API client with credentials and endpoint. The
+        parameters are the same as for lab.api.API; `pool_size` is
+        also the number of requests that can be in flight at once.
+
+        Examples
+        --------
+        >>> api = AsyncAPI(credentials = ('username', 'password'))
+        >>> api.user_id
+        'username'
+        >>> api.close()
+
+        """
+        self._api = API(credentials_file=credentials_file,
+                        endpoint=endpoint,
+                        credentials=credentials,
+                        pool_size=pool_size,
+                        timeout=timeout)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    @property
+    def user_id(self):
+        return self._api.user_id
+
+    @property
+    def api(self):
+        """
+        Get the lab.api.API client through which the requests are sent,
+        e.g., to make blocking requests through the same connections.
+
+        Returns
+        -------
+        lab.api.API
+            The wrapped client.
+        """
+        return self._api
+
+    @property
+    def endpoint(self):
+        """
+        Get the API endpoint URL.
+        
+        Returns
+        -------
+        str
+            The base URL for the API endpoint.
+        """
+        return self._api.endpoint
+
+    async def make_request(self, method, path, parameters=None, stream=False):
+        """Make an HTTP request to the API endpoint, without blocking the
+        event loop. See lab.api.API.make_request for the parameters,
+        return value and exceptions.
+        """
+        return await self.call(self._api.make_request, method, path, parameters, stream)
+
+    async def call(self, function, *args):
+        """Run a blocking function (e.g., parsing a large response) in the
+        client's thread pool and return its result, without blocking
+        the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(function, *args))
+
+    def print_timing_stats(self):
+        """
+        Print timing statistics for all API requests made, grouped by
+        HTTP method and URL (see lab.api.API.print_timing_stats).
+        """
+        self._api.print_timing_stats()
+
+    def close(self):
+        """Close the connections to the API and stop the thread pool."""
+        self._executor.shutdown(wait=False)
+        self._api.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
 # ----------------------------------------------------------------------
 # Doctests
 
@@ -28,9 +28,11 @@ This module implements the lab.Chamber class for real-time experiments.
 """
 
 # Packages from the standard library
+import asyncio
 import io
-from email import message_from_string
-import base64
+import os
+import re
+import binascii
 import numpy as np
 import timeit
 import threading
@@ -38,13 +40,18 @@ import itertools
 import time
 import sys
 import numbers
+import queue
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # Third-party packages
 import pandas as pd
 from PIL import Image
 
 # Imports from this package
-from causalchamber.lab.api import API
+from causalchamber.lab.api import API, AsyncAPI
+
+# Size (in bytes) of the chunks in which streamed responses are read
+STREAM_CHUNK_SIZE = 64 * 1024
 
 
 class Chamber():
@@ -138,11 +145,7 @@ class Chamber():
 
         try:
             response = self._API.make_request('POST', 'sessions', {'chamber_id': chamber_id, 'chamber_config': config})
-            self._session_id = response.json()['session_id']
-            self._chamber_model = response.json()['chamber_model']
-            self._config_version = response.json()['config_version']
-            self._documentation = response.json()['documentation']
-            self._codebase_version = response.json()['codebase_version']
+            self._start_session(response)
         finally:
             spinner.stop() if self.verbose else None
             
@@ -150,6 +153,16 @@ class Chamber():
             print(f"  Done. ({timeit.default_timer() - start:0.2f} seconds)")
             print(self)
 
+    def _start_session(self, response):
+        """Store the details of the session started by the given response
+        to a POST /sessions request."""
+        session = response.json()
+        self._session_id = session['session_id']
+        self._chamber_model = session['chamber_model']
+        self._config_version = session['config_version']
+        self._documentation = session['documentation']
+        self._codebase_version = session['codebase_version']
+
     def set(self, target, value):
         """
         Set a chamber variable to the specified value, i.e., sends a
@@ -179,7 +192,7 @@ class Chamber():
         instruction = _generate_set(target, value)
         return self._submit_instructions([instruction])
 
-    def measure(self, n, delay=0):
+    def measure(self, n, delay=0, stream=False):
         """Take n successive measurements of all variables in the
         chamber, including images if it produces them. By setting
         delay (in milliseconds), the chamber adds an additional delay
@@ -194,6 +207,11 @@ class Chamber():
         delay : int
             Delay between consecutive measurements in milliseconds. Must be
             non-negative (default is 0).
+        stream : bool, optional
+            If True, return an iterator over the observations, which
+            reads the response as it arrives and yields each
+            observation as soon as it is complete. Only one image is
+            held in memory at a time. Default is False.
         
         Returns
         -------
@@ -201,6 +219,12 @@ class Chamber():
             A DataFrame containing the measured observations. If the
             chamber produces images, a tuple with the observations and
             the collected images as a list of numpy arrays.
+        iterator
+            If stream=True, an iterator over the observations, each
+            given as a pandas.Series or, if the chamber produces
+            images, as a tuple (pandas.Series, numpy.ndarray). Closing
+            the iterator (or leaving a for-loop over it) before the
+            end discards the rest of the response.
         
         Raises
         ------
@@ -217,14 +241,17 @@ class Chamber():
 
         """
         instruction = _generate_msr(n, delay)
-        return self._submit_instructions([instruction])
+        if stream:
+            return self._stream_instructions([instruction])
+        else:
+            return self._submit_instructions([instruction])
 
-    def msr(self, n, delay=0):
+    def msr(self, n, delay=0, stream=False):
         """
         Shorthand alias for the Chamber.measure(..) method. See
         the Chamber.measure(..) documentation for full details.
         """
-        return self.measure(n, delay)
+        return self.measure(n, delay, stream)
 
     @property
     def verbose(self):
@@ -339,6 +366,37 @@ class Chamber():
         """
         return Batch(self)
 
+    def pipeline(self, max_in_flight=2):
+        """Create a pipeline to submit batches of instructions without
+        waiting for the results of the previous ones.
+
+        See lab.chamber.Pipeline for details.
+
+        Parameters
+        ----------
+        max_in_flight : int, optional
+            Maximum number of batches which have been submitted but
+            whose results have not yet been delivered. Once it is
+            reached, Pipeline.submit blocks until the oldest batch
+            completes. Defaults to 2.
+
+        Returns
+        -------
+        lab.chamber.Pipeline
+            A new pipeline for this chamber's session. Close it (or
+            use it as a context manager) to wait for the remaining
+            batches.
+
+        Examples
+        --------
+        ```
+        with chamber.pipeline(max_in_flight=4) as pipeline:
+            futures = [pipeline.submit(batch) for batch in batches]
+        results = [future.result() for future in futures]
+        ```
+        """
+        return Pipeline(self._API, self.session_id, max_in_flight)
+
     def _submit_instructions(self, instructions):
         """
         Submit a list of instructions to the API.
@@ -369,17 +427,18 @@ class Chamber():
         """
         body = {'instructions': instructions}
         response = self._API.make_request('POST', f'sessions/{self.session_id}/instructions', body)
-        content_type = response.headers.get('content-type', '')
-        # Parse response
-        if response.text == '':
-            return None
-        else:
-            obs, images = _parse_multipart_response(response.text, content_type)
-            if not images:
-                return obs
-            else:
-                return obs, images
+        return _parse_instructions_response(response)
 
+    def _stream_instructions(self, instructions):
+        """
+        Submit a list of instructions to the API, returning an iterator
+        over the observations in the response (see
+        Chamber.measure). The request is sent, and errors raised,
+        before returning.
+        """
+        body = {'instructions': instructions}
+        response = self._API.make_request('POST', f'sessions/{self.session_id}/instructions', body, stream=True)
+        return _stream_observations(response)
         
     def __str__(self):
         """
@@ -405,6 +464,143 @@ class Chamber():
         return msg
 
 
+class AsyncChamber(Chamber):
+    """
+    asyncio version of lab.Chamber, to operate one or more chambers
+    from a single event loop.
+
+    Connect to a chamber with `await AsyncChamber.connect(...)`. The
+    methods set, measure and msr, and the submit method of the
+    batches returned by new_batch, are coroutines with the same
+    parameters, results and exceptions as for lab.Chamber. With
+    stream=True, measure and msr return an asynchronous iterator
+    instead (`async for observation in chamber.measure(n, stream=True)`). Responses
+    are parsed in the thread pool of the underlying lab.api.AsyncAPI
+    client, so that the event loop can keep sending instructions
+    (e.g., to other chambers) in the meantime.
+
+    Examples
+    --------
+    Several chambers can share a client, and thus its connections:
+
+    ```
+    api = AsyncAPI('credentials.ini')
+    chambers = await asyncio.gather(
+        *(AsyncChamber.connect(chamber_id, 'standard', api=api) for chamber_id in chamber_ids)
+    )
+    await asyncio.gather(*(chamber.set('red', 255) for chamber in chambers))
+    observations = await asyncio.gather(*(chamber.measure(10) for chamber in chambers))
+    ```
+    """
+
+    def __init__(self, *args, **kwargs):
+        raise TypeError("Use 'await AsyncChamber.connect(...)' to connect to a chamber.")
+
+    @classmethod
+    async def connect(cls, chamber_id, config, credentials_file=None, endpoint="https://api.causalchamber.ai/v0", verbose=1, credentials=None, api=None):
+        """Start a new real-time connection to the specified chamber,
+        returning a lab.AsyncChamber instance to control it.
+
+        The parameters are the same as for lab.Chamber, plus:
+
+        Parameters
+        ----------
+        api : lab.api.AsyncAPI or None, optional
+            A client through which to connect to the chamber, e.g., to
+            share its connections between several chambers. If None
+            (default), a new client is created with the given
+            credentials and endpoint, and closed by
+            AsyncChamber.close.
+
+        Returns
+        -------
+        lab.AsyncChamber
+            The connected chamber.
+
+        Raises
+        ------
+        See lab.Chamber.
+
+        """
+        chamber = cls.__new__(cls)
+        chamber._chamber_id = chamber_id
+        chamber._config = config
+        chamber._verbose = verbose
+        chamber._owns_api = api is None
+        if api is None:
+            api = AsyncAPI(credentials_file = credentials_file,
+                           endpoint = endpoint,
+                           credentials = credentials)
+        chamber._API = api
+
+        # Start a session
+        if verbose:
+            print(f"\nContacting chamber {chamber_id}")
+            print(f"  Resetting & verifying hardware (config: {config})")
+            start = timeit.default_timer()
+        response = await api.make_request('POST', 'sessions', {'chamber_id': chamber_id, 'chamber_config': config})
+        chamber._start_session(response)
+        if verbose:
+            print(f"  Done. ({timeit.default_timer() - start:0.2f} seconds)")
+            print(chamber)
+        return chamber
+
+    def close(self):
+        """Close the client of this chamber, unless it was given when
+        connecting."""
+        if self._owns_api:
+            self._API.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def pipeline(self, max_in_flight=2):
+        """See lab.Chamber.pipeline. The batches are submitted from the
+        pipeline's own threads; use asyncio.wrap_future to await the
+        futures it returns."""
+        return Pipeline(self._API.api, self.session_id, max_in_flight)
+
+    async def _submit_instructions(self, instructions):
+        """
+        Submit a list of instructions to the API (see
+        lab.Chamber._submit_instructions).
+        """
+        body = {'instructions': instructions}
+        response = await self._API.make_request('POST', f'sessions/{self.session_id}/instructions', body)
+        return await self._API.call(_parse_instructions_response, response)
+
+    async def _stream_instructions(self, instructions):
+        """
+        Submit a list of instructions to the API, yielding the
+        observations in the response as they arrive (see
+        lab.Chamber._stream_instructions). The response is read in
+        the thread pool of the client.
+        """
+        body = {'instructions': instructions}
+        response = await self._API.make_request('POST', f'sessions/{self.session_id}/instructions', body, stream=True)
+        observations = _stream_observations(response)
+        pending = None
+        try:
+            while True:
+                # Shielded, so that the call keeps running (and can be
+                # waited for below) if the consumer is cancelled
+                pending = asyncio.ensure_future(self._API.call(next, observations, None))
+                observation = await asyncio.shield(pending)
+                if observation is None:
+                    break
+                yield observation
+        finally:
+            if pending is not None and not pending.done():
+                # The iterator cannot be closed while next is running
+                await asyncio.wait([pending])
+                if not pending.cancelled():
+                    pending.exception()  # Retrieved, as it is discarded
+            observations.close()
+
+
 class Batch():
     """
     Batch object to send multiple instructions in a single request.
@@ -716,6 +912,168 @@ class Batch():
         return self._chamber._submit_instructions(self._instructions)
         
     
+class Pipeline():
+    """
+    Submits batches of instructions to a real-time session without
+    blocking the caller, returned by lab.Chamber.pipeline.
+
+    Batches are sent to the chamber in the order they are submitted,
+    each as soon as the response to the previous one arrives, while
+    the responses are parsed in a separate thread. The caller can
+    thus prepare and queue further batches (e.g., compute the next
+    control input of a closed-loop experiment) while the chamber
+    executes the current one.
+
+    The result of each batch (see Batch.submit) is delivered through a
+    concurrent.futures.Future. Futures are resolved, and their
+    callbacks called, in submission order. At most max_in_flight
+    batches can be pending at once; further calls to submit block
+    until the oldest one completes.
+
+    If a batch fails (e.g., because of an invalid instruction), the
+    batches submitted after it which have not been sent yet are
+    skipped and their futures cancelled, and later calls to submit
+    raise the same error.
+
+    A future can be cancelled (Future.cancel) while its batch is
+    waiting to be sent, in which case the batch is skipped.
+
+    """
+
+    def __init__(self, api, session_id, max_in_flight=2):
+        """
+        Initialize a pipeline for the given session; use
+        lab.Chamber.pipeline instead.
+
+        Parameters
+        ----------
+        api : lab.api.API
+            The client through which the batches are sent.
+        session_id : str
+            The identifier of the real-time session.
+        max_in_flight : int, optional
+            See lab.Chamber.pipeline. Defaults to 2.
+
+        Raises
+        ------
+        TypeError
+            If max_in_flight is not an integer.
+        ValueError
+            If max_in_flight is not larger than zero.
+
+        """
+        if not isinstance(max_in_flight, numbers.Integral):
+            raise TypeError(f"max_in_flight must be an integer, not {type(max_in_flight).__name__}")
+        if max_in_flight <= 0:
+            raise ValueError("max_in_flight must be an integer larger than zero")
+        self._API = api
+        self._session_id = session_id
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._to_send = queue.Queue()
+        self._to_parse = queue.Queue()
+        self._error = None
+        self._closed = False
+        self._threads = [threading.Thread(target=self._send, daemon=True),
+                         threading.Thread(target=self._parse, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, batch, callback=None):
+        """Queue a batch of instructions for submission.
+
+        The instructions in the batch are copied, so the batch can be
+        cleared and reused right after this call.
+
+        Parameters
+        ----------
+        batch : lab.chamber.Batch
+            The batch of instructions.
+        callback : callable or None, optional
+            If given, it is called with the future once it is
+            resolved, from the pipeline's thread. Defaults to None.
+
+        Returns
+        -------
+        concurrent.futures.Future
+            The future for the result of the batch (see Batch.submit).
+
+        Raises
+        ------
+        RuntimeError
+            If the pipeline is closed.
+        UserError, LabError
+            If a previous batch failed (see Batch.submit).
+
+        """
+        if self._closed:
+            raise RuntimeError("The pipeline is closed")
+        instructions = list(batch.instructions)
+        self._slots.acquire()
+        if self._error is not None:
+            self._slots.release()
+            raise self._error
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self._to_send.put((future, instructions))
+        return future
+
+    def close(self):
+        """Wait until all submitted batches are completed and stop the
+        pipeline's threads."""
+        if not self._closed:
+            self._closed = True
+            self._to_send.put(None)
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _send(self):
+        """Send the queued batches one after the other (sender thread)."""
+        while True:
+            item = self._to_send.get()
+            if item is None:
+                break
+            future, instructions = item
+            if self._error is not None or not future.set_running_or_notify_cancel():
+                self._to_parse.put((future, None, None))
+                continue
+            try:
+                body = {'instructions': instructions}
+                response = self._API.make_request('POST', f'sessions/{self._session_id}/instructions', body)
+                self._to_parse.put((future, response, None))
+            except Exception as e:
+                self._error = e
+                self._to_parse.put((future, None, e))
+        self._to_parse.put(None)
+
+    def _parse(self):
+        """Parse the responses and resolve the futures, in submission
+        order (parser thread)."""
+        while True:
+            item = self._to_parse.get()
+            if item is None:
+                break
+            future, response, error = item
+            if response is not None:
+                try:
+                    future.set_result(_parse_instructions_response(response))
+                except Exception as e:
+                    self._error = e
+                    future.set_exception(e)
+            elif error is not None:
+                future.set_exception(error)
+            else:
+                # Skipped after an error, or cancelled by the user
+                future.cancel()
+            self._slots.release()
+            
+
 # --------------------------------------------------------------------
 # Auxiliary functions: instruction generators
     
@@ -903,20 +1261,191 @@ def _generate_wait(milliseconds):
     
 # --------------------------------------------------------------------
 # Auxiliary functions
+
+def _parse_instructions_response(response):
+    """
+    Parse the response to a request submitting instructions to a
+    chamber.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The response from the API.
+
+    Returns
+    -------
+    None, pandas.DataFrame, or tuple
+        None if the response is empty (e.g., WAIT and SET
+        instructions), a pandas.DataFrame with the collected
+        observations (MSR instructions), or a tuple (pandas.Dataframe,
+        list of numpy arrays) if the chamber also produces images.
+
+    """
+    content_type = response.headers.get('content-type', '')
+    if response.content == b'':
+        return None
+    else:
+        obs, images = _parse_multipart_response(response.content, content_type)
+        if not images:
+            return obs
+        else:
+            return obs, images
+
+
+def _stream_observations(response):
+    """
+    Iterate over the observations in a streamed response to a
+    measurement, reading the response as it arrives.
+
+    Parameters
+    ----------
+    response : requests.Response
+        The response from the API, made with stream=True. It is closed
+        when the iteration ends or the iterator is closed.
+
+    Yields
+    ------
+    pandas.Series or tuple
+        Each observation, or a tuple (pandas.Series, numpy.ndarray)
+        with the observation and its image if the chamber produces
+        images.
+
+    Raises
+    ------
+    ValueError
+        If no boundary is found in the content-type header of a
+        non-empty response, or the response ends unexpectedly.
+
+    """
+    try:
+        content_type = response.headers.get('content-type', '')
+        if 'boundary=' not in content_type:
+            if response.content == b'':
+                return
+            raise ValueError("No boundary found in content-type header")
+        boundary = content_type.split('boundary=')[1].strip().strip('"')
+        chunks = response.iter_content(STREAM_CHUNK_SIZE)
+        obs, n_images = None, 0
+        for headers, content in _iter_multipart(chunks, boundary):
+            part_type = headers.get('content-type', '').split(';')[0].strip()
+            if part_type == 'text/csv':
+                obs = pd.read_csv(io.BytesIO(content))
+            elif part_type == 'image/jpeg':
+                with _open_jpeg(content) as jpeg:
+                    image = np.asarray(jpeg)
+                row = obs.iloc[n_images] if obs is not None and n_images < len(obs) else None
+                n_images += 1
+                yield row, image
+        if n_images == 0 and obs is not None:
+            for _, row in obs.iterrows():
+                yield row
+    finally:
+        response.close()
+
+
+def _iter_multipart(chunks, boundary):
+    """
+    Iterate over the parts of a multipart body as its chunks arrive,
+    holding at most one part in memory. Line breaks may be CRLF or a
+    bare LF.
+
+    Parameters
+    ----------
+    chunks : iterable of bytes
+        The body, in chunks of any size.
+    boundary : str
+        The boundary between parts, from the content-type header.
+
+    Yields
+    ------
+    tuple of (dict, bytes)
+        The headers of each part (with lower-case names) and its
+        content.
+
+    Raises
+    ------
+    ValueError
+        If the body ends before the closing boundary.
+
+    Examples
+    --------
+    >>> body = b'--xyz\\r\\nContent-Type: text/csv\\r\\n\\r\\na,b\\r\\n1,2\\r\\n--xyz\\r\\nContent-Type: image/jpeg\\r\\n\\r\\n\\xff\\xd8\\r\\n--xyz--\\r\\n'
+    >>> chunks = [body[i:i+5] for i in range(0, len(body), 5)]
+    >>> [(headers['content-type'], content) for headers, content in _iter_multipart(chunks, 'xyz')]
+    [('text/csv', b'a,b\\r\\n1,2'), ('image/jpeg', b'\\xff\\xd8')]
+
+    >>> list(_iter_multipart([body[:40]], 'xyz'))
+    Traceback (most recent call last):
+    ...
+    ValueError: The multipart body ended unexpectedly
+
+    >>> [content for _, content in _iter_multipart([body.replace(b'\\r\\n', b'\\n')], 'xyz')]
+    [b'a,b\\n1,2', b'\\xff\\xd8']
+    """
+    delimiter = b'\n--' + boundary.encode()
+    # The first delimiter is not preceded by a line break
+    buffer = bytearray(b'\n')
+    chunks = iter(chunks)
+
+    def read_more():
+        chunk = next(chunks, None)
+        if chunk is None:
+            raise ValueError("The multipart body ended unexpectedly")
+        buffer.extend(chunk)
+
+    def find(search, longest):
+        start = 0
+        match = search(buffer, 0)
+        while match is None:
+            # Only the end of the buffer can hold part of a match
+            start = max(0, len(buffer) - longest + 1)
+            read_more()
+            match = search(buffer, start)
+        return match
+
+    def find_headers_end(buffer, start):
+        match = _HEADERS_END.search(buffer, start)
+        return (match.start(), match.end()) if match else None
+
+    def find_delimiter(buffer, start):
+        return _find_delimiter(buffer, delimiter, start)
+
+    longest = len(delimiter) + 1
+    # Skip the preamble
+    del buffer[:find(find_delimiter, longest)[1]]
+    while True:
+        while len(buffer) < 2:
+            read_more()
+        if buffer[:2] == b'--':
+            return
+        # Headers, between the line break after the delimiter and an empty line
+        end, after = find(find_headers_end, 4)
+        headers = _parse_part_headers(buffer[:end])
+        del buffer[:after]
+        end, after = find(find_delimiter, longest)
+        content = bytes(buffer[:end])
+        del buffer[:after]
+        yield headers, content
+
               
-def _parse_multipart_response(content, content_type):
+def _parse_multipart_response(content, content_type, n_jobs=-1):
     """
     Parse a multipart HTTP response containing CSV data and images.
     
     The CSV data is parsed into a pandas.DataFrame, and JPEG images
-    are converted to numpy arrays.
+    are decoded into a single array. The parts are located directly
+    in the bytes of the response, and sliced without copies. Line
+    breaks may be CRLF or a bare LF.
     
     Parameters
     ----------
-    content : str
+    content : bytes
         Raw content of the multipart response.
     content_type : str
         Content-Type header value, which must include a boundary parameter.
+    n_jobs : int, optional
+        Number of threads used to decode the images; -1 (default)
+        uses one per CPU.
     
     Returns
     -------
@@ -924,7 +1453,8 @@ def _parse_multipart_response(content, content_type):
         A tuple of (pandas.DataFrame or None, list of numpy.ndarray).
         The DataFrame contains the observational data (or None if no CSV was
         present). The list contains images as numpy arrays (empty list if no
-        images were present).
+        images were present), which are views of a single array of
+        dimensions (n_images, height, width, 3).
     
     Raises
     ------
@@ -933,63 +1463,148 @@ def _parse_multipart_response(content, content_type):
     
     Examples
     --------
-    # TODO: add some fixed content to the doctest environment and test this
-    # >>> content_type = 'multipart/mixed; boundary=boundary123'
-    # >>> data, images = _parse_multipart_response(content, content_type)
-    # >>> type(data)
-    # <class 'pandas.core.frame.DataFrame'>
-    # >>> len(images)
-    # 2
+    >>> content = (b'--xyz\\r\\nContent-Type: text/csv\\r\\n\\r\\na,b\\r\\n1,2\\r\\n3,4\\r\\n'
+    ...            b'--xyz\\r\\nContent-Type: application/json\\r\\n\\r\\n{}\\r\\n--xyz--\\r\\n')
+    >>> data, images = _parse_multipart_response(content, 'multipart/mixed; boundary=xyz')
+    >>> data
+       a  b
+    0  1  2
+    1  3  4
+    >>> images
+    []
+    >>> _parse_multipart_response(content.replace(b'\\r\\n', b'\\n'), 'multipart/mixed; boundary=xyz')[0].shape
+    (2, 2)
+
+    >>> _parse_multipart_response(content, 'multipart/mixed')
+    Traceback (most recent call last):
+    ...
+    ValueError: No boundary found in content-type header
 
     """
     # Extract boundary from content-type header
     boundary = None
     if 'boundary=' in content_type:
-        boundary = content_type.split('boundary=')[1].strip()
+        boundary = content_type.split('boundary=')[1].strip().strip('"')
     
     if not boundary:
         raise ValueError("No boundary found in content-type header")
-    
-    # Parse the multipart message
-    # Add headers to make it a proper email message for parsing
-    message_text = f"Content-Type: {content_type}\r\n\r\n{content}"
-    msg = message_from_string(message_text)
-    
+
+    # Find the parts, which start after a delimiter line and end at
+    # the line break before the next one
+    view = memoryview(content)
+    delimiter = b'--' + boundary.encode()
     csv_data = None
-    images = []
-    
-    # Process each part
-    for part in msg.walk():
-        content_type = part.get_content_type()
-        content_disposition = part.get('Content-Disposition', '')
-        
-        if content_type == 'text/csv':
-            # Extract CSV data
-            csv_content = part.get_payload()
-            csv_data = pd.read_csv(io.StringIO(csv_content))
-            
-        elif content_type == 'image/jpeg':
-            # Extract image data
-            img_content = part.get_payload()
-            
-            # Check if content is base64 encoded
-            transfer_encoding = part.get('Content-Transfer-Encoding', '')
-            if transfer_encoding == 'base64':
-                img_content = base64.b64decode(img_content)
-            elif isinstance(img_content, str):
-                # If it's a string, it might be base64 encoded
-                try:
-                    img_content = base64.b64decode(img_content)
-                except:
-                    # If base64 decode fails, treat as raw bytes
-                    img_content = img_content.encode()
-            
-            # Load image using PIL
-            img = Image.open(io.BytesIO(img_content))
-            images.append(np.array(img))
-    
+    jpegs = []
+    start = content.find(delimiter)
+    while start >= 0 and content[start + len(delimiter):start + len(delimiter) + 2] != b'--':
+        start += len(delimiter)
+        headers_end = _HEADERS_END.search(content, start)
+        end = _find_delimiter(content, b'\n' + delimiter, headers_end.end()) if headers_end else None
+        if end is None:
+            raise ValueError("The multipart body ended unexpectedly")
+        headers = _parse_part_headers(view[start:headers_end.start()])
+        part = view[headers_end.end():end[0]]
+        part_type = headers.get('content-type', '').split(';')[0].strip()
+        if part_type == 'text/csv':
+            csv_data = pd.read_csv(io.BytesIO(part))
+        elif part_type == 'image/jpeg':
+            jpegs.append(part)
+        start = end[1] - len(delimiter)
+
+    images = list(_decode_jpegs(jpegs, n_jobs)) if jpegs else []
     return csv_data, images
 
+
+# The empty line ending the headers of a part
+_HEADERS_END = re.compile(b'\r?\n\r?\n')
+
+
+def _find_delimiter(content, delimiter, start=0):
+    """Return the start and end of the first occurrence of `delimiter`
+    (a LF, '--' and the boundary) in `content` after `start`, including
+    the CR before it if there is one, or None if there is none.
+    bytes.find is used rather than a pattern matching both line breaks,
+    which is much slower on the large parts holding images.
+
+    Examples
+    --------
+    >>> _find_delimiter(b'a\\r\\n--xyz--', b'\\n--xyz')
+    (1, 8)
+    >>> _find_delimiter(b'a\\n--xyz--', b'\\n--xyz')
+    (1, 7)
+    >>> _find_delimiter(b'a\\n--xyz--', b'\\n--xyz', 2) is None
+    True
+    """
+    end = content.find(delimiter, start)
+    if end < 0:
+        return None
+    begin = end - 1 if end > start and content[end - 1:end] == b'\r' else end
+    return begin, end + len(delimiter)
+
+
+def _parse_part_headers(raw):
+    """
+    Parse the headers of a part of a multipart body.
+
+    Parameters
+    ----------
+    raw : bytes-like
+        The header lines, separated by (and possibly starting with) CRLF
+        or LF line breaks.
+
+    Returns
+    -------
+    dict
+        The headers, with lower-case names.
+
+    Examples
+    --------
+    >>> _parse_part_headers(b'\\r\\nContent-Type: image/jpeg\\r\\nContent-Transfer-Encoding: base64')
+    {'content-type': 'image/jpeg', 'content-transfer-encoding': 'base64'}
+    """
+    headers = {}
+    # Split the bytes, as str.splitlines also breaks at other characters
+    for line in bytes(raw).splitlines():
+        name, _, value = line.decode('latin-1').partition(':')
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _open_jpeg(content):
+    """Open a JPEG image given as raw bytes, or encoded in base64 (as
+    sent by the API), with PIL."""
+    # Base64-encoded data cannot start with the JPEG marker
+    if bytes(content[:2]) != b'\xff\xd8':
+        content = binascii.a2b_base64(content)
+    return Image.open(io.BytesIO(content))
+
+
+def _decode_jpegs(jpegs, n_jobs=-1):
+    """Decode the given JPEG images (see _open_jpeg) into a new array
+    using `n_jobs` threads; PIL releases the GIL while decoding, so the
+    images are decoded in parallel. The images are assumed to have the
+    same size and mode as the first one."""
+    with _open_jpeg(jpegs[0]) as first:
+        first = np.asarray(first)
+    out = np.empty((len(jpegs),) + first.shape, dtype=first.dtype)
+    out[0] = first
+    n_jobs = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+
+    def decode(i):
+        with _open_jpeg(jpegs[i]) as image:
+            out[i] = image
+
+    if n_jobs == 1 or len(jpegs) <= 2:
+        for i in range(1, len(jpegs)):
+            decode(i)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # Consume the results to propagate any exception
+            list(executor.map(decode, range(1, len(jpegs))))
+    return out
+
+
 class _Spinner():
     """
     Simple console spinner animation.
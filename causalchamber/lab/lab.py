@@ -42,7 +42,7 @@ from PIL import Image
 # Imports from this package
 from causalchamber.lab.utils import download_and_extract
 from causalchamber.lab.chamber import Batch
-from causalchamber.lab.api import API
+from causalchamber.lab.api import API, AsyncAPI
 from causalchamber.lab.exceptions import LabError, UserError
 
 class Lab():
@@ -137,6 +137,11 @@ class Lab():
 
         """
         response = self._API.make_request('GET', f'queues/{chamber_id}')
+        return self._process_queue(response, chamber_id, verbose, print_max)
+
+    def _process_queue(self, response, chamber_id, verbose, print_max):
+        """Sort and optionally print the queue returned by the API (see
+        Lab.get_queue)."""
         experiments = response.json()['experiments']
         # Sort by queue position
         sorted_by_position = sorted(experiments, key=lambda x: x['position'])
@@ -204,6 +209,11 @@ class Lab():
         """
         # Call API
         response = self._API.make_request('GET', 'experiments')
+        return self._process_experiments(response, verbose, print_max)
+
+    def _process_experiments(self, response, verbose, print_max):
+        """Sort and optionally print the experiments returned by the API
+        (see Lab.get_experiments)."""
         experiments = response.json()['experiments']
         # Sort by submission time
         newest_first = sorted(experiments, key=lambda x: x['submitted_on'], reverse=True)
@@ -231,6 +241,11 @@ class Lab():
         
         """
         response = self._API.make_request('GET', 'chambers')
+        return self._process_chambers(response, verbose)
+
+    def _process_chambers(self, response, verbose):
+        """Optionally print the chambers returned by the API (see
+        Lab.get_available_chambers)."""
         chambers = response.json()['chambers']
         # Optionally, print list of chambers
         if verbose:
@@ -278,7 +293,7 @@ class Lab():
         response = self._API.make_request('POST', f'experiments/{experiment_id}/cancel')
         return response.json()
 
-    def download_data(self, experiment_id, root, verbose=True):
+    def download_data(self, experiment_id, root, verbose=True, n_connections=1):
         """
         Download data from a completed experiment.
         
@@ -291,6 +306,9 @@ class Lab():
         verbose : bool, optional
             If True, traces are printed and a download progress bar is
             shown. If False no outputs are produced. Defauls to True.
+        n_connections : int, optional
+            Number of parallel connections used to download the data
+            (see `ExperimentDataset`). Defaults to 1.
         
         Returns
         -------
@@ -304,6 +322,11 @@ class Lab():
 
         """
         experiment = self.get_experiment(experiment_id)
+        return self._download_data(experiment, experiment_id, root, verbose, n_connections)
+
+    def _download_data(self, experiment, experiment_id, root, verbose, n_connections):
+        """Download the data of the given experiment, as returned by
+        Lab.get_experiment (see Lab.download_data)."""
         current_status = experiment['status']
         # TODO: add a new branch for status CANCELED / FAILED / STOPPING
         # TODO: current branch should work for QUEUED and SUBMITTING
@@ -317,8 +340,122 @@ class Lab():
                                         download_url = experiment['download_url'],
                                         checksum = experiment['checksum'],
                                         root = root,
-                                        verbose=verbose)
+                                        verbose=verbose,
+                                        n_connections=n_connections)
             return dataset
+
+
+class AsyncLab(Lab):
+    """
+    asyncio version of lab.Lab, to interact with the Remote Lab from
+    an event loop.
+
+    Create an instance with `await AsyncLab.connect(...)`. The methods
+    get_queue, get_experiment, get_experiments,
+    get_available_chambers, cancel_experiment and download_data are
+    coroutines with the same parameters, results and exceptions as
+    for lab.Lab. new_experiment returns a lab.AsyncProtocol, whose
+    submit method is also a coroutine.
+
+    Examples
+    --------
+    ```
+    lab = await AsyncLab.connect('credentials.ini', verbose=False)
+    experiments = await asyncio.gather(
+        *(lab.get_experiment(experiment_id) for experiment_id in experiment_ids)
+    )
+    ```
+    """
+
+    def __init__(self, *args, **kwargs):
+        raise TypeError("Use 'await AsyncLab.connect(...)' to create an AsyncLab.")
+
+    @classmethod
+    async def connect(cls, credentials_file=None, endpoint="https://api.causalchamber.ai/v0", verbose=True, credentials=None, api=None):
+        """Initialize the Lab interface, returning a lab.AsyncLab
+        instance.
+
+        The parameters are the same as for lab.Lab, plus:
+
+        Parameters
+        ----------
+        api : lab.api.AsyncAPI or None, optional
+            A client through which to make the requests, e.g., to
+            share it with lab.AsyncChamber instances. If None
+            (default), a new client is created with the given
+            credentials and endpoint, and closed by AsyncLab.close.
+
+        Returns
+        -------
+        lab.AsyncLab
+
+        Raises
+        ------
+        See lab.Lab.
+
+        """
+        lab = cls.__new__(cls)
+        lab._owns_api = api is None
+        if api is None:
+            api = AsyncAPI(credentials_file=credentials_file,
+                           endpoint=endpoint,
+                           credentials=credentials)
+        lab._API = api
+
+        # Get available chambers & experiments
+        print("\n\nChambers") if verbose else None
+        _ = await lab.get_available_chambers(verbose=verbose)
+        print("\n\nExperiments") if verbose else None
+        _ = await lab.get_experiments(verbose=verbose, print_max=10)
+        return lab
+
+    async def get_queue(self, chamber_id, verbose=True, print_max=10):
+        """See lab.Lab.get_queue."""
+        response = await self._API.make_request('GET', f'queues/{chamber_id}')
+        return self._process_queue(response, chamber_id, verbose, print_max)
+
+    async def get_experiment(self, experiment_id):
+        """See lab.Lab.get_experiment."""
+        response = await self._API.make_request('GET', f'experiments/{experiment_id}')
+        return response.json()
+
+    async def get_experiments(self, verbose=True, print_max=10):
+        """See lab.Lab.get_experiments."""
+        response = await self._API.make_request('GET', 'experiments')
+        return self._process_experiments(response, verbose, print_max)
+
+    async def get_available_chambers(self, verbose=True):
+        """See lab.Lab.get_available_chambers."""
+        response = await self._API.make_request('GET', 'chambers')
+        return self._process_chambers(response, verbose)
+
+    def new_experiment(self, chamber_id, config):
+        """See lab.Lab.new_experiment; returns a lab.AsyncProtocol."""
+        return AsyncProtocol(chamber_id, config, self._API)
+
+    async def cancel_experiment(self, experiment_id):
+        """See lab.Lab.cancel_experiment."""
+        response = await self._API.make_request('POST', f'experiments/{experiment_id}/cancel')
+        return response.json()
+
+    async def download_data(self, experiment_id, root, verbose=True, n_connections=1):
+        """See lab.Lab.download_data. The download runs in the thread
+        pool of the client."""
+        experiment = await self.get_experiment(experiment_id)
+        return await self._API.call(self._download_data, experiment, experiment_id, root, verbose, n_connections)
+
+    def close(self):
+        """Close the client of this lab (see lab.api.AsyncAPI.close),
+        unless it was given when connecting."""
+        if self._owns_api:
+            self._API.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
         
 class Protocol(Batch):
     """
@@ -412,6 +549,12 @@ class Protocol(Batch):
 
         """
         # POST /experiments
+        response = self._API.make_request('POST', 'experiments', self._body(tag))
+        # Return the experiment id
+        return response.json()['experiment_id']
+
+    def _body(self, tag):
+        """Build the body of the request submitting this protocol."""
         body = {'chamber_id': self._chamber_id,
                 'chamber_config': self._config,
                 'instructions': self._instructions}
@@ -419,8 +562,18 @@ class Protocol(Batch):
             raise TypeError(f"tag must be str, not {type(tag).__name__}")
         elif tag is not None:
             body['tag'] = tag
-        response = self._API.make_request('POST', 'experiments', body)
-        # Return the experiment id
+        return body
+
+
+class AsyncProtocol(Protocol):
+    """
+    Experiment protocol returned by lab.AsyncLab.new_experiment, whose
+    submit method is a coroutine (see lab.Protocol).
+    """
+
+    async def submit(self, tag=None):
+        """See lab.Protocol.submit."""
+        response = await self._API.make_request('POST', 'experiments', self._body(tag))
         return response.json()['experiment_id']
 
 
@@ -430,7 +583,7 @@ class ExperimentDataset():
     Container for experimental data downloaded from the Lab.    
     """
 
-    def __init__(self, experiment_id, download_url, checksum, root, verbose=True):
+    def __init__(self, experiment_id, download_url, checksum, root, verbose=True, n_connections=1):
         """
         Downloads the given experiment_id from the provided
         download_url into the directory specified in root. Verifies
@@ -451,6 +604,10 @@ class ExperimentDataset():
         verbose : bool, optional
             If True, a download progress bar is shown. If False no
             outputs are produced. Defauls to True.
+        n_connections : int, optional
+            If larger than 1, the data is downloaded in n_connections
+            parts in parallel. Interrupted downloads are resumed
+            either way. Defaults to 1.
         
         Raises
         ------
@@ -468,7 +625,8 @@ class ExperimentDataset():
                              root=self._root,
                              checksum=self._checksum,
                              algorithm='sha256',
-                             verbose=verbose)
+                             verbose=verbose,
+                             n_connections=n_connections)
         # Load the YAML metadata
         path_to_metadata = pathlib.Path(self._root, experiment_id, 'metadata.yaml')
         with open(path_to_metadata, 'r') as f:
@@ -0,0 +1,219 @@
+# MIT License
+
+# Copyright (c) 2025 Causal Chamber GmbH
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Authors:
+#   - Juan L. Gamella [juan@causalchamber.ai]
+
+"""A local stand-in for the Remote Lab API, used by the unit tests of
+causalchamber.lab."""
+
+import base64
+import http.server
+import io
+import json
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+BOUNDARY = "stand-in-boundary"
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Answers the requests of the lab clients, and records the
+    connection each request arrived on.
+
+    Real-time sessions keep the value of each variable set through a
+    SET instruction, and answer MSR instructions with a multipart
+    body containing the measurements (one column per variable, plus a
+    column `n` counting the measurements of the session) and, if
+    server.images is True, one JPEG image per measurement (encoded in
+    base64 unless server.base64_images is False). Each
+    request to a session takes server.instruction_time seconds and,
+    if server.barrier or server.gate (a threading.Event) are set, waits
+    for them before being executed.
+
+    Paths ending in /status/<code> answer with that status code, and
+    in /slow after server.delay seconds; any other path answers with a
+    JSON body echoing the request.
+
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, delayed
+    # ACKs stall every response on a kept-alive connection
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._answer()
+
+    def do_POST(self):
+        self._answer()
+
+    def _answer(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length)) if length else None
+        with self.server.lock:
+            self.server.connections.add(self.client_address)
+            self.server.received.append((self.command, self.path, body))
+        user, password = self.server.credentials
+        token = base64.b64encode(f"{user}:{password}".encode()).decode()
+        path = self.path.strip("/").split("/")[1:]  # without the API version
+        code, content_type, content = 200, "application/json", None
+        if self.headers.get("Authorization") != f"Basic {token}":
+            code = 401
+        elif path[:1] == ["status"]:
+            code = int(path[1])
+        elif path == ["slow"]:
+            time.sleep(self.server.delay)
+        elif self.command == "POST" and path == ["sessions"]:
+            content = self.server.start_session(body)
+        elif (
+            self.command == "POST"
+            and path[::2] == ["sessions", "instructions"]
+            and path[1] not in self.server.sessions
+        ):
+            code, content = 400, {"message": f"Session '{path[1]}' does not exist"}
+        elif self.command == "POST" and path[::2] == ["sessions", "instructions"]:
+            time.sleep(self.server.instruction_time)
+            try:
+                if self.server.barrier is not None:
+                    self.server.barrier.wait()
+                if self.server.gate is not None:
+                    self.server.gate.wait()
+                content_type, content = self.server.execute(
+                    path[1], body["instructions"]
+                )
+            except threading.BrokenBarrierError:
+                code, content = 500, {"message": "The requests were not concurrent"}
+        elif self.command == "GET" and path[0] in ["chambers", "experiments", "queues"]:
+            content = {path[0]: []} if len(path) == 1 else {"experiments": []}
+            if path[0] == "experiments" and len(path) == 2:
+                content = {"experiment_id": path[1], "status": "QUEUED"}
+        elif self.command == "POST" and path == ["experiments"]:
+            content = {"experiment_id": f"exp-{len(self.server.received)}"}
+        if content is None:
+            content = {"message": "stand-in", "body": body}
+        if content_type == "application/json":
+            content = json.dumps(content).encode()
+        try:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        except ConnectionError:
+            # The client gave up waiting (e.g., after a timeout)
+            self.close_connection = True
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    """The stand-in API server, listening on a local port."""
+
+    daemon_threads = True
+
+    def __init__(self, credentials=("user", "password"), images=False):
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+        self.credentials = credentials
+        self.images = images
+        self.base64_images = True
+        self.connections = set()
+        self.received = []
+        self.lock = threading.Lock()
+        self.delay = 0
+        self.instruction_time = 0
+        self.barrier = None
+        self.gate = None
+        self.sessions = {}
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v0"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def start_session(self, body):
+        with self.lock:
+            session_id = f"session-{len(self.sessions)}"
+            self.sessions[session_id] = {"n": 0}
+        return {
+            "session_id": session_id,
+            "chamber_model": "Stand-in Mk1",
+            "config_version": "1.0",
+            "documentation": "https://docs.causalchamber.ai",
+            "codebase_version": "stand-in",
+        }
+
+    def execute(self, session_id, instructions):
+        """Execute the instructions of a real-time session, returning
+        the content type and body of the response."""
+        state, rows = self.sessions[session_id], []
+        for instruction in instructions:
+            kind, *args = instruction.split(",")
+            if kind == "SET":
+                state[args[0]] = float(args[1])
+            elif kind == "MSR":
+                for _ in range(int(args[0])):
+                    state["n"] += 1
+                    rows.append(dict(state))
+        if not rows:
+            return "text/plain", b""
+        images = [image(row["n"]) for row in rows] if self.images else []
+        return multipart(rows, images, base64_images=self.base64_images)
+
+
+def image(n, size=16):
+    """A JPEG image of the given size, with all pixels set to n % 256."""
+    buffer = io.BytesIO()
+    array = np.full((size, size, 3), n % 256, dtype=np.uint8)
+    Image.fromarray(array).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def multipart(rows, images, boundary=BOUNDARY, base64_images=True):
+    """Build the multipart response to a measurement, with the rows as a
+    CSV part and one part per JPEG image, base64-encoded (as sent by
+    the API) or raw. Returns the content type and the body."""
+    columns = list(rows[0])
+    csv = ",".join(columns) + "\r\n"
+    csv += "".join(",".join(str(row[c]) for c in columns) + "\r\n" for row in rows)
+    parts = [b"Content-Type: text/csv\r\n\r\n" + csv.encode()]
+    for i, jpeg in enumerate(images):
+        headers = (
+            "Content-Type: image/jpeg\r\n"
+            f'Content-Disposition: attachment; filename="image_{i + 1}.jpeg"\r\n'
+        )
+        if base64_images:
+            headers += "Content-Transfer-Encoding: base64\r\n"
+            jpeg = base64.b64encode(jpeg)
+        parts.append(headers.encode() + b"\r\n" + jpeg)
+    delimiter = f"--{boundary}\r\n".encode()
+    body = b"".join(delimiter + part + b"\r\n" for part in parts)
+    body += f"--{boundary}--\r\n".encode()
+    return f"multipart/mixed; boundary={boundary}", body
@@ -0,0 +1,76 @@
+# MIT License
+
+# Copyright (c) 2025 Causal Chamber GmbH
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Authors:
+#   - Juan L. Gamella [juan@causalchamber.ai]
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from causalchamber.lab.api import API
+from causalchamber.lab.exceptions import LabError, UserError
+from causalchamber.lab.test.stand_in import StandInServer
+
+
+class APITests(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        self.endpoint = self.server.endpoint
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_connection_reuse(self):
+        with API(credentials=("user", "password"), endpoint=self.endpoint) as api:
+            for i in range(20):
+                response = api.make_request("POST", "echo", {"i": i})
+                self.assertEqual(response.json()["body"], {"i": i})
+        self.assertEqual(len(self.server.received), 20)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_concurrent_requests(self):
+        api = API(credentials=("user", "password"), endpoint=self.endpoint, pool_size=4)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: api.make_request("GET", "health"), range(40)))
+        self.assertEqual(len(self.server.received), 40)
+        self.assertLessEqual(len(self.server.connections), 4)
+        api.close()
+
+    def test_errors(self):
+        api = API(credentials=("user", "wrong"), endpoint=self.endpoint)
+        with self.assertRaises(UserError) as context:
+            api.make_request("GET", "health")
+        self.assertEqual(context.exception.code, 401)
+        api = API(credentials=("user", "password"), endpoint=self.endpoint)
+        with self.assertRaises(LabError) as context:
+            api.make_request("GET", "/status/503")
+        self.assertEqual(context.exception.code, 503)
+        # The connection is still reused after an error
+        api.make_request("GET", "health")
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_timeout(self):
+        self.server.delay = 0.5
+        api = API(credentials=("user", "password"), endpoint=self.endpoint, timeout=0.1)
+        with self.assertRaises(LabError) as context:
+            api.make_request("GET", "/slow")
+        self.assertEqual(context.exception.code, 1)
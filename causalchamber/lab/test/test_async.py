@@ -0,0 +1,214 @@
+# MIT License
+
+# Copyright (c) 2025 Causal Chamber GmbH
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Authors:
+#   - Juan L. Gamella [juan@causalchamber.ai]
+
+import asyncio
+import threading
+import unittest
+import unittest.mock
+
+import pandas as pd
+
+import causalchamber.lab.chamber as chamber_module
+from causalchamber.lab import AsyncChamber, AsyncLab
+from causalchamber.lab.api import API, AsyncAPI
+from causalchamber.lab.exceptions import UserError
+from causalchamber.lab.test.stand_in import StandInServer
+
+
+class AsyncTests(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(images=True)
+        self.endpoint = self.server.endpoint
+
+    def tearDown(self):
+        self.server.stop()
+
+    def _api(self, **kwargs):
+        return AsyncAPI(
+            credentials=("user", "password"), endpoint=self.endpoint, **kwargs
+        )
+
+    def test_chambers(self):
+        async def main():
+            async with self._api() as api:
+                chambers = await asyncio.gather(
+                    *(
+                        AsyncChamber.connect(f"ch-{i}", "standard", api=api, verbose=0)
+                        for i in range(3)
+                    )
+                )
+                results = await asyncio.gather(
+                    *(chamber.set("red", i) for i, chamber in enumerate(chambers))
+                )
+                self.assertEqual(results, [None] * 3)
+                measurements = await asyncio.gather(
+                    *(chamber.measure(i + 1) for i, chamber in enumerate(chambers))
+                )
+                batch = chambers[0].new_batch()
+                batch.set("red", 7)
+                batch.measure(2)
+                from_batch = await batch.submit()
+                streamed = [obs async for obs in chambers[1].measure(2, stream=True)]
+                return chambers, measurements, from_batch, streamed
+
+        chambers, measurements, from_batch, streamed = asyncio.run(main())
+        self.assertEqual([row["n"] for row, _ in streamed], [3, 4])
+        self.assertEqual(len({chamber.session_id for chamber in chambers}), 3)
+        for i, (obs, images) in enumerate(measurements):
+            self.assertIsInstance(obs, pd.DataFrame)
+            self.assertEqual(list(obs["red"]), [i] * (i + 1))
+            self.assertEqual(list(obs["n"]), list(range(1, i + 2)))
+            self.assertEqual(len(images), i + 1)
+        obs, images = from_batch
+        self.assertEqual(list(obs["red"]), [7, 7])
+        self.assertEqual(list(obs["n"]), [2, 3])
+        self.assertEqual(images[0].shape, (16, 16, 3))
+        # The chambers share the connections of the client
+        self.assertLessEqual(len(self.server.connections), 3)
+
+    def test_concurrency(self):
+        async def main():
+            async with self._api() as api:
+                chambers = await asyncio.gather(
+                    *(
+                        AsyncChamber.connect(f"ch-{i}", "standard", api=api, verbose=0)
+                        for i in range(5)
+                    )
+                )
+                # The server only answers once all five requests are in
+                # flight; sequential requests would break the barrier
+                self.server.barrier = threading.Barrier(5, timeout=10)
+                return await asyncio.gather(
+                    *(chamber.measure(1) for chamber in chambers)
+                )
+
+        results = asyncio.run(main())
+        self.assertEqual([list(obs["n"]) for obs, _ in results], [[1]] * 5)
+        self.assertFalse(self.server.barrier.broken)
+
+    def test_cancel_stream(self):
+        started, release = threading.Event(), threading.Event()
+        stream_observations = chamber_module._stream_observations
+
+        def held_stream(response):
+            # Hold the iterator after the first observation
+            observations = stream_observations(response)
+            try:
+                yield next(observations)
+                started.set()
+                release.wait()
+                yield from observations
+            finally:
+                observations.close()
+
+        async def main():
+            async with self._api() as api:
+                chamber = await AsyncChamber.connect(
+                    "ch-0", "standard", api=api, verbose=0
+                )
+                received = []
+
+                async def consume():
+                    async for observation in chamber.measure(3, stream=True):
+                        received.append(observation)
+
+                task = asyncio.ensure_future(consume())
+                loop = asyncio.get_running_loop()
+                try:
+                    self.assertTrue(await loop.run_in_executor(None, started.wait, 10))
+                    # Cancel while the next observation is read in the pool,
+                    # which must finish before the iterator is closed
+                    task.cancel()
+                    done, _ = await asyncio.wait([task], timeout=0.1)
+                    self.assertEqual(done, set())
+                finally:
+                    release.set()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                obs, _ = await chamber.measure(1)
+                return received, obs
+
+        with unittest.mock.patch.object(
+            chamber_module, "_stream_observations", held_stream
+        ):
+            received, obs = asyncio.run(main())
+        self.assertEqual([row["n"] for row, _ in received], [1])
+        self.assertEqual(list(obs["n"]), [4])
+
+    def test_shared_api(self):
+        async def main():
+            async with self._api() as api:
+                lab = await AsyncLab.connect(api=api, verbose=False)
+                chamber = await AsyncChamber.connect(
+                    "ch-0", "standard", api=api, verbose=0
+                )
+                # Closing the lab or chamber does not close a given client
+                lab.close()
+                chamber.close()
+                await lab.get_queue("ch-0", verbose=False)
+                # The pipeline uses the connections of the client
+                self.assertIsInstance(api.api, API)
+                batch = chamber.new_batch()
+                batch.measure(1)
+                with chamber.pipeline() as pipeline:
+                    future = pipeline.submit(batch)
+                obs, _ = await asyncio.wrap_future(future)
+                return obs
+
+        obs = asyncio.run(main())
+        self.assertEqual(list(obs["n"]), [1])
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_errors(self):
+        async def main():
+            api = AsyncAPI(credentials=("user", "wrong"), endpoint=self.endpoint)
+            await AsyncChamber.connect("ch-0", "standard", api=api, verbose=0)
+
+        with self.assertRaises(UserError) as context:
+            asyncio.run(main())
+        self.assertEqual(context.exception.code, 401)
+        with self.assertRaises(TypeError):
+            AsyncChamber("ch-0", "standard")
+
+    def test_lab(self):
+        async def main():
+            async with await AsyncLab.connect(
+                credentials=("user", "password"), endpoint=self.endpoint, verbose=False
+            ) as lab:
+                protocol = lab.new_experiment("ch-0", "standard")
+                protocol.set("red", 1)
+                protocol.measure(10)
+                experiment_id = await protocol.submit(tag="async")
+                experiment = await lab.get_experiment(experiment_id)
+                queue = await lab.get_queue("ch-0", verbose=False)
+                return experiment_id, experiment, queue
+
+        experiment_id, experiment, queue = asyncio.run(main())
+        self.assertEqual(experiment["experiment_id"], experiment_id)
+        self.assertEqual(queue, [])
+        method, _, body = self.server.received[2]
+        self.assertEqual(method, "POST")
+        self.assertEqual(body["instructions"], ["SET,red,1.0", "MSR,10,0"])
+        self.assertEqual(body["tag"], "async")
@@ -0,0 +1,250 @@
+# MIT License
+
+# Copyright (c) 2025 Causal Chamber GmbH
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Authors:
+#   - Juan L. Gamella [juan@causalchamber.ai]
+
+import io
+import threading
+import unittest
+from concurrent.futures import CancelledError
+
+import numpy as np
+from PIL import Image
+
+from causalchamber.lab import Chamber
+from causalchamber.lab.chamber import _iter_multipart, _parse_multipart_response
+from causalchamber.lab.exceptions import UserError
+from causalchamber.lab.test import stand_in
+from causalchamber.lab.test.stand_in import StandInServer
+
+
+class PipelineTests(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer()
+        self.chamber = Chamber(
+            "ch-0",
+            "standard",
+            credentials=("user", "password"),
+            endpoint=self.server.endpoint,
+            verbose=0,
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_order(self):
+        self.server.instruction_time = 0.01
+        delivered = []
+        batch = self.chamber.new_batch()
+        with self.chamber.pipeline(max_in_flight=3) as pipeline:
+            futures = []
+            for i in range(20):
+                batch.clear()
+                batch.set("red", i)
+                batch.measure(1)
+                futures.append(pipeline.submit(batch, callback=delivered.append))
+                # Backpressure: at most 3 batches are pending
+                self.assertLessEqual(sum(not f.done() for f in futures), 3)
+        self.assertEqual(delivered, futures)
+        for i, future in enumerate(futures):
+            obs = future.result()
+            self.assertEqual(list(obs["red"]), [i])
+            self.assertEqual(list(obs["n"]), [i + 1])
+        # The pipeline reuses the connection of the chamber
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_non_blocking(self):
+        # The server holds the batches until the gate is opened
+        self.server.gate = threading.Event()
+        batch = self.chamber.new_batch()
+        batch.measure(1)
+        submitted = []
+
+        def submit_third():
+            future = pipeline.submit(batch)
+            submitted.append((future, futures[0].done()))
+
+        with self.chamber.pipeline(max_in_flight=2) as pipeline:
+            try:
+                # Both calls return while their batches are still pending
+                futures = [pipeline.submit(batch), pipeline.submit(batch)]
+                self.assertFalse(any(future.done() for future in futures))
+                # The third batch waits for the first to complete
+                thread = threading.Thread(target=submit_third)
+                thread.start()
+            finally:
+                self.server.gate.set()
+            thread.join()
+        future, first_done = submitted[0]
+        self.assertTrue(first_done)
+        futures.append(future)
+        self.assertEqual([list(f.result()["n"]) for f in futures], [[1], [2], [3]])
+
+    def test_errors(self):
+        self.chamber._session_id = "nonexistent"
+        self.server.instruction_time = 0.1
+        batch = self.chamber.new_batch()
+        batch.measure(1)
+        pipeline = self.chamber.pipeline(max_in_flight=3)
+        futures = [pipeline.submit(batch) for _ in range(3)]
+        with self.assertRaises(UserError) as context:
+            futures[0].result()
+        self.assertEqual(context.exception.code, 400)
+        for future in futures[1:]:
+            with self.assertRaises(CancelledError):
+                future.result()
+        with self.assertRaises(UserError):
+            pipeline.submit(batch)
+        pipeline.close()
+        with self.assertRaises(RuntimeError):
+            pipeline.submit(batch)
+        self.assertEqual(len(self.server.received), 2)  # session + first batch
+
+    def test_cancel(self):
+        gate = threading.Event()
+        batch = self.chamber.new_batch()
+        batch.measure(1)
+        with self.chamber.pipeline(max_in_flight=3) as pipeline:
+            # Hold the pipeline's parser until the futures are queued
+            first = pipeline.submit(batch, callback=lambda _: gate.wait())
+            second, third = pipeline.submit(batch), pipeline.submit(batch)
+            second.cancel()
+            gate.set()
+        self.assertEqual(list(first.result()["n"]), [1])
+        self.assertTrue(second.cancelled())
+        self.assertEqual(list(third.result()["n"]), [2])
+
+    def test_parameters(self):
+        with self.assertRaises(TypeError):
+            self.chamber.pipeline(max_in_flight=1.5)
+        with self.assertRaises(ValueError):
+            self.chamber.pipeline(max_in_flight=0)
+
+
+class StreamTests(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer(images=True)
+        self.chamber = Chamber(
+            "ch-0",
+            "standard",
+            credentials=("user", "password"),
+            endpoint=self.server.endpoint,
+            verbose=0,
+        )
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_stream(self):
+        self.chamber.set("red", 3)
+        obs, images = self.chamber.measure(5)
+        streamed = list(self.chamber.measure(5, stream=True))
+        self.assertEqual(len(streamed), 5)
+        for i, (row, image) in enumerate(streamed):
+            self.assertEqual(row["red"], 3)
+            self.assertEqual(row["n"], obs["n"][i] + 5)
+            self.assertEqual(image.shape, images[i].shape)
+        # Chambers without images
+        self.server.images = False
+        streamed = list(self.chamber.msr(3, stream=True))
+        self.assertEqual([row["n"] for row in streamed], [11, 12, 13])
+
+    def test_early_exit(self):
+        for i, (row, image) in enumerate(self.chamber.measure(10, stream=True)):
+            if i == 2:
+                break
+        self.assertEqual(list(self.chamber.measure(1)[0]["n"]), [11])
+
+    def test_errors(self):
+        self.chamber._session_id = "nonexistent"
+        with self.assertRaises(UserError):
+            self.chamber.measure(1, stream=True)
+
+
+class ParserTests(unittest.TestCase):
+    def setUp(self):
+        self.rows = [{"red": i, "n": i + 1} for i in range(20)]
+        self.jpegs = [stand_in.image(i * 10, size=32) for i in range(20)]
+        self.expected = [np.array(Image.open(io.BytesIO(jpeg))) for jpeg in self.jpegs]
+
+    def test_parse(self):
+        for base64_images in [True, False]:
+            content_type, body = stand_in.multipart(
+                self.rows, self.jpegs, base64_images=base64_images
+            )
+            for n_jobs in [1, -1]:
+                obs, images = _parse_multipart_response(
+                    body, content_type, n_jobs=n_jobs
+                )
+                self.assertEqual(list(obs["n"]), list(range(1, 21)))
+                self.assertEqual(len(images), 20)
+                for image, expected in zip(images, self.expected):
+                    np.testing.assert_array_equal(image, expected)
+                # The images are views of a single array
+                self.assertTrue(all(image.base is images[0].base for image in images))
+
+    def test_no_images(self):
+        content_type, body = stand_in.multipart(self.rows, [])
+        obs, images = _parse_multipart_response(body, content_type)
+        self.assertEqual(list(obs["red"]), list(range(20)))
+        self.assertEqual(images, [])
+
+    def test_truncated(self):
+        content_type, body = stand_in.multipart(self.rows, self.jpegs)
+        with self.assertRaises(ValueError):
+            _parse_multipart_response(body[: len(body) // 2], content_type)
+
+    def test_bare_line_feeds(self):
+        # Base64-encoded images hold no line breaks of their own
+        content_type, body = stand_in.multipart(self.rows, self.jpegs)
+        body = body.replace(b"\r\n", b"\n")
+        obs, images = _parse_multipart_response(body, content_type)
+        self.assertEqual(list(obs["n"]), list(range(1, 21)))
+        self.assertEqual(len(images), 20)
+        for image, expected in zip(images, self.expected):
+            np.testing.assert_array_equal(image, expected)
+        chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+        parts = list(_iter_multipart(chunks, stand_in.BOUNDARY))
+        self.assertEqual(len(parts), 21)
+        self.assertEqual(parts[1][0]["content-transfer-encoding"], "base64")
+        self.assertTrue(parts[0][1].endswith(b"\n19,20\n"))
+        with self.assertRaises(ValueError):
+            _parse_multipart_response(body[: len(body) // 2], content_type)
+
+    def test_raw_images(self):
+        server = StandInServer(images=True)
+        server.base64_images = False
+        try:
+            chamber = Chamber(
+                "ch-0",
+                "standard",
+                credentials=("user", "password"),
+                endpoint=server.endpoint,
+                verbose=0,
+            )
+            obs, images = chamber.measure(3)
+            streamed = list(chamber.measure(3, stream=True))
+        finally:
+            server.stop()
+        self.assertEqual(len(images), 3)
+        self.assertEqual([row["n"] for row, _ in streamed], [4, 5, 6])
@@ -29,15 +29,36 @@ extract .zip files and check their MD5 checksums.
 """
 
 import numpy as np
+import os
+import threading
+import time
 import zipfile
 import requests
 from pathlib import Path
 import hashlib
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
 
 # --------------------------------------------------------------------
 # Functions to download, extract and verify datasets
 
+# Size (in bytes) of the blocks in which files are downloaded and hashed
+BLOCK_SIZE = 1024 * 1024
+
+# Timeout (in seconds) for connecting to / receiving data from the server
+TIMEOUT = 60
+
+# Number of times an interrupted download is resumed before giving
+# up, and delay (in seconds, growing linearly) between attempts
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0
+
+_RETRY_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.Timeout,
+)
+
 
 def download_and_extract(
     url,
@@ -45,8 +66,19 @@ def download_and_extract(
     checksum=None,
     algorithm='md5',
     verbose=True,
+    block_size=None,
+    n_connections=1,
+    members=None,
+    n_jobs=1,
 ):
     """
+    Download a .zip file, verify its checksum and extract (some of) its contents.
+
+    The checksum is computed while the file is downloaded, so
+    verifying it does not require reading the file again. Partially
+    downloaded files (e.g., after an interruption) are resumed
+    instead of downloaded again.
+
     Parameters
     ----------
     url : string
@@ -62,6 +94,20 @@ def download_and_extract(
     verbose : bool, optional
         If True, traces are printed and a download progress bar is shown. If False no
         outputs are produced. Defauls to True.
+    block_size : int or None, optional
+        Size (in bytes) of the blocks in which the file is downloaded,
+        written and hashed. If None (default), `BLOCK_SIZE` is used.
+    n_connections : int, optional
+        If larger than 1 and the server supports range requests, the
+        file is downloaded in n_connections parts in parallel. Defaults
+        to 1.
+    members : callable or None, optional
+        A function which takes the name of a file in the archive and
+        returns True if it should be extracted (see `extract`). If None
+        (default), all files are extracted.
+    n_jobs : int, optional
+        Number of threads used to extract the files; -1 means one per
+        CPU. Defaults to 1.
 
     Returns
     -------
@@ -69,50 +115,317 @@ def download_and_extract(
 
     """
     # Check input
-    if algorithm == 'md5':
-        hasher = _compute_md5
-    elif algorithm == 'sha256':
-        hasher = _compute_sha256
-    else:
+    if algorithm not in ['md5', 'sha256']:
         raise ValueError("algorithm must be 'md5' or 'sha256'")
-    
-    local_zipfile = "causal_chamber_" + hashlib.md5(url.encode()).hexdigest() + ".zip"
-    zip_path = Path(root, local_zipfile)
-    # Download
-    _download(url, zip_path, verbose=verbose)
-    # Verify    
+    block_size = BLOCK_SIZE if block_size is None else block_size
+
+    zip_path = download_path(url, root)
+    # Download, computing the checksum on the fly
+    computed = _download(
+        url,
+        zip_path,
+        verbose=verbose,
+        algorithm=algorithm,
+        block_size=block_size,
+        n_connections=n_connections,
+    )
+    # Verify
     if checksum is not None:
         print("  Verifying checksum...", end="") if verbose else None
-        computed = hasher(zip_path)
         if checksum != computed:
+            # Remove the file, so it is not resumed by the next attempt
+            os.remove(zip_path)
             raise Exception(
                 f'Checksum does not match!\n  expected: "{checksum}"\n  computed: "{computed}"'
             )
         else:
             print(" done.") if verbose else None
-    # Extract    
+    # Extract
+    extract(zip_path, root, members=members, n_jobs=n_jobs, verbose=verbose)
+
+
+def download_path(url, root):
+    """Return the path where download_and_extract stores the file
+    downloaded from url into root."""
+    local_zipfile = "causal_chamber_" + hashlib.md5(url.encode()).hexdigest() + ".zip"
+    return Path(root, local_zipfile)
+
+
+def extract(path, root, members=None, n_jobs=1, verbose=True):
+    """Extract (some of) the contents of the .zip file at path into root.
+
+    Only the central directory of the archive is read to select the
+    files; files which have already been extracted (i.e., exist with
+    the same size) are skipped.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        The path to the .zip file.
+    root : str or pathlib.Path
+        The directory where the contents are extracted.
+    members : callable or None, optional
+        A function which takes the name of a file in the archive and
+        returns True if it should be extracted. If None (default), all
+        files are extracted.
+    n_jobs : int, optional
+        Number of threads used to decompress the files in parallel; -1
+        means one per CPU. Defaults to 1.
+    verbose : bool, optional
+        If True (default), traces are printed.
+
+    Returns
+    -------
+    int
+        The number of files extracted, i.e., 0 if all of the selected
+        files had already been extracted.
+
+    """
     print(f'  Extracting zip-file contents to "{root}"...', end="") if verbose else None
-    with zipfile.ZipFile(zip_path, "r") as zip_ref:
-        zip_ref.extractall(root)
+    n_jobs = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+    with zipfile.ZipFile(path, "r") as zip_ref:
+        infos = [
+            info
+            for info in zip_ref.infolist()
+            if not info.is_dir()
+            and (members is None or members(info.filename))
+            and not _is_extracted(info, root)
+        ]
+        # Create the directories beforehand, as threads would race to do it
+        for directory in set(os.path.dirname(info.filename) for info in infos):
+            os.makedirs(Path(root, directory), exist_ok=True)
+        if n_jobs == 1 or len(infos) <= 1:
+            for info in infos:
+                zip_ref.extract(info, root)
+        else:
+            # Each thread reads the archive through its own file handle
+            local = threading.local()
+
+            def extract_member(info):
+                if not hasattr(local, "zip_ref"):
+                    local.zip_ref = zipfile.ZipFile(path, "r")
+                local.zip_ref.extract(info, root)
+                return local.zip_ref
+
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                handles = set(executor.map(extract_member, infos))
+            for handle in handles:
+                handle.close()
     print(" done.") if verbose else None
+    return len(infos)
+
 
+def _is_extracted(info, root):
+    target = Path(root, info.filename)
+    return os.path.isfile(target) and os.path.getsize(target) == info.file_size
 
-def _download(url, output_path, verbose):
-    """Function to actually download the file from the given URL into the given output_path."""
+
+def _download(
+    url,
+    output_path,
+    verbose,
+    algorithm=None,
+    block_size=None,
+    n_connections=1,
+    max_retries=MAX_RETRIES,
+):
+    """Function to actually download the file from the given URL into
+    the given output_path.
+
+    If output_path already contains part of the file (e.g., from an
+    interrupted download), only the remaining bytes are requested with
+    an HTTP Range request; interrupted transfers are also resumed (up
+    to max_retries times). If n_connections > 1 and the server supports
+    range requests, the file is instead split into n_connections parts
+    which are downloaded in parallel.
+
+    If an algorithm (e.g., 'md5') is given, returns the hex digest of
+    the downloaded file, computed while writing it to disk (or, for
+    parallel downloads, by reading it afterwards).
+
+    """
     print(f'Downloading dataset from "{url}" into "{output_path}"\n') if verbose else None
-    response = requests.get(url, stream=True)
-    total_size_in_bytes = int(response.headers.get("content-length", 0))
-    block_size = 1024  # 1 Kibibyte
-    if verbose:
-        progress_bar = tqdm(total=total_size_in_bytes, unit="iB", unit_scale=True)
-    with open(output_path, "wb") as file:
-        for data in response.iter_content(block_size):
-            progress_bar.update(len(data)) if verbose else None
-            file.write(data)
-    if verbose:
+    block_size = BLOCK_SIZE if block_size is None else block_size
+    # Parallel downloads (start from scratch; partial files are resumed
+    # by a single connection, as it is not known which parts are complete)
+    if n_connections > 1 and not os.path.isfile(output_path):
+        total_size = _ranged_size(url)
+        if total_size is not None and total_size >= n_connections:
+            _download_parallel(
+                url,
+                output_path,
+                total_size,
+                n_connections,
+                block_size,
+                verbose,
+                max_retries,
+            )
+            if algorithm is not None:
+                return _compute_checksum(output_path, algorithm, block_size)
+            return None
+    return _download_resumable(
+        url, output_path, algorithm, block_size, verbose, max_retries
+    )
+
+
+def _download_resumable(url, output_path, algorithm, block_size, verbose, max_retries):
+    hasher = None
+    written = os.path.getsize(output_path) if os.path.isfile(output_path) else 0
+    progress_bar = None
+    retries = 0
+    while True:
+        headers = {"Range": f"bytes={written}-"} if written > 0 else {}
+        try:
+            response = requests.get(url, stream=True, headers=headers, timeout=TIMEOUT)
+            if response.status_code == 416:
+                # Requested range starts at the end of the file, i.e., it was
+                # already complete; otherwise, start over
+                total = response.headers.get("content-range", "").split("/")[-1]
+                if total == str(written):
+                    if hasher is None and algorithm is not None:
+                        hasher = _hash_prefix(
+                            output_path, algorithm, written, block_size
+                        )
+                    break
+                written = 0
+                continue
+            response.raise_for_status()
+            if response.status_code != 206:
+                # The server sent the whole file
+                written, hasher = 0, None
+            if hasher is None and algorithm is not None:
+                hasher = _hash_prefix(output_path, algorithm, written, block_size)
+            total_size_in_bytes = written + int(
+                response.headers.get("content-length", 0)
+            )
+            if verbose:
+                if progress_bar is not None:
+                    progress_bar.close()
+                progress_bar = tqdm(
+                    total=total_size_in_bytes,
+                    initial=written,
+                    unit="iB",
+                    unit_scale=True,
+                )
+            with open(output_path, "r+b" if written > 0 else "wb") as file:
+                # Drop any bytes that were written but not accounted for
+                file.truncate(written)
+                file.seek(written)
+                for data in response.iter_content(block_size):
+                    file.write(data)
+                    hasher.update(data) if hasher is not None else None
+                    written += len(data)
+                    progress_bar.update(len(data)) if verbose else None
+            if (
+                response.headers.get("content-length") is not None
+                and written < total_size_in_bytes
+            ):
+                raise requests.exceptions.ChunkedEncodingError(
+                    "Connection closed before the download completed"
+                )
+            break
+        except _RETRY_EXCEPTIONS as e:
+            retries += 1
+            if retries > max_retries:
+                raise
+            print(f"\n  Download interrupted ({e}); resuming...") if verbose else None
+            time.sleep(RETRY_DELAY * retries)
+    if progress_bar is not None:
         progress_bar.close()
-        if total_size_in_bytes != 0 and progress_bar.n != total_size_in_bytes:
-            print("ERROR, something went wrong")
+    return None if hasher is None else hasher.hexdigest()
+
+
+def _download_parallel(
+    url, output_path, total_size, n_connections, block_size, verbose, max_retries
+):
+    """Download the file in n_connections parts (HTTP Range requests),
+    each written directly into its position of the output file."""
+    with open(output_path, "wb") as file:
+        file.truncate(total_size)
+    part_size = -(-total_size // n_connections)
+    parts = [
+        (start, min(start + part_size, total_size))
+        for start in range(0, total_size, part_size)
+    ]
+    progress_bar = (
+        tqdm(total=total_size, unit="iB", unit_scale=True) if verbose else None
+    )
+    lock = threading.Lock()
+
+    def fetch(part):
+        position, stop = part
+        retries = 0
+        with open(output_path, "r+b") as file:
+            while position < stop:
+                headers = {"Range": f"bytes={position}-{stop - 1}"}
+                try:
+                    response = requests.get(
+                        url, stream=True, headers=headers, timeout=TIMEOUT
+                    )
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise requests.exceptions.HTTPError(
+                            f"Range request failed: HTTP status code {response.status_code}"
+                        )
+                    file.seek(position)
+                    for data in response.iter_content(block_size):
+                        data = data[: stop - position]
+                        file.write(data)
+                        position += len(data)
+                        if verbose:
+                            with lock:
+                                progress_bar.update(len(data))
+                    if position < stop:
+                        raise requests.exceptions.ChunkedEncodingError(
+                            "Connection closed before the download completed"
+                        )
+                except _RETRY_EXCEPTIONS:
+                    retries += 1
+                    if retries > max_retries:
+                        raise
+                    time.sleep(RETRY_DELAY * retries)
+
+    try:
+        with ThreadPoolExecutor(max_workers=n_connections) as executor:
+            list(executor.map(fetch, parts))
+    except BaseException:
+        # An incomplete file cannot be resumed by parts later
+        os.remove(output_path)
+        raise
+    finally:
+        progress_bar.close() if verbose else None
+
+
+def _ranged_size(url):
+    """Return the size of the file at url if the server supports range
+    requests for it, and None otherwise."""
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=TIMEOUT)
+    except requests.exceptions.RequestException:
+        return None
+    size = response.headers.get("content-length")
+    if (
+        response.status_code != 200
+        or response.headers.get("accept-ranges") != "bytes"
+        or size is None
+    ):
+        return None
+    return int(size)
+
+
+def _hash_prefix(path, algorithm, length, block_size):
+    """Return a hasher updated with the first length bytes of the file at path."""
+    hasher = hashlib.new(algorithm)
+    if length == 0:
+        return hasher
+    with open(path, "rb") as f:
+        while length > 0:
+            block = f.read(min(block_size, length))
+            if not block:
+                break
+            hasher.update(block)
+            length -= len(block)
+    return hasher
 
 
 def _unzip(path, output_dir):
@@ -124,18 +437,22 @@ def _unzip(path, output_dir):
         zip_ref.extractall(output_dir)
 
 
-def _compute_md5(path):
+def _compute_md5(path, block_size=None):
     """Compute the MD5 checksum of a file at the given path."""
-    hasher = hashlib.md5()
-    with open(path, "rb") as f:
-        data = f.read()
-        hasher.update(data)
-    return hasher.hexdigest()
+    return _compute_checksum(path, "md5", block_size)
 
-def _compute_sha256(path):
+
+def _compute_sha256(path, block_size=None):
     """Compute the SHA-256 checksum of a file at the given path."""
-    hasher = hashlib.sha256()
+    return _compute_checksum(path, "sha256", block_size)
+
+
+def _compute_checksum(path, algorithm, block_size=None):
+    """Compute the checksum of a file at the given path, reading it in
+    blocks so memory use does not grow with the file size."""
+    block_size = BLOCK_SIZE if block_size is None else block_size
+    hasher = hashlib.new(algorithm)
     with open(path, "rb") as f:
-        data = f.read()
-        hasher.update(data)
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
     return hasher.hexdigest()
@@ -117,6 +117,8 @@ class DecoderSimple(Simulator):
         blue,
         pol_1,
         pol_2,
+        dtype=np.float32,
+        out=None,
     ):
         """Produces synthetic images given values for the light-source color
         (`red,green,blue`) and polarizer positions (`pol_1, pol_2`).
@@ -129,6 +131,15 @@ class DecoderSimple(Simulator):
         pol_1, pol_2 : array_like
             1D arrays representing the positions of the tunnel's polarizers in degrees, in
             the range [-180, 180].
+        dtype : numpy dtype, optional
+            The data type of the images. For floating types (default
+            is np.float32, the precision of the network), pixel values
+            are in [0,1]; for np.uint8, they are quantized to integers
+            in [0,255].
+        out : np.ndarray or None, optional
+            If given, the images are written into this array, which
+            must have the right dimensions (see below). Its dtype
+            takes precedence over `dtype`.
 
         Returns
         -------
@@ -159,7 +170,10 @@ class DecoderSimple(Simulator):
         outputs = np.minimum(outputs, 1)
         # Set color axis last (accounting for possible extra batch axis)
         axes = (0, 2, 3, 1) if outputs.ndim == 4 else (1, 2, 0)
-        return np.transpose(outputs, axes=axes)
+        outputs = np.transpose(outputs, axes=axes)
+        if np.issubdtype(dtype if out is None else out.dtype, np.integer):
+            outputs = np.rint(outputs * 255)
+        return self._write_outputs(outputs, dtype, out)
 
 
 def _download(url, output_path):
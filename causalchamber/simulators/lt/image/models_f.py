@@ -20,14 +20,185 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+import functools
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 from causalchamber.simulators import Simulator
+from causalchamber.simulators.main import get_columns
 import numpy as np
 
 # --------------------------------------------------------------
 # Simulators
 
 
-class ModelF1(Simulator):
+class _ModelF(Simulator):
+    """Base class for the Model F image simulators, which implements the
+    chunked and parallel generation of images.
+
+    Rendering runs on a pool of `n_jobs` threads writing into a shared
+    output array; numpy releases the GIL while rendering, so this
+    scales with the number of cores without copying the images
+    between processes.
+
+    """
+
+    n_jobs = 1
+
+    def iter_simulate(self, df, chunk_size=1024, dtype=None, n_jobs=None):
+        """Simulate the images for the inputs in the given DataFrame,
+        yielding them in blocks of (at most) chunk_size images.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            A pandas DataFrame containing the inputs in columns named
+            as in `self.inputs_names`, or any of the other inputs
+            accepted by `simulate_from_inputs`.
+        chunk_size : int, optional
+            The number of images in each block. Default is 1024.
+        dtype : numpy dtype or None, optional
+            The data type of the images (see `_simulate`). If None
+            (default), images are np.float64.
+        n_jobs : int or None, optional
+            The number of blocks rendered in parallel; -1 means using
+            all available cores. If None (default), the value given
+            when initializing the simulator is used.
+
+        Yields
+        ------
+        np.ndarray
+            Blocks of images with dimensions [chunk_size, image_size,
+            image_size, 3], in the order of the rows of df.
+
+        """
+        n_jobs = self._resolve_n_jobs(n_jobs)
+        inputs, n = self._get_inputs(df)
+        chunks = (_take(inputs, i, i + chunk_size) for i in range(0, n, chunk_size))
+        if n_jobs == 1:
+            for chunk in chunks:
+                yield self._simulate_chunk(chunk, dtype)
+            return
+        # Keep (at most) n_jobs blocks in flight, yielding them in order
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(executor.submit(self._simulate_chunk, chunk, dtype))
+                if len(pending) >= n_jobs:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def simulate_to_file(
+        self, df, path, chunk_size=1024, dtype=None, sharded=False, n_jobs=None
+    ):
+        """Simulate the images for the inputs in the given DataFrame and
+        write them to disk as .npy files, rendering chunk_size images
+        at a time.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            A pandas DataFrame containing the inputs in columns named
+            as in `self.inputs_names`, or any of the other inputs
+            accepted by `simulate_from_inputs`.
+        path : str or pathlib.Path
+            Path of the .npy file. If `sharded=True`, shards are
+            written next to it as `<stem>_<index>.npy`, e.g.,
+            `images_00000.npy`, `images_00001.npy`, etc.
+        chunk_size : int, optional
+            The number of images rendered at a time, or the number of
+            images per shard if `sharded=True`. Default is 1024.
+        dtype : numpy dtype or None, optional
+            The data type of the images (see `_simulate`). If None
+            (default), images are np.float64.
+        sharded : bool, optional
+            If False (default), all images are rendered directly into
+            a single memory-mapped .npy file. If True, each chunk is
+            written to its own file, while the next chunk is rendered.
+        n_jobs : int or None, optional
+            The number of chunks rendered in parallel; -1 means using
+            all available cores. If None (default), the value given
+            when initializing the simulator is used.
+
+        Returns
+        -------
+        pathlib.Path or list of pathlib.Path
+            The path to the .npy file, or the list of paths to the
+            shards if `sharded=True`.
+
+        Examples
+        --------
+        >>> import tempfile
+        >>> import pandas as pd
+        >>> sim = ModelF1(center_x=0.5, center_y=0.5, radius=0.22, offset=0, image_size=16)
+        >>> df = pd.DataFrame({"red": [255] * 5, "green": 0, "blue": 0, "pol_1": 0, "pol_2": 0})
+        >>> root = tempfile.mkdtemp()
+        >>> np.load(sim.simulate_to_file(df, Path(root, "images.npy"), chunk_size=2)).shape
+        (5, 16, 16, 3)
+        >>> [p.name for p in sim.simulate_to_file(df, Path(root, "images.npy"), chunk_size=2, sharded=True)]
+        ['images_00000.npy', 'images_00001.npy', 'images_00002.npy']
+
+        """
+        path = Path(path)
+        dtype = np.float64 if dtype is None else dtype
+        n_jobs = self._resolve_n_jobs(n_jobs)
+        if not sharded:
+            inputs, n = self._get_inputs(df)
+            shape = (n, self.image_size, self.image_size, 3)
+            images = np.lib.format.open_memmap(
+                path, mode="w+", dtype=dtype, shape=shape
+            )
+
+            def render_chunk(start):
+                stop = min(start + chunk_size, n)
+                chunk = _take(inputs, start, stop)
+                self._simulate_chunk(chunk, out=images[start:stop])
+
+            starts = range(0, n, chunk_size)
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                list(executor.map(render_chunk, starts))
+            images.flush()
+            del images
+            return path
+        # Sharded: a background thread writes each shard to disk while
+        # the next ones are rendered
+        paths = []
+        blocks = self.iter_simulate(df, chunk_size, dtype, n_jobs)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = None
+            for i, images in enumerate(blocks):
+                shard_path = path.with_name(f"{path.stem}_{i:05d}.npy")
+                if pending is not None:
+                    pending.result()
+                pending = executor.submit(np.save, shard_path, images)
+                paths.append(shard_path)
+            if pending is not None:
+                pending.result()
+        return paths
+
+    def _get_inputs(self, df):
+        """Return the input columns (without copying them) and their
+        number of rows."""
+        inputs = get_columns(df, self.inputs_names)
+        return inputs, len(inputs[self.inputs_names[0]])
+
+    def _simulate_chunk(self, inputs, dtype=None, out=None):
+        """Render a single chunk (a dictionary with the input arrays) in
+        the calling thread."""
+        dtype = np.float64 if dtype is None else dtype
+        return self._simulate(
+            **inputs, **self.parameters(), dtype=dtype, out=out, n_jobs=1
+        )
+
+    def _resolve_n_jobs(self, n_jobs):
+        n_jobs = self.n_jobs if n_jobs is None else n_jobs
+        return os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+
+
+class ModelF1(_ModelF):
     """Simulator of the images produced by the light tunnel.
 
     The derivation of the simulator, including inputs, outputs and
@@ -56,9 +227,12 @@ class ModelF1(Simulator):
         radius,
         offset,
         image_size,
+        n_jobs=1,
     ):
         """
-        Initialize the simulator by storing its parameters.
+        Initialize the simulator by storing its parameters. Set n_jobs
+        to render the images using several threads (-1 means using all
+        available cores).
         """
         super(ModelF1, self).__init__()
         # Store the simulator's parameters
@@ -67,6 +241,7 @@ class ModelF1(Simulator):
         self.radius = radius
         self.offset = offset
         self.image_size = image_size
+        self.n_jobs = n_jobs
 
     def parameters(self):
         """
@@ -93,6 +268,9 @@ class ModelF1(Simulator):
         radius,
         offset,
         image_size,
+        dtype=np.float64,
+        out=None,
+        n_jobs=None,
     ):
         """Simulates a synthetic image using model_f1, generating a colored
         hexagon over a black background.
@@ -119,6 +297,18 @@ class ModelF1(Simulator):
             Rotation of the hexagon in degrees.
         image_size : int
             Size of the synthetic image in pixels (i.e., image_size x image_size pixels).
+        dtype : numpy dtype, optional
+            The data type of the images. For floating types (default
+            is np.float64), pixel values are in [0,1]; for np.uint8,
+            they are quantized to integers in [0,255].
+        out : np.ndarray or None, optional
+            If given, the images are written into this array, which
+            must have the right dimensions (see below). Its dtype
+            takes precedence over `dtype`.
+        n_jobs : int or None, optional
+            The number of threads used to render the images; -1
+            means using all available cores. If None (default), the
+            value given when initializing the simulator is used.
 
         Returns
         -------
@@ -128,25 +318,20 @@ class ModelF1(Simulator):
             the inputs (i.e., red, green, blue, pol_1, pol_2).
 
         """
-        N = len(red)
-        images = np.ones((N, image_size, image_size, 3))
         pol_1, pol_2 = np.deg2rad(pol_1), np.deg2rad(pol_2)
         # Color
         malus_factor = np.cos(pol_1 - pol_2) ** 2
         red = red / 255 * malus_factor
         green = green / 255 * malus_factor
         blue = blue / 255 * malus_factor
-        images[:, :, :, 0] *= red[:, np.newaxis, np.newaxis]
-        images[:, :, :, 1] *= green[:, np.newaxis, np.newaxis]
-        images[:, :, :, 2] *= blue[:, np.newaxis, np.newaxis]
+        color = np.array([red, green, blue])
 
-        # Apply hexagon mask
+        # Produce the image by applying the hexagon mask
         mask = hexagon_mask(center_x, center_y, radius, offset, image_size)
-        images *= mask[np.newaxis, :, :, np.newaxis]
-        return clip(images)
+        return render(color.T, mask, dtype, out, self._resolve_n_jobs(n_jobs))
 
 
-class ModelF2(Simulator):
+class ModelF2(_ModelF):
     """
     Simulator of the images produced by the light tunnel.
 
@@ -180,9 +365,12 @@ class ModelF2(Simulator):
         radius,
         offset,
         image_size,
+        n_jobs=1,
     ):
         """
-        Initialize the simulator by storing its parameters.
+        Initialize the simulator by storing its parameters. Set n_jobs
+        to render the images using several threads (-1 means using all
+        available cores).
         """
         super(ModelF2, self).__init__()
         # Store the simulator's parameters
@@ -196,6 +384,7 @@ class ModelF2(Simulator):
         self.radius = radius
         self.offset = offset
         self.image_size = image_size
+        self.n_jobs = n_jobs
 
     def parameters(self):
         """
@@ -232,6 +421,9 @@ class ModelF2(Simulator):
         radius,
         offset,
         image_size,
+        dtype=np.float64,
+        out=None,
+        n_jobs=None,
     ):
         """Simulates a synthetic image using model_f2, generating a colored
         hexagon over a black background.
@@ -268,6 +460,18 @@ class ModelF2(Simulator):
             Rotation of the hexagon in degrees.
         image_size : int
             Size of the synthetic image in pixels (i.e., image_size x image_size pixels).
+        dtype : numpy dtype, optional
+            The data type of the images. For floating types (default
+            is np.float64), pixel values are in [0,1]; for np.uint8,
+            they are quantized to integers in [0,255].
+        out : np.ndarray or None, optional
+            If given, the images are written into this array, which
+            must have the right dimensions (see below). Its dtype
+            takes precedence over `dtype`.
+        n_jobs : int or None, optional
+            The number of threads used to render the images; -1
+            means using all available cores. If None (default), the
+            value given when initializing the simulator is used.
 
         Returns
         -------
@@ -277,8 +481,6 @@ class ModelF2(Simulator):
             the inputs (i.e., red, green, blue, pol_1, pol_2).
 
         """
-        N = len(red)
-        images = np.ones((N, image_size, image_size, 3))
         # Transform parameters
         pol_1, pol_2 = np.deg2rad(pol_1), np.deg2rad(pol_2)
         r = np.atleast_1d(red / 255)
@@ -290,19 +492,12 @@ class ModelF2(Simulator):
         W = np.diag([w_r, w_g, w_b])
         color = exposure * W @ S @ np.array([r, g, b]) * malus_factor
 
-        # Produce the image
-        images[:, :, :, 0] *= color[0, :, np.newaxis, np.newaxis]
-        images[:, :, :, 1] *= color[1, :, np.newaxis, np.newaxis]
-        images[:, :, :, 2] *= color[2, :, np.newaxis, np.newaxis]
-
-        # Apply hexagon mask
+        # Produce the image by applying the hexagon mask
         mask = hexagon_mask(center_x, center_y, radius, offset, image_size)
-        images *= mask[np.newaxis, :, :, np.newaxis]
-        return clip(images)
+        return render(color.T, mask, dtype, out, self._resolve_n_jobs(n_jobs))
 
 
-
-class ModelF3(Simulator):
+class ModelF3(_ModelF):
     """
     Simulator of the images produced by the light tunnel.
 
@@ -338,9 +533,12 @@ class ModelF3(Simulator):
         radius,
         offset,
         image_size,
+        n_jobs=1,
     ):
         """
-        Initialize the simulator by storing its parameters.
+        Initialize the simulator by storing its parameters. Set n_jobs
+        to render the images using several threads (-1 means using all
+        available cores).
         """
         super(ModelF3, self).__init__()
         # Store the simulator's parameters
@@ -356,6 +554,7 @@ class ModelF3(Simulator):
         self.radius = radius
         self.offset = offset
         self.image_size = image_size
+        self.n_jobs = n_jobs
 
     def parameters(self):
         """
@@ -396,6 +595,9 @@ class ModelF3(Simulator):
         radius,
         offset,
         image_size,
+        dtype=np.float64,
+        out=None,
+        n_jobs=None,
     ):
         """Simulates a synthetic image using model_f3, generating a colored
         hexagon over a black background.
@@ -436,6 +638,18 @@ class ModelF3(Simulator):
             Rotation of the hexagon in degrees.
         image_size : int
             Size of the synthetic image in pixels (i.e., image_size x image_size pixels).
+        dtype : numpy dtype, optional
+            The data type of the images. For floating types (default
+            is np.float64), pixel values are in [0,1]; for np.uint8,
+            they are quantized to integers in [0,255].
+        out : np.ndarray or None, optional
+            If given, the images are written into this array, which
+            must have the right dimensions (see below). Its dtype
+            takes precedence over `dtype`.
+        n_jobs : int or None, optional
+            The number of threads used to render the images; -1
+            means using all available cores. If None (default), the
+            value given when initializing the simulator is used.
 
         Returns
         -------
@@ -445,8 +659,6 @@ class ModelF3(Simulator):
             the inputs (i.e., red, green, blue, pol_1, pol_2).
 
         """
-        N = len(red)
-        images = np.ones((N, image_size, image_size, 3))
         # Transform parameters
         pol_1, pol_2 = np.deg2rad(pol_1), np.deg2rad(pol_2)
         r = np.atleast_1d(red / 255)
@@ -458,21 +670,84 @@ class ModelF3(Simulator):
         W = np.diag([w_r, w_g, w_b])
         color = exposure * W @ S @ np.array([r, g, b]) * malus_factor
 
-        # Produce the image
-        images[:, :, :, 0] *= color[0, :, np.newaxis, np.newaxis]
-        images[:, :, :, 1] *= color[1, :, np.newaxis, np.newaxis]
-        images[:, :, :, 2] *= color[2, :, np.newaxis, np.newaxis]
-
-        # Apply hexagon mask
+        # Produce the image by applying the hexagon mask
         mask = hexagon_mask(center_x, center_y, radius, offset, image_size)
-        images *= mask[np.newaxis, :, :, np.newaxis]
-        return clip(images)
+        return render(color.T, mask, dtype, out, self._resolve_n_jobs(n_jobs))
 
 
 # --------------------------------------------------------------------
 # Auxiliary functions
 
 
+def render(colors, mask, dtype=np.float64, out=None, n_jobs=1):
+    """Render the images of a hexagon with the given colors over a black
+    background.
+
+    The colors are clipped to [0,1] (and quantized, if dtype is an
+    integer type) before being written into the output, which is
+    the only image-sized array that is allocated.
+
+    Parameters
+    ----------
+    colors : np.ndarray
+        Array with dimensions [n_images, 3] containing the RGB color
+        of the hexagon in each image.
+    mask : np.ndarray
+        Boolean array with dimensions [image_size, image_size]
+        containing the hexagon mask.
+    dtype : numpy dtype, optional
+        The data type of the images (default is np.float64). For
+        np.uint8, pixel values are quantized to integers in [0,255].
+    out : np.ndarray or None, optional
+        If given, the images are written into this array, and its
+        dtype takes precedence over `dtype`.
+    n_jobs : int, optional
+        The number of threads used to render the images. Each thread
+        writes a contiguous block of images into the output. Default
+        is 1.
+
+    Returns
+    -------
+    np.ndarray
+        The images, with dimensions [n_images, image_size, image_size, 3].
+
+    Raises
+    ------
+    ValueError
+        If `out` does not have the right dimensions.
+
+    """
+    shape = (len(colors),) + mask.shape + (3,)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError(f"out has dimensions {out.shape}, expected {shape}.")
+    colors = clip(colors)
+    if np.issubdtype(out.dtype, np.integer):
+        colors = np.rint(colors * 255)
+    colors = colors.astype(out.dtype)
+    mask = mask[np.newaxis, :, :, np.newaxis]
+
+    def render_block(block):
+        colors_block = colors[block, np.newaxis, np.newaxis, :]
+        np.multiply(colors_block, mask, out=out[block])
+
+    n_jobs = min(n_jobs, len(colors))
+    if n_jobs <= 1:
+        render_block(slice(None))
+    else:
+        bounds = np.linspace(0, len(colors), n_jobs + 1).astype(int)
+        blocks = [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:])]
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            list(executor.map(render_block, blocks))
+    return out
+
+
+def _take(inputs, start, stop):
+    """Return views of the rows [start, stop) of the input arrays."""
+    return dict((k, v[start:stop]) for k, v in inputs.items())
+
+
 def clip(images):
     """Clip the pixels of the image so they are always in the range [0,1],
     e.g., 1.2 becomes 1, and -0.1 becomes 0.
@@ -487,8 +762,27 @@ def hexagon_mask(center_x, center_y, radius, offset, image_size):
     """Produce the hexagon mask given its center, radius, (angle) offset
     and the size (in pixels) of the image.
 
+    Masks are kept in a bounded LRU cache keyed by their geometry, so
+    the simulators compute them only once for a given set of
+    parameters. The returned array is read-only, as it is shared
+    between calls.
+
     """
-    mask = np.zeros((image_size, image_size))
+    try:
+        return _cached_hexagon_mask(center_x, center_y, radius, offset, image_size)
+    except TypeError:
+        # Unhashable parameters (e.g., arrays) cannot be cached
+        return _hexagon_mask(center_x, center_y, radius, offset, image_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_hexagon_mask(center_x, center_y, radius, offset, image_size):
+    mask = _hexagon_mask(center_x, center_y, radius, offset, image_size)
+    mask.flags.writeable = False
+    return mask
+
+
+def _hexagon_mask(center_x, center_y, radius, offset, image_size):
     image_points = coord_grid(image_size)
     vertices = hexagon_vertices(center_x, center_y, radius, offset) * image_size
     # Compute cross products for a segment and all points
@@ -496,7 +790,10 @@ def hexagon_mask(center_x, center_y, radius, offset, image_size):
     for i, vertex in enumerate(vertices):
         segment = vertex - vertices[(i + 1) % len(vertices)]
         vertex_to_points = image_points - vertex
-        cross = np.cross(vertex_to_points, segment)
+        cross = (
+            vertex_to_points[..., 0] * segment[1]
+            - vertex_to_points[..., 1] * segment[0]
+        )
         cross_prods.append(cross)
     cross_prods = np.array(cross_prods)
     all_neg = (cross_prods <= 0).all(axis=0)
@@ -518,11 +815,28 @@ def hexagon_vertices(center_x, center_y, radius, offset):
     return np.array(vertices)
 
 
+@functools.lru_cache(maxsize=8)
 def coord_grid(image_size):
     """
-    Make a coordinate grid (in pixels) given the image size
+    Make a coordinate grid (in pixels) given the image size. The grid
+    is cached and returned as a read-only array.
     """
     X = np.tile(np.arange(image_size), (image_size, 1))
     Y = X.T[::-1, :]
     grid = np.array([X, Y])
-    return np.transpose(grid, (1, 2, 0))
+    grid = np.transpose(grid, (1, 2, 0))
+    grid.flags.writeable = False
+    return grid
+
+
+# ----------------------------------------------------------------------
+# Doctests
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod(
+        extraglobs={},
+        verbose=True,
+        optionflags=doctest.ELLIPSIS,
+    )
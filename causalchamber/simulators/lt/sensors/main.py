@@ -149,6 +149,8 @@ class Deterministic(Simulator):
         A,
         a1,
         a2,
+        dtype=np.float64,
+        out=None,
     ):
         """Simulates the light-intensity measurements from the sensors in the
         light tunnel. For the complete derivation and details of all
@@ -225,6 +227,13 @@ class Deterministic(Simulator):
             reading when the polarizer positions are `pol_1=0` and
             `pol_2=0`, respectively, and the reference voltages are
             `v_angle_1=v_angle_2=5`.
+        dtype : numpy dtype, optional
+            The (floating-point) data type of the outputs, in which the
+            simulation is also carried out. Default is np.float64.
+        out : tuple of numpy.ndarray or None, optional
+            If given, the outputs are written into these arrays, one
+            for each output (see `Simulator.simulate_from_inputs`).
+            Their dtype takes precedence over `dtype`.
 
         Returns
         -------
@@ -250,30 +259,85 @@ class Deterministic(Simulator):
         """
 
         RGB = np.array([red, green, blue])
+        shape = RGB.shape[1:]
+        shapes = [shape] * 6 + [np.shape(Q)[:-1] + shape]
+        shapes += [np.shape(pol_1), np.shape(pol_2)]
+        if out is None:
+            out = tuple(np.empty(s, dtype=dtype) for s in shapes)
+        else:
+            out = self._check_out(out, shapes)
+            dtype = np.result_type(*out)
+        RGB = RGB.astype(dtype, copy=False)
 
-        # First sensor
-        SRGB = S @ RGB
-        ir_1 = 2 ** (diode_ir_1 + t_ir_1) * SRGB[0]
-        vis_1 = 2 ** (diode_vis_1 + t_vis_1) * SRGB[1]
+        # All sensor responses are linear in RGB: compute them with a
+        # single product with the stacked response matrices (see
+        # _response_matrix), i.e., rows
+        #   0-1: first sensor (ir, vis)
+        #   2-3: second sensor
+        #   4-5: third sensor, component attenuated by the polarizers
+        #   6-7: third sensor, component transmitted regardless
+        #   8- : current
+        M = _response_matrix(S, d1, d2, d3, Ts, Tp, Tc, Q).astype(dtype)
+        SRGB = M @ RGB
 
-        # Second sensor
-        SRGB = S @ np.diag(Ts) @ ((d1 / d2) ** 2 * RGB)
-        ir_2 = 2 ** (diode_ir_2 + t_ir_2) * SRGB[0]
-        vis_2 = 2 ** (diode_vis_2 + t_vis_2) * SRGB[1]
+        # Third sensor (Malus' law)
+        malus = np.cos(np.deg2rad(pol_1 - pol_2, dtype=dtype))
+        malus *= malus
+        SRGB[4:6] *= malus
+        SRGB[4:6] += SRGB[6:8]
 
-        # Third sensor
-        malus = np.atleast_2d(np.cos(np.deg2rad(pol_1 - pol_2)) ** 2)
-        CRGB = (d1 / d3) ** 2 * RGB
-        CRGB = np.diag(Tp - Tc) @ (malus * CRGB) + np.diag(Tc) @ CRGB
-        SRGB = S @ CRGB
-        ir_3 = 2 ** (diode_ir_3 + t_ir_3) * SRGB[0]
-        vis_3 = 2 ** (diode_vis_3 + t_vis_3) * SRGB[1]
+        # Sensor gains are 2 ** (diode + t)
+        ir_1 = _apply_gain(SRGB[0, ...], diode_ir_1, t_ir_1, out[0])
+        vis_1 = _apply_gain(SRGB[1, ...], diode_vis_1, t_vis_1, out[1])
+        ir_2 = _apply_gain(SRGB[2, ...], diode_ir_2, t_ir_2, out[2])
+        vis_2 = _apply_gain(SRGB[3, ...], diode_vis_2, t_vis_2, out[3])
+        ir_3 = _apply_gain(SRGB[4, ...], diode_ir_3, t_ir_3, out[4])
+        vis_3 = _apply_gain(SRGB[5, ...], diode_vis_3, t_vis_3, out[5])
 
         # Current
-        current = (Q @ RGB + C0) * 5.0 / v_c
+        current = np.add(SRGB[8:].reshape(shapes[6]), C0, out=out[6])
+        current *= 5.0
+        current /= v_c
 
         # Angles
-        angle_1 = np.minimum((A * pol_1 + a1) * 5.0 / v_angle_1, 1023)
-        angle_2 = np.minimum((A * pol_2 + a2) * 5.0 / v_angle_2, 1023)
+        angle_1 = _angle(pol_1, A, a1, v_angle_1, out[7])
+        angle_2 = _angle(pol_2, A, a2, v_angle_2, out[8])
 
         return ir_1, vis_1, ir_2, vis_2, ir_3, vis_3, current, angle_1, angle_2
+
+
+def _response_matrix(S, d1, d2, d3, Ts, Tp, Tc, Q):
+    """Stack the linear responses of the sensors to the light-source
+    color (see Deterministic._simulate) into a single matrix, folding
+    the diagonal transmission matrices and distance factors into the
+    photodiode response matrix S."""
+    S = np.asarray(S, dtype=float)
+    return np.vstack(
+        [
+            S,
+            (d1 / d2) ** 2 * (S * Ts),
+            (d1 / d3) ** 2 * (S * (np.asarray(Tp) - Tc)),
+            (d1 / d3) ** 2 * (S * Tc),
+            np.reshape(Q, (-1, 3)),
+        ]
+    )
+
+
+def _apply_gain(x, diode, t, out):
+    """Multiply x by the sensor gain 2 ** (diode + t), writing the
+    result into out. For integer settings (i.e., always in practice)
+    this shifts the exponent of x with np.ldexp, which is exact and
+    avoids computing the powers."""
+    exponent = np.add(diode, t)
+    if np.issubdtype(np.asarray(exponent).dtype, np.integer):
+        return np.ldexp(x, exponent, out=out)
+    return np.multiply(x, 2.0**exponent, out=out)
+
+
+def _angle(pol, A, a, v_angle, out):
+    """Compute the measurement of an angle sensor, writing it into out."""
+    angle = np.multiply(A, pol, out=out)
+    angle += a
+    angle *= 5.0
+    angle /= v_angle
+    return np.minimum(angle, 1023, out=angle)
@@ -20,6 +20,10 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 
+from collections.abc import Mapping
+
+import numpy as np
+
 
 class Simulator:
     """The base class for the causal chamber simulators.
@@ -38,16 +42,34 @@ class Simulator:
         """
         pass
 
-    def simulate_from_inputs(self, df):
+    def simulate_from_inputs(self, df, dtype=None, out=None):
         """Runs the simulation using inputs from a given DataFrame. Passing a
         dataframe that doesn't define all inputs as columns will raise
         an error. Additional columns are ignored.
 
+        The input columns are passed to the simulator without copying
+        them, which matters for frames with millions of rows.
+
         Parameters
         ----------
-        df : pandas.DataFrameA
+        df : pandas.DataFrame, dict, numpy structured array or pyarrow.Table
             A pandas DataFrame containing the inputs in columns named
-            as in `self.inputs_names`.
+            as in `self.inputs_names`. Alternatively, a dictionary of
+            arrays, a numpy structured array or a pyarrow Table (or
+            RecordBatch) with the inputs in fields of the same names.
+        dtype : numpy dtype or None, optional
+            The data type of the outputs, e.g., np.float32 (or np.uint8
+            for the image simulators). If None (default), the
+            simulator's default is used (np.float64 for all but
+            lt.DecoderSimple, which produces np.float32 images).
+        out : numpy.ndarray, tuple of numpy.ndarray or None, optional
+            The array(s) into which the outputs are written, e.g., to
+            reuse them across calls. For simulators with several
+            outputs, one array per output in the order of
+            `self.outputs_names` (or a 2D array with one row per
+            output). If given, the dtype of the arrays takes
+            precedence over `dtype`. If None (default), new arrays are
+            allocated.
 
         Returns
         -------
@@ -56,8 +78,11 @@ class Simulator:
 
         """
         # Take inputs from dataframe
-        inputs = dict((k, v.values) for k, v in dict(df[self.inputs_names]).items())
-        return self._simulate(**inputs, **self.parameters())
+        inputs = get_columns(df, self.inputs_names)
+        # Only pass the output options that were given, leaving the
+        # simulator's defaults otherwise
+        options = dict((k, v) for k, v in [("dtype", dtype), ("out", out)] if v is not None)
+        return self._simulate(**inputs, **self.parameters(), **options)
 
     def parameters(self):
         """
@@ -65,6 +90,118 @@ class Simulator:
         """
         return {}
 
+    def _stack_inputs(self, inputs):
+        """Stack the inputs from a DataFrame or a list of DataFrames (of
+        equal length) into 2D arrays of shape [n_frames, n_rows], used
+        by the simulators that support batched simulation.
+
+        Parameters
+        ----------
+        inputs : pandas.DataFrame or list of pandas.DataFrame
+            The input frames, containing the inputs in columns named
+            as in `self.inputs_names`. The frames can also be any of
+            the other inputs accepted by `simulate_from_inputs`.
+
+        Returns
+        -------
+        dict of numpy.ndarray
+            A dictionary with the stacked array for each input.
+
+        Raises
+        ------
+        ValueError
+            If the given frames do not have the same length.
+
+        """
+        frames = [inputs] if is_table(inputs) else list(inputs)
+        frames = [get_columns(df, self.inputs_names) for df in frames]
+        if len(set(len(v) for df in frames for v in df.values())) > 1:
+            raise ValueError("All input frames must have the same number of rows.")
+        return dict(
+            (k, np.stack([df[k] for df in frames])) for k in self.inputs_names
+        )
+
+    def _batch_parameters(self, parameters):
+        """Return the simulator parameters, where the given (batched)
+        parameters override the values stored in the simulator.
+
+        Raises
+        ------
+        TypeError
+            If any of the given parameters is not a simulator parameter.
+
+        """
+        batch = self.parameters()
+        for k, v in parameters.items():
+            if k not in batch:
+                raise TypeError(f'"{k}" is not a parameter of {type(self).__name__}.')
+            batch[k] = v
+        return batch
+
+    def _write_outputs(self, outputs, dtype=np.float64, out=None):
+        """Return the outputs computed by `_simulate` with the given
+        dtype, or written into the arrays in `out` (see
+        `simulate_from_inputs`). Used by the simulators that compute
+        their outputs in double precision regardless of `dtype`.
+
+        Parameters
+        ----------
+        outputs : array_like or tuple of array_like
+            The output, or a tuple with one array per output for
+            simulators with several outputs.
+        dtype : numpy dtype, optional
+            The data type of the returned outputs. Default is np.float64,
+            in which case the outputs are returned without copying them.
+        out : numpy.ndarray, tuple of numpy.ndarray or None, optional
+            If given, the outputs are written into these arrays.
+
+        Returns
+        -------
+        numpy.ndarray or tuple of numpy.ndarray
+            The outputs, with the same structure as `outputs`.
+
+        Raises
+        ------
+        ValueError
+            If `out` does not have the right number of arrays or
+            dimensions.
+
+        """
+        single = len(self.outputs_names) == 1
+        outputs = (outputs,) if single else tuple(outputs)
+        if out is None:
+            # [()] keeps scalar outputs as scalars
+            result = tuple(np.asarray(x, dtype=dtype)[()] for x in outputs)
+        else:
+            result = self._check_out(out, [np.shape(x) for x in outputs])
+            for o, x in zip(result, outputs):
+                np.copyto(o, x, casting="unsafe")
+        return result[0] if single else result
+
+    def _check_out(self, out, shapes):
+        """Return the output arrays given in `out` as a tuple, checking
+        that there is one array for each output and that it has the
+        dimensions given in `shapes`.
+
+        Raises
+        ------
+        ValueError
+            If `out` does not have the right number of arrays or
+            dimensions.
+
+        """
+        out = (out,) if len(self.outputs_names) == 1 else tuple(out)
+        if len(out) != len(self.outputs_names):
+            raise ValueError(
+                f"out must contain {len(self.outputs_names)} arrays, one for each output {self.outputs_names}."
+            )
+        for name, o, shape in zip(self.outputs_names, out, shapes):
+            if o.shape != tuple(shape):
+                raise ValueError(
+                    f'out for "{name}" has dimensions {o.shape}, expected {tuple(shape)}.'
+                )
+        return out
+
     def _simulate(self):
         """
         A placeholder method for the simulation logic, to be implemented in subclasses.
@@ -75,3 +212,93 @@ class Simulator:
             If not implemented in a subclass.
         """
         raise NotImplementedError()
+
+
+def is_table(data):
+    """Return True if data is one of the tables of inputs accepted by
+    the simulators: a pandas DataFrame, a dictionary of arrays, a
+    numpy structured array or a pyarrow Table/RecordBatch.
+
+    """
+    return isinstance(data, Mapping) or _fields(data) is not None
+
+
+def get_columns(data, names):
+    """Return the columns with the given names from a table of inputs
+    (see `is_table`) as a dictionary of numpy arrays. The arrays are
+    views of the table's data where possible, i.e., for numerical
+    columns of DataFrames, structured arrays and (single-chunk,
+    null-free) pyarrow columns.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame, dict, numpy structured array or pyarrow.Table
+        The table.
+    names : list of str
+        The names of the columns.
+
+    Returns
+    -------
+    dict of numpy.ndarray
+        A dictionary with the array for each column.
+
+    Raises
+    ------
+    KeyError
+        If any of the columns is not in the table.
+
+    Examples
+    --------
+    >>> data = np.zeros(3, dtype=[("red", float), ("green", int), ("blue", int)])
+    >>> columns = get_columns(data, ["red", "blue"])
+    >>> sorted(columns), np.shares_memory(columns["red"], data)
+    (['blue', 'red'], True)
+    >>> get_columns({"red": [1, 2]}, ["red", "blue"])
+    Traceback (most recent call last):
+    ...
+    KeyError: 'Missing inputs: blue.'
+
+    """
+    fields = _fields(data)
+    available = data.keys() if fields is None else fields
+    missing = [k for k in names if k not in available]
+    if missing:
+        raise KeyError(f"Missing inputs: {', '.join(missing)}.")
+    if hasattr(data, "column_names"):
+        # pyarrow Table or RecordBatch
+        return dict((k, _arrow_to_numpy(data.column(k))) for k in names)
+    if hasattr(data, "columns"):
+        # pandas DataFrame
+        return dict((k, data[k].to_numpy()) for k in names)
+    # Structured array or dictionary
+    return dict((k, np.asarray(data[k])) for k in names)
+
+
+def _fields(data):
+    """Return the column names of a DataFrame, structured array or
+    pyarrow table, or None for any other object."""
+    if isinstance(data, np.ndarray):
+        return data.dtype.names
+    if hasattr(data, "column_names"):
+        return data.column_names
+    if hasattr(data, "columns") and hasattr(data, "iloc"):
+        return data.columns
+    return None
+
+
+def _arrow_to_numpy(column):
+    """Convert a pyarrow (chunked) array to numpy, without copying if it
+    consists of a single chunk of a primitive type without nulls."""
+    if getattr(column, "num_chunks", None) == 1:
+        column = column.chunk(0)
+    return np.asarray(column.to_numpy(zero_copy_only=False))
+
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod(
+        extraglobs={},
+        verbose=True,
+        optionflags=doctest.ELLIPSIS,
+    )
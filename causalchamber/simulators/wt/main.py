@@ -64,7 +64,7 @@ class ModelA1(Simulator):
         """
         return {"L_min": self.L_min, "omega_max": self.omega_max}
 
-    def _simulate(self, load, L_min, omega_max):
+    def _simulate(self, load, L_min, omega_max, dtype=np.float64, out=None):
         """
         Simulate the steady-state fan speed using Model A1.
 
@@ -79,6 +79,12 @@ class ModelA1(Simulator):
             The minimum effective load. For load < L_min, L_min is used.
         omega_max : float
             The maximum angular speed of the fan (in rpm).
+        dtype : numpy dtype, optional
+            The data type of the output (default is np.float64). The
+            simulation itself is always carried out in double precision.
+        out : numpy.ndarray or None, optional
+            If given, the output is written into this array (see
+            `Simulator.simulate_from_inputs`).
 
         Returns
         -------
@@ -92,7 +98,7 @@ class ModelA1(Simulator):
         """
         rads = model_a1(L=load, L_min=L_min, omega_max=omega_max * np.pi / 30)
         # Transform from rad/s to rpm
-        return rads / np.pi * 30
+        return self._write_outputs(rads / np.pi * 30, dtype, out)
 
 
 class ModelA2(Simulator):
@@ -121,6 +127,7 @@ class ModelA2(Simulator):
         # Parameters for the ODE solver
         omega_0,
         simulation_steps=100,
+        solver="euler",
     ):
         """Initializes the simulator."""
         super(ModelA2, self).__init__()
@@ -130,6 +137,7 @@ class ModelA2(Simulator):
         self.K = K
         self.omega_0 = omega_0
         self.simulation_steps = simulation_steps
+        self.solver = solver
 
     def parameters(self):
         """
@@ -141,15 +149,29 @@ class ModelA2(Simulator):
             "K": self.K,
             "omega_0": self.omega_0,
             "simulation_steps": self.simulation_steps,
+            "solver": self.solver,
         }
 
-    def _simulate(self, load, timestamp, I, tau, K, omega_0, simulation_steps):
+    def _simulate(
+        self,
+        load,
+        timestamp,
+        I,
+        tau,
+        K,
+        omega_0,
+        simulation_steps,
+        solver,
+        dtype=np.float64,
+        out=None,
+    ):
         """
         Simulate the dynamic behavior of the fan using Model A2.
 
         This function integrates the fan’s speed over time using the torque-balance differential
         equation from Model A2. An ODE solver (Euler's method) is used with a specified number of
-        simulation steps, and the output is converted from rad/s to rpm.
+        simulation steps, or alternatively, the closed-form solution of the ODE. The output is
+        converted from rad/s to rpm.
 
         See Model A2 in Appendix IV.1 for more details (https://arxiv.org/pdf/2404.11341#page=28&zoom=100,57,332).
 
@@ -169,6 +191,18 @@ class ModelA2(Simulator):
             The initial angular speed of the fan (in rpm; note that the internal model works in rad/s).
         simulation_steps : int
             The number of steps used by the ODE solver (Euler's method).
+        solver : str
+            The ODE solver: "euler" for Euler's method with
+            `simulation_steps` steps between time points (as in the
+            original paper), or "exact" for the closed-form solution
+            of the ODE under constant torque between time points,
+            which is faster and does not use `simulation_steps`.
+        dtype : numpy dtype, optional
+            The data type of the output (default is np.float64). The
+            simulation itself is always carried out in double precision.
+        out : numpy.ndarray or None, optional
+            If given, the output is written into this array (see
+            `Simulator.simulate_from_inputs`).
 
         Returns
         -------
@@ -198,6 +232,56 @@ class ModelA2(Simulator):
             K=K,
             omega_0=omega_0 * np.pi / 30,
             simulation_steps=simulation_steps,
+            solver=solver,
+        )
+        # Transform from rad/s to rpm
+        return self._write_outputs(rads / np.pi * 30, dtype, out)
+
+    def simulate_batch(self, inputs, **parameters):
+        """Simulate many trajectories at once, for a batch of input frames
+        and/or parameter values. All trajectories are advanced
+        together, which is much faster than calling
+        `simulate_from_inputs` for each of them.
+
+        Parameters
+        ----------
+        inputs : pandas.DataFrame or list of pandas.DataFrame
+            The input frame(s), containing the columns in
+            `self.inputs_names`. A list of frames (of equal length)
+            yields one trajectory per frame; a single frame is shared
+            by all trajectories.
+        **parameters
+            Values that override the simulator parameters for the
+            batch. The parameters I, K and omega_0 can be given as
+            arrays with one value per trajectory, and tau as a list
+            with one function per trajectory.
+
+        Returns
+        -------
+        numpy.ndarray
+            The simulated fan speeds (in rpm), with dimensions
+            [n_trajectories, n_rows].
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> sim = ModelA2(I=1e-5, tau=lambda load: 1e-3 * load, K=1e-8, omega_0=0, solver="exact")
+        >>> df = pd.DataFrame({"load": [0, 1, 1, 1], "timestamp": [0, 0.1, 0.2, 0.3]})
+        >>> sim.simulate_batch(df, K=[1e-8, 2e-8, 4e-8]).shape
+        (3, 4)
+
+        """
+        inputs = self._stack_inputs(inputs)
+        parameters = self._batch_parameters(parameters)
+        rads = model_a2_batch(
+            loads=inputs["load"],
+            timestamps=inputs["timestamp"],
+            I=parameters["I"],
+            tau=parameters["tau"],
+            K=parameters["K"],
+            omega_0=np.asarray(parameters["omega_0"], dtype=float) * np.pi / 30,
+            simulation_steps=parameters["simulation_steps"],
+            solver=parameters["solver"],
         )
         # Transform from rad/s to rpm
         return rads / np.pi * 30
@@ -244,7 +328,7 @@ class ModelB1(Simulator):
             "L_min": self.L_min,
         }
 
-    def _simulate(self, load, C_min, C_max, L_min):
+    def _simulate(self, load, C_min, C_max, L_min, dtype=np.float64, out=None):
         """Simulate the electrical current drawn by the fan using Model B1.
 
         This function computes the current drawn by the fan based on
@@ -262,6 +346,12 @@ class ModelB1(Simulator):
             The maximum current drawn by the fan at full load.
         L_min : float
             The minimum effective load; for loads below this threshold, L_min is used.
+        dtype : numpy dtype, optional
+            The data type of the output (default is np.float64). The
+            simulation itself is always carried out in double precision.
+        out : numpy.ndarray or None, optional
+            If given, the output is written into this array (see
+            `Simulator.simulate_from_inputs`).
 
         Returns
         -------
@@ -275,7 +365,8 @@ class ModelB1(Simulator):
         load = np.atleast_1d(load)
         current = C_min + np.maximum(load, L_min) ** 3 * (C_max - C_min)
         current[load == 0] = C_min
-        return current if len(load) > 1 else current[0]
+        current = current if len(load) > 1 else current[0]
+        return self._write_outputs(current, dtype, out)
 
 
 class SimA1C2(Simulator):
@@ -357,6 +448,8 @@ class SimA1C2(Simulator):
         barometer_error,  # The barometer offset
         barometer_precision,  # The std. of the barometer sensor noise
         random_state,
+        dtype=np.float64,
+        out=None,
     ):
         """
         Simulate wind tunnel conditions using Models A1 and C2.
@@ -390,6 +483,12 @@ class SimA1C2(Simulator):
             The standard deviation of the barometer sensor noise.
         random_state : int or RandomState
             Seed or random state for simulating sensor noise.
+        dtype : numpy dtype, optional
+            The data type of the outputs (default is np.float64). The
+            simulation itself is always carried out in double precision.
+        out : tuple of numpy.ndarray or None, optional
+            If given, the outputs are written into these arrays, one
+            for each output (see `Simulator.simulate_from_inputs`).
 
         Returns
         -------
@@ -422,7 +521,8 @@ class SimA1C2(Simulator):
         )
         rpm_in = omega_in / np.pi * 30
         rpm_out = omega_out / np.pi * 30
-        return pressure_downwind, rpm_in, rpm_out
+        outputs = (pressure_downwind, rpm_in, rpm_out)
+        return self._write_outputs(outputs, dtype, out)
 
 
 class SimA1C3(Simulator):
@@ -507,6 +607,8 @@ class SimA1C3(Simulator):
         barometer_error,
         barometer_precision,
         random_state,
+        dtype=np.float64,
+        out=None,
     ):
         """
         Simulate wind tunnel conditions using Models A1 and C3.
@@ -543,6 +645,12 @@ class SimA1C3(Simulator):
             The standard deviation of the barometer sensor noise.
         random_state : int or RandomState
             Seed or random state for simulating sensor noise.
+        dtype : numpy dtype, optional
+            The data type of the outputs (default is np.float64). The
+            simulation itself is always carried out in double precision.
+        out : tuple of numpy.ndarray or None, optional
+            If given, the outputs are written into these arrays, one
+            for each output (see `Simulator.simulate_from_inputs`).
 
         Returns
         -------
@@ -575,7 +683,8 @@ class SimA1C3(Simulator):
         )
         rpm_in = omega_in / np.pi * 30
         rpm_out = omega_out / np.pi * 30
-        return pressure_downwind, rpm_in, rpm_out
+        outputs = (pressure_downwind, rpm_in, rpm_out)
+        return self._write_outputs(outputs, dtype, out)
 
 
 class SimA2C3(Simulator):
@@ -616,6 +725,7 @@ class SimA2C3(Simulator):
         random_state=42,
         # For the ODE solver of model A2
         simulation_steps=100,
+        solver="euler",
     ):
         """Initializes the simulator with the given parameters. See the
         docstring for `_simulate` for a full description of the simulator
@@ -639,8 +749,9 @@ class SimA2C3(Simulator):
         self.barometer_precision = barometer_precision
         self.random_state = random_state
 
-        # ODE solver parameter
+        # ODE solver parameters
         self.simulation_steps = simulation_steps
+        self.solver = solver
 
     def parameters(self):
         """Return a dictionary with the simulator parameters and their values."""
@@ -659,6 +770,7 @@ class SimA2C3(Simulator):
             "barometer_precision": self.barometer_precision,
             "random_state": self.random_state,
             "simulation_steps": self.simulation_steps,
+            "solver": self.solver,
         }
 
     def _simulate(
@@ -686,6 +798,9 @@ class SimA2C3(Simulator):
         barometer_precision,
         random_state,
         simulation_steps,
+        solver,
+        dtype=np.float64,
+        out=None,
     ):
         """
         Simulate dynamic wind tunnel behavior using Models A2 and C3.
@@ -738,6 +853,15 @@ class SimA2C3(Simulator):
             Seed or random state for simulating sensor noise.
         simulation_steps : int
             The number of simulation steps used by the internal ODE solver (Euler's method).
+        solver : str
+            The ODE solver for Model A2: "euler" (Euler's method, as in
+            the original paper) or "exact" (closed-form solution).
+        dtype : numpy dtype, optional
+            The data type of the outputs (default is np.float64). The
+            simulation itself is always carried out in double precision.
+        out : tuple of numpy.ndarray or None, optional
+            If given, the outputs are written into these arrays, one
+            for each output (see `Simulator.simulate_from_inputs`).
 
         Returns
         -------
@@ -772,6 +896,72 @@ class SimA2C3(Simulator):
             barometer_precision=barometer_precision,
             random_state=random_state,
             simulation_steps=simulation_steps,
+            solver=solver,
+        )
+        rpm_in = omega_in / np.pi * 30
+        rpm_out = omega_out / np.pi * 30
+        outputs = (pressure_downwind, rpm_in, rpm_out)
+        return self._write_outputs(outputs, dtype, out)
+
+    def simulate_batch(self, inputs, **parameters):
+        """Simulate many trajectories at once, for a batch of input frames
+        and/or parameter values. All trajectories are advanced
+        together, which is much faster than calling
+        `simulate_from_inputs` for each of them.
+
+        Parameters
+        ----------
+        inputs : pandas.DataFrame or list of pandas.DataFrame
+            The input frame(s), containing the columns in
+            `self.inputs_names`. A list of frames (of equal length)
+            yields one trajectory per frame; a single frame is shared
+            by all trajectories.
+        **parameters
+            Values that override the simulator parameters for the
+            batch. Numerical parameters can be given as arrays with
+            one value per trajectory, and tau as a list with one
+            function per trajectory.
+
+        Returns
+        -------
+        tuple
+            A tuple containing the simulated pressure_downwind, rpm_in
+            and rpm_out, each with dimensions [n_trajectories, n_rows].
+
+        Notes
+        -----
+        The sensor noise is drawn from a single random generator
+        seeded with `random_state`, so only the first trajectory of the
+        batch matches the output of `simulate_from_inputs`.
+
+        """
+        inputs = self._stack_inputs(inputs)
+        p = self._batch_parameters(parameters)
+
+        def to_rads(rpm):
+            return np.asarray(rpm, dtype=float) * np.pi / 30
+
+        pressure_downwind, omega_in, omega_out = simulator_a2_c3_batch(
+            load_in=inputs["load_in"],
+            load_out=inputs["load_out"],
+            hatch=inputs["hatch"],
+            P_amb=inputs["pressure_ambient"],
+            timestamps=inputs["timestamp"],
+            I=p["I"],
+            tau=p["tau"],
+            C=p["K"],
+            omega_in_0=to_rads(p["omega_in_0"]),
+            omega_out_0=to_rads(p["omega_out_0"]),
+            S_max=p["S_max"],
+            omega_max=to_rads(p["omega_max"]),
+            Q_max=p["Q_max"],
+            r_0=p["r_0"],
+            beta=p["beta"],
+            barometer_error=p["barometer_error"],
+            barometer_precision=p["barometer_precision"],
+            random_state=p["random_state"],
+            simulation_steps=p["simulation_steps"],
+            solver=p["solver"],
         )
         rpm_in = omega_in / np.pi * 30
         rpm_out = omega_out / np.pi * 30
@@ -819,20 +1009,48 @@ def model_a2(
     omega_0,
     timestamps,
     simulation_steps,
+    solver="euler",
 ):
     """Model A2 of the fan-speed dynamics given a time-series of the fan
-    load."""
+    load.
+
+    The torque is assumed constant between consecutive time points
+    (taking its value at the later one), and the ODE is solved with
+    one of the following solvers:
+
+      - "euler": Euler's method with `simulation_steps` steps between
+        consecutive time points, as in the original paper.
+      - "exact": the closed-form solution of the ODE for constant
+        torque (`simulation_steps` is ignored).
+
+    """
     # Compute torque at each time point
-    torques = tau(loads)
+    torques = np.atleast_1d(tau(loads)).astype(float)
+    if solver == "euler":
+        return _solve_a2_euler(torques, I, K, omega_0, timestamps, simulation_steps)
+    elif solver == "exact":
+        return _solve_a2_exact(torques, I, K, omega_0, timestamps)
+    else:
+        raise ValueError(f'Unknown solver "{solver}"; must be "euler" or "exact".')
+
+
+def _solve_a2_euler(torques, I, K, omega_0, timestamps, simulation_steps):
+    """Solve the ODE of model A2 using Euler's method.
 
-    # Compute speed at each time point by solving the ODE
-    omegas = np.zeros_like(loads, dtype=float)
+    The arithmetic is carried out on Python floats, which avoids the
+    overhead of operating on numpy scalars while producing results
+    identical to those of the original implementation.
+
+    """
+    torques = torques.tolist()
+    timestamps = np.asarray(timestamps, dtype=float).tolist()
+    I, K = float(I), float(K)
+    omegas = np.zeros(len(torques))
     omegas[0] = omega_0
-    for i in range(1, len(loads)):
-        timestep = timestamps[i] - timestamps[i - 1]
+    omega = float(omegas[0])
+    for i in range(1, len(torques)):
         torque = torques[i]
-        omega = omegas[i - 1]
-        dt = timestep / simulation_steps
+        dt = (timestamps[i] - timestamps[i - 1]) / simulation_steps
         for _ in range(simulation_steps):
             d_omega = 1 / I * (torque - K * omega**2)
             omega += dt * d_omega
@@ -840,6 +1058,128 @@ def model_a2(
     return omegas
 
 
+def _solve_a2_exact(torques, I, K, omega_0, timestamps):
+    """Solve the ODE of model A2 using its closed-form solution.
+
+    For a constant torque, the fan speed after a time step dt is a
+    Möbius transformation of the speed at the beginning of the step,
+    i.e., omega' = (omega + B) / (C * omega + 1), where
+
+      - tau > 0: B = w tanh(a dt), C = tanh(a dt) / w, with the
+        steady-state speed w = sqrt(tau / K) and a = sqrt(tau K) / I;
+      - tau = 0: B = 0, C = K dt / I;
+      - tau < 0: B = -w tan(a dt), C = tan(a dt) / w, with
+        w = sqrt(-tau / K) and a = sqrt(-tau K) / I;
+      - K = 0: B = tau dt / I, C = 0.
+
+    The coefficients are computed for all time steps at once, leaving
+    a single multiply-add and division per time step.
+
+    """
+    dts = np.diff(np.asarray(timestamps, dtype=float))
+    B, C = _a2_step_coefficients(torques[1:], I, K, dts)
+    omegas = np.zeros(len(torques))
+    omegas[0] = omega_0
+    omega = float(omegas[0])
+    for i, (b, c) in enumerate(zip(B.tolist(), C.tolist())):
+        omega = (omega + b) / (c * omega + 1)
+        omegas[i + 1] = omega
+    return omegas
+
+
+def _a2_step_coefficients(torques, I, K, dts):
+    """Compute the coefficients (B, C) of the closed-form update of model
+    A2 over time steps dts under the given (constant) torques; see
+    `_solve_a2_exact`. Inputs are broadcast against each other.
+
+    """
+    torques, I, K, dts = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (torques, I, K, dts))
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.sqrt(np.abs(torques) / K)
+        a = np.sqrt(np.abs(torques) * K) / I
+        T = np.where(torques >= 0, np.tanh(a * dts), np.tan(a * dts))
+        B = np.where(torques > 0, w * T, -w * T)
+        C = np.where(torques == 0, K * dts / I, T / w)
+        # K = 0: no drag, the torque accelerates the fan linearly
+        B = np.where(K == 0, torques * dts / I, B)
+        C = np.where(K == 0, 0.0, C)
+    B = np.where(torques == 0, 0.0, B)
+    return B, C
+
+
+def model_a2_batch(
+    # Input
+    loads,
+    # Parameters
+    I,
+    tau,
+    K,
+    # Parameters for the ODE solver
+    omega_0,
+    timestamps,
+    simulation_steps,
+    solver="euler",
+):
+    """Batched version of model A2, which simulates several trajectories
+    of the fan speed at once.
+
+    The loads and timestamps are arrays of shape [n_rows] or
+    [n_trajectories, n_rows]; I, K and omega_0 are scalars or arrays of
+    shape [n_trajectories]; tau is a function or a list of functions,
+    one per trajectory. Returns an array of shape [n_trajectories,
+    n_rows], where each row equals the output of model_a2 for the
+    corresponding inputs and parameters.
+
+    """
+    loads = np.atleast_2d(loads)
+    # Compute torques at each time point
+    if callable(tau):
+        torques = np.reshape(tau(loads.ravel()), loads.shape).astype(float)
+    else:
+        if len(loads) == 1:
+            loads = np.broadcast_to(loads, (len(tau), loads.shape[1]))
+        elif len(tau) != len(loads):
+            raise ValueError(
+                f"Got {len(tau)} torque functions (tau) for {len(loads)} trajectories."
+            )
+        torques = np.array([np.atleast_1d(t(l)) for t, l in zip(tau, loads)], dtype=float)
+    timestamps = np.atleast_2d(np.asarray(timestamps, dtype=float))
+    I, K, omega_0 = (np.atleast_1d(np.asarray(x, dtype=float)) for x in (I, K, omega_0))
+    n = torques.shape[1]
+    batch_size = np.broadcast(torques[:, 0], timestamps[:, 0], I, K, omega_0).shape[0]
+    torques = np.broadcast_to(torques, (batch_size, n))
+    timestamps = np.broadcast_to(timestamps, (batch_size, n))
+    I, K = np.broadcast_to(I, (batch_size,)), np.broadcast_to(K, (batch_size,))
+
+    # Advance all trajectories together; the state is kept along the
+    # first axis so that each time step operates on contiguous memory
+    omegas = np.zeros((n, batch_size))
+    omegas[0] = omega_0
+    omega = omegas[0].copy()
+    if solver == "euler":
+        dts = np.ascontiguousarray(np.diff(timestamps, axis=1).T) / simulation_steps
+        torques = np.ascontiguousarray(torques.T)
+        for i in range(1, n):
+            torque, dt = torques[i], dts[i - 1]
+            for _ in range(simulation_steps):
+                d_omega = 1 / I * (torque - K * omega**2)
+                omega += dt * d_omega
+            omegas[i] = omega
+    elif solver == "exact":
+        B, C = _a2_step_coefficients(
+            torques[:, 1:], I[:, None], K[:, None], np.diff(timestamps, axis=1)
+        )
+        B, C = np.ascontiguousarray(B.T), np.ascontiguousarray(C.T)
+        for i in range(1, n):
+            omega = (omega + B[i - 1]) / (C[i - 1] * omega + 1)
+            omegas[i] = omega
+    else:
+        raise ValueError(f'Unknown solver "{solver}"; must be "euler" or "exact".')
+    return omegas.T
+
+
 def model_c1(
     # Input
     omega_in,
@@ -999,13 +1339,96 @@ def simulator_a2_c3(
     random_state=42,
     # For the ODE solver of model a2
     simulation_steps=100,
+    solver="euler",
 ):
     load_in, load_out = np.array(load_in), np.array(load_out)
-    omega_in = model_a2(load_in, I, tau, C, omega_in_0, timestamps, simulation_steps)
-    omega_out = model_a2(load_out, I, tau, C, omega_out_0, timestamps, simulation_steps)
+    omega_in = model_a2(
+        load_in, I, tau, C, omega_in_0, timestamps, simulation_steps, solver
+    )
+    omega_out = model_a2(
+        load_out, I, tau, C, omega_out_0, timestamps, simulation_steps, solver
+    )
     P_dw = model_c3(
         omega_in, omega_out, hatch, P_amb, S_max, omega_max, Q_max, r_0, beta
     )
     rng = np.random.default_rng(random_state)
     P_dw += rng.normal(barometer_error, barometer_precision, size=len(P_dw))
     return P_dw, omega_in, omega_out
+
+
+def simulator_a2_c3_batch(
+    # Input
+    load_in,
+    load_out,
+    hatch,
+    P_amb,
+    # Parameters for model A1
+    I,
+    tau,
+    C,
+    timestamps,
+    omega_in_0,
+    omega_out_0,
+    # Parameters for model C3
+    S_max,
+    omega_max,
+    Q_max,
+    r_0,
+    beta,
+    # Sensor noise
+    barometer_error,  # The barometer offset
+    barometer_precision,  # The std. of the barometer sensor noise
+    random_state=42,
+    # For the ODE solver of model a2
+    simulation_steps=100,
+    solver="euler",
+):
+    """Batched version of simulator_a2_c3. The inputs are arrays of shape
+    [n_rows] or [n_trajectories, n_rows], and the parameters are
+    scalars or arrays of shape [n_trajectories] (see model_a2_batch)."""
+    omega_in = model_a2_batch(
+        load_in, I, tau, C, omega_in_0, timestamps, simulation_steps, solver
+    )
+    omega_out = model_a2_batch(
+        load_out, I, tau, C, omega_out_0, timestamps, simulation_steps, solver
+    )
+    # Per-trajectory parameters are broadcast along the time axis
+    def column(x):
+        return np.asarray(x, dtype=float)[..., np.newaxis]
+
+    P_dw = model_c3(
+        omega_in,
+        omega_out,
+        np.atleast_2d(hatch),
+        np.atleast_2d(P_amb),
+        column(S_max),
+        column(omega_max),
+        column(Q_max),
+        column(r_0),
+        column(beta),
+    )
+    # Trajectories may be batched only over the parameters of model
+    # C3 or the sensor noise, so outputs are broadcast to a common shape
+    shape = np.broadcast(
+        P_dw, omega_in, column(barometer_error), column(barometer_precision)
+    ).shape
+    rng = np.random.default_rng(random_state)
+    P_dw = P_dw + rng.normal(
+        column(barometer_error), column(barometer_precision), size=shape
+    )
+    omega_in = np.array(np.broadcast_to(omega_in, shape))
+    omega_out = np.array(np.broadcast_to(omega_out, shape))
+    return P_dw, omega_in, omega_out
+
+
+# ----------------------------------------------------------------------
+# Doctests
+
+if __name__ == "__main__":
+    import doctest
+
+    doctest.testmod(
+        extraglobs={},
+        verbose=True,
+        optionflags=doctest.ELLIPSIS,
+    )
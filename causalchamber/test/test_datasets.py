@@ -0,0 +1,839 @@
+# MIT License
+
+# Copyright (c) 2025 Causal Chamber GmbH
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Authors:
+#   - Juan L. Gamella [juan@causalchamber.ai]
+import hashlib
+import http.server
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+import unittest.mock
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from PIL import Image
+
+import causalchamber.datasets.main as datasets_main
+from causalchamber.datasets.main import Dataset, Experiment, ImageExperiment
+from causalchamber.ground_truth import dtypes
+import causalchamber.datasets.utils as datasets_utils
+import causalchamber.lab.utils as lab_utils
+
+
+def _write_experiment(directory, name="experiment", n=100, random_state=0):
+    """Write a small, synthetic experiment with the same kinds of columns
+    as the real datasets (floats, integers, strings and missing values)."""
+    rng = np.random.default_rng(random_state)
+    df = pd.DataFrame(
+        {
+            "timestamp": np.cumsum(rng.uniform(0.1, 0.2, size=n)),
+            "red": rng.integers(0, 256, size=n),
+            "ir_1": rng.normal(size=n),
+            "config": "standard",
+            "image_file": [f"image_{i}.jpg" for i in range(n)],
+            "flag": [None if i % 3 else "on" for i in range(n)],
+        }
+    )
+    path = Path(directory, f"{name}.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+class ExperimentTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = _write_experiment(self.directory)
+        self.experiment = Experiment("dataset", self.csv_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_columnar_copy(self):
+        """Loading from the columnar copy gives the same dataframe as
+        parsing the .csv file, for any selection of columns and rows."""
+        selections = [
+            {},
+            {"columns": ["ir_1", "red"]},
+            {"columns": ["flag"], "skiprows": 10, "nrows": 20},
+            {"skiprows": 95},
+            {"skiprows": 90, "nrows": 100},
+        ]
+        expected = [self.experiment.as_pandas_dataframe(**s) for s in selections]
+        path = self.experiment.convert()
+        self.assertTrue(path.is_dir())
+        for selection, df in zip(selections, expected):
+            pd.testing.assert_frame_equal(
+                self.experiment.as_pandas_dataframe(**selection), df
+            )
+        full = pd.read_csv(self.csv_path)
+        pd.testing.assert_frame_equal(self.experiment.as_pandas_dataframe(), full)
+
+    def test_stale_columnar_copy(self):
+        """The columnar copy is not used once the .csv file changes."""
+        self.experiment.convert()
+        _write_experiment(self.directory, n=50, random_state=1)
+        df = self.experiment.as_pandas_dataframe()
+        pd.testing.assert_frame_equal(df, pd.read_csv(self.csv_path))
+        self.experiment.convert()
+        pd.testing.assert_frame_equal(self.experiment.as_pandas_dataframe(), df)
+
+    def test_selection(self):
+        """Column and row selection from the .csv file matches selecting
+        from the full dataframe."""
+        full = pd.read_csv(self.csv_path)
+        df = self.experiment.as_pandas_dataframe(
+            columns=["ir_1", "timestamp"], skiprows=7, nrows=11
+        )
+        expected = full[["ir_1", "timestamp"]].iloc[7:18].reset_index(drop=True)
+        pd.testing.assert_frame_equal(df, expected)
+
+    def test_dtype(self):
+        """Typed loading, with and without the columnar copy."""
+        dtype = dtypes("lt", "standard", "float32")
+        for convert in [False, True]:
+            if convert:
+                self.experiment.convert()
+            df = self.experiment.as_pandas_dataframe(dtype=dtype)
+            self.assertEqual(df.red.dtype, np.float32)
+            self.assertEqual(df.ir_1.dtype, np.float32)
+            self.assertEqual(df.timestamp.dtype, np.float64)
+            df = self.experiment.as_pandas_dataframe(columns=["red"], dtype=dtype)
+            self.assertEqual(list(df.columns), ["red"])
+            self.assertEqual(df.red.dtype, np.float32)
+
+    def test_unknown_columns(self):
+        with self.assertRaises(ValueError):
+            self.experiment.as_pandas_dataframe(columns=["red", "blue"])
+
+
+def _write_image_experiment(directory, name="experiment", n=20, sizes=["64"]):
+    """Write a synthetic image experiment, with the same layout as the
+    real image datasets."""
+    directory = Path(directory, name)
+    directory.mkdir()
+    csv_path = _write_experiment(directory, name, n)
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        folder = Path(directory, f"images_{size}")
+        folder.mkdir()
+        for i in range(n):
+            pixels = rng.integers(0, 256, size=(int(size), int(size), 3))
+            image = Image.fromarray(pixels.astype(np.uint8))
+            image.save(Path(folder, f"image_{i}.jpg"))
+    return csv_path
+
+
+class ImageExperimentTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.csv_path = _write_image_experiment(self.directory)
+        self.experiment = ImageExperiment("dataset", self.csv_path)
+        folder = self.experiment.image_folders["64"]
+        self.expected = np.array(
+            [np.array(Image.open(Path(folder, f"image_{i}.jpg"))) for i in range(20)]
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_as_image_array(self):
+        for n_jobs in [1, 4, -1]:
+            images = self.experiment.as_image_array("64", n_jobs=n_jobs)
+            self.assertEqual(images.dtype, np.uint8)
+            self.assertTrue((images == self.expected).all())
+        self.assertFalse(self.experiment.image_cache_path("64").exists())
+        with self.assertRaises(ValueError):
+            self.experiment.as_image_array("full")
+
+    def test_image_cache(self):
+        images = self.experiment.as_image_array("64", cache=True)
+        self.assertTrue(self.experiment.image_cache_path("64").exists())
+        self.assertTrue((images == self.expected).all())
+        images = self.experiment.as_image_array("64", mmap=True)
+        self.assertIsInstance(images, np.memmap)
+        self.assertFalse(images.flags.writeable)
+        self.assertTrue((images == self.expected).all())
+
+    def test_image_files(self):
+        files = [f"image_{i}.jpg" for i in range(20)]
+        self.assertEqual(self.experiment.image_files, files)
+        # Other instances read the image filenames from the index
+        experiment = ImageExperiment("dataset", self.csv_path)
+        with unittest.mock.patch.object(datasets_main.pd, "read_csv") as read_csv:
+            self.assertEqual(experiment.image_files, files)
+            self.assertTrue((experiment.get_images(3, "64") == self.expected[3]).all())
+            read_csv.assert_not_called()
+        # Loading the dataframe also loads the filenames
+        experiment = ImageExperiment("dataset", self.csv_path)
+        experiment.as_pandas_dataframe()
+        self.assertEqual(experiment._image_filenames, files)
+
+    def test_index_access(self):
+        for cache in [False, True]:
+            if cache:
+                self.experiment.as_image_array("64", cache=True)
+            images = self.experiment.images("64")
+            self.assertEqual(len(images), 20)
+            self.assertTrue((images[3] == self.expected[3]).all())
+            self.assertTrue((images[-1] == self.expected[-1]).all())
+            self.assertTrue((images[2:10:3] == self.expected[2:10:3]).all())
+            indices = [7, 1, 1, 19]
+            batch = self.experiment.get_images(indices, "64", n_jobs=2)
+            self.assertEqual(batch.shape, (4, 64, 64, 3))
+            self.assertTrue((batch == self.expected[indices]).all())
+            empty = self.experiment.get_images([], "64")
+            self.assertEqual(empty.shape, (0, 64, 64, 3))
+            self.assertEqual(empty.dtype, self.expected.dtype)
+            self.assertEqual(images[5:5].shape, (0, 64, 64, 3))
+            iterated = list(self.experiment.image_iterator("64"))
+            self.assertTrue((np.array(iterated) == self.expected).all())
+            with self.assertRaises(IndexError):
+                images[20]
+
+    def test_indices(self):
+        images = self.experiment.images("64")
+        mask = np.arange(20) % 3 == 0
+        for indices in [-20, slice(-3, None), slice(15, 2, -4), [-1, 0], mask]:
+            self.assertTrue((images[indices] == self.expected[indices]).all())
+        for indices in [-21, [0, 20], mask[:10], [0.5]]:
+            with self.assertRaises(IndexError):
+                images[indices]
+
+    def test_iteration_cost(self):
+        """Iterating over the images of an experiment builds each image
+        path once, i.e., the cost grows linearly with the number of
+        images, not quadratically."""
+        csv_path = _write_image_experiment(self.directory, "large", 500, ["8"])
+        experiment = ImageExperiment("dataset", csv_path)
+        built = []
+        image_paths = ImageExperiment._image_paths
+
+        def spy(self, *args, **kwargs):
+            paths = image_paths(self, *args, **kwargs)
+            built.extend(paths)
+            return paths
+
+        with unittest.mock.patch.object(ImageExperiment, "_image_paths", spy):
+            images = experiment.images("8")
+            self.assertEqual(len(images), 500)
+            self.assertEqual(sum(1 for _ in images), 500)
+            images[[3, 7, 499]]
+        self.assertEqual(len(built), 503)
+
+
+class _RangeHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the files in server.directory, supporting HTTP Range
+    requests (if server.ranges is True). If server.fail_after is set,
+    the next response is cut after that many bytes, as over a flaky
+    connection."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(body=False)
+
+    def do_GET(self):
+        self._serve(body=True)
+
+    def _serve(self, body):
+        content = Path(self.server.directory, self.path.lstrip("/")).read_bytes()
+        size = len(content)
+        start, stop = 0, size
+        header = self.headers.get("Range")
+        self.server.received.append((self.command, header))
+        if header is not None and self.server.ranges:
+            first, last = header.split("=")[1].split("-")
+            start, stop = int(first), int(last) + 1 if last else size
+            if start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{stop - 1}/{size}")
+        else:
+            self.send_response(200)
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(stop - start))
+        self.end_headers()
+        if body:
+            data = content[start:stop]
+            if self.server.fail_after is not None:
+                data = data[: self.server.fail_after]
+                self.server.fail_after = None
+                self.close_connection = True
+            self.wfile.write(data)
+
+
+def _serve(directory):
+    """Serve the files in directory from a local HTTP server."""
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    server.directory = directory
+    server.ranges = True
+    server.fail_after = None
+    server.received = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class DownloadTests(unittest.TestCase):
+    """Download and extract a dataset from a local HTTP server."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.served = Path(self.directory, "served")
+        self.served.mkdir()
+        self.root = Path(self.directory, "root")
+        self.root.mkdir()
+        # A zip with an experiment, and random (incompressible) contents
+        rng = np.random.default_rng(0)
+        self.zip_path = Path(self.served, "dataset.zip")
+        with zipfile.ZipFile(self.zip_path, "w") as f:
+            f.writestr("dataset/experiment.csv", "a,b\n1,2\n")
+            f.writestr("dataset/noise.bin", rng.bytes(3 * 1024 * 1024 + 17))
+        self.content = self.zip_path.read_bytes()
+        self.server = _serve(self.served)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/dataset.zip"
+        # Path where download_and_extract stores the downloaded file
+        url_hash = hashlib.md5(self.url.encode()).hexdigest()
+        self.download_path = Path(self.root, f"causal_chamber_{url_hash}.zip")
+        self.retry_delays = datasets_utils.RETRY_DELAY, lab_utils.RETRY_DELAY
+        datasets_utils.RETRY_DELAY, lab_utils.RETRY_DELAY = 0, 0
+
+    def tearDown(self):
+        datasets_utils.RETRY_DELAY, lab_utils.RETRY_DELAY = self.retry_delays
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def _download(self, utils, algorithm="md5", **kwargs):
+        checksum = hashlib.new(algorithm, self.content).hexdigest()
+        utils.download_and_extract(
+            self.url, self.root, checksum, algorithm=algorithm, verbose=False, **kwargs
+        )
+        extracted = Path(self.root, "dataset", "experiment.csv")
+        self.assertEqual(extracted.read_text(), "a,b\n1,2\n")
+        self.assertEqual(self.download_path.read_bytes(), self.content)
+
+    def test_checksum(self):
+        for utils in [datasets_utils, lab_utils]:
+            for algorithm in ["md5", "sha256"]:
+                for block_size in [None, 1000]:
+                    # The second time, the complete file is not downloaded again
+                    self._download(utils, algorithm, block_size=block_size)
+                checksum = hashlib.new(algorithm, self.content).hexdigest()
+                computed = utils._compute_checksum(self.zip_path, algorithm, 1000)
+                self.assertEqual(computed, checksum)
+            with self.assertRaises(Exception):
+                utils.download_and_extract(self.url, self.root, "0", verbose=False)
+            self.assertFalse(self.download_path.exists())
+
+    def test_resume(self):
+        for utils in [datasets_utils, lab_utils]:
+            for ranges in [True, False]:
+                self.server.ranges = ranges
+                self.server.received = []
+                self.download_path.write_bytes(self.content[:1000000])
+                self._download(utils)
+                self.assertEqual(self.server.received, [("GET", "bytes=1000000-")])
+                self.download_path.unlink()
+
+    def test_interrupted(self):
+        for utils in [datasets_utils, lab_utils]:
+            for n_connections in [1, 3]:
+                self.server.received = []
+                self.server.fail_after = 100000
+                self._download(utils, n_connections=n_connections, block_size=10000)
+                # One more request, to resume the interrupted one
+                gets = [r for r in self.server.received if r[0] == "GET"]
+                self.assertEqual(len(gets), n_connections + 1)
+                self.download_path.unlink()
+
+    def test_parallel(self):
+        for utils in [datasets_utils, lab_utils]:
+            for ranges in [True, False]:
+                self.server.ranges = ranges
+                self.server.received = []
+                self._download(utils, "sha256", n_connections=4)
+                gets = [r for r in self.server.received if r[0] == "GET"]
+                self.assertEqual(len(gets), 4 if ranges else 1)
+                self.download_path.unlink()
+
+
+class _DirectoryHandler(http.server.BaseHTTPRequestHandler):
+    """Serves server.content with server.etag, answering conditional
+    requests with 304 (Not Modified), or with server.status if set.
+    Records the If-None-Match header of each request."""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        etag = self.headers.get("If-None-Match")
+        self.server.received.append(etag)
+        if self.server.status is not None:
+            self.send_response(self.server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif etag == self.server.etag:
+            self.send_response(304)
+            self.send_header("ETag", self.server.etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("ETag", self.server.etag)
+            self.send_header("Content-Length", str(len(self.server.content)))
+            self.end_headers()
+            self.wfile.write(self.server.content)
+
+
+class DirectoryTests(unittest.TestCase):
+    """Fetch, cache and revalidate the directory of datasets from a
+    local HTTP server."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), _DirectoryHandler
+        )
+        self._publish("v1")
+        self.server.status = None
+        self.server.received = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{self.server.server_port}/directory.yaml"
+        self.url = unittest.mock.patch.object(datasets_main, "DIRECTORY_URL", url)
+        self.url.start()
+        self.env = unittest.mock.patch.dict(
+            os.environ,
+            {"CAUSALCHAMBER_CACHE_DIR": self.directory, "CAUSALCHAMBER_OFFLINE": "0"},
+        )
+        self.env.start()
+        datasets_main._directory = None
+
+    def tearDown(self):
+        self.env.stop()
+        self.url.stop()
+        datasets_main._directory = None
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def _publish(self, version):
+        directory = {"last_updated": version, "datasets": {}}
+        self.server.content = yaml.safe_dump(directory).encode()
+        self.server.etag = f'"{version}"'
+
+    def _load(self, ttl=3600, **kwargs):
+        """Load the directory as a new process would, i.e., without the
+        copy held in memory."""
+        datasets_main._directory = None
+        with unittest.mock.patch.dict(
+            os.environ, {"CAUSALCHAMBER_DIRECTORY_TTL": str(ttl)}
+        ):
+            return datasets_main.load_directory(verbose=False, **kwargs)
+
+    def test_ttl(self):
+        self.assertEqual(self._load()["last_updated"], "v1")
+        self.assertEqual(self.server.received, [None])
+        # Within the TTL, the cached copy is used without any request
+        self._publish("v2")
+        for _ in range(3):
+            self.assertEqual(self._load()["last_updated"], "v1")
+        self.assertEqual(len(self.server.received), 1)
+        # Unless a refresh is requested
+        self.assertEqual(self._load(refresh=True)["last_updated"], "v2")
+        self.assertEqual(self.server.received, [None, '"v1"'])
+
+    def test_revalidation(self):
+        self._load()
+        # After the TTL, the cached copy is revalidated with its ETag
+        self.assertEqual(self._load(ttl=0)["last_updated"], "v1")
+        self.assertEqual(self.server.received, [None, '"v1"'])
+        # The revalidation resets the TTL
+        self._load()
+        self.assertEqual(len(self.server.received), 2)
+        # A new version is downloaded, and its ETag stored
+        self._publish("v2")
+        self.assertEqual(self._load(ttl=0)["last_updated"], "v2")
+        self.assertEqual(self._load(ttl=0)["last_updated"], "v2")
+        self.assertEqual(self.server.received, [None, '"v1"', '"v1"', '"v2"'])
+        metadata_path = Path(self.directory, "directory.meta.yaml")
+        self.assertEqual(yaml.safe_load(metadata_path.read_text())["etag"], '"v2"')
+
+    def test_fallback(self):
+        # Without a cached copy, failures are raised
+        self.server.status = 500
+        with self.assertRaises(ConnectionError):
+            self._load()
+        with self.assertRaises(FileNotFoundError):
+            self._load(offline=True)
+        self.server.status = None
+        self._load()
+        # With one, a failing server falls back to the cached copy
+        self._publish("v2")
+        self.server.status = 500
+        self.assertEqual(self._load(ttl=0)["last_updated"], "v1")
+        self.assertEqual(len(self.server.received), 3)
+        # As does an unreachable server, or offline mode
+        self.server.shutdown()
+        self.server.server_close()
+        self.assertEqual(self._load(ttl=0)["last_updated"], "v1")
+        self.assertEqual(self._load(ttl=0, offline=True)["last_updated"], "v1")
+        self.assertEqual(len(self.server.received), 3)
+
+
+class DatasetTests(unittest.TestCase):
+    """Download an image dataset from a local HTTP server, extracting
+    only some experiments and image sizes."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Build and serve the archive of a dataset with two experiments
+        staging = Path(self.directory, "staging", "dataset")
+        staging.mkdir(parents=True)
+        for name in ["exp_a", "exp_b"]:
+            _write_image_experiment(staging, name, n=5, sizes=["32", "64"])
+        served = Path(self.directory, "served")
+        served.mkdir()
+        with zipfile.ZipFile(Path(served, "dataset.zip"), "w") as f:
+            for path in sorted(staging.rglob("*")):
+                f.write(path, path.relative_to(staging.parent))
+        self.server = _serve(served)
+        url = f"http://127.0.0.1:{self.server.server_port}/dataset.zip"
+        checksum = hashlib.md5(Path(served, "dataset.zip").read_bytes()).hexdigest()
+        # Use a (cached) directory listing the served dataset
+        cache = Path(self.directory, "cache")
+        cache.mkdir()
+        entry = {"url": url, "md5": checksum, "image": True, "chamber": "lt"}
+        directory = {"last_updated": "today", "datasets": {"dataset": entry}}
+        Path(cache, "directory.yaml").write_text(yaml.safe_dump(directory))
+        env = {"CAUSALCHAMBER_CACHE_DIR": str(cache), "CAUSALCHAMBER_OFFLINE": "1"}
+        self.env = unittest.mock.patch.dict(os.environ, env)
+        self.env.start()
+        datasets_main._directory = None
+        self.root = Path(self.directory, "root")
+        self.root.mkdir()
+        self.staging = staging
+
+    def tearDown(self):
+        self.env.stop()
+        datasets_main._directory = None
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def test_selective_extraction(self):
+        dataset = Dataset(
+            "dataset", self.root, experiments=["exp_b"], image_sizes=["32"], n_jobs=2
+        )
+        self.assertEqual(dataset.available_experiments(), ["exp_b"])
+        self.assertFalse(Path(self.root, "dataset", "exp_a").exists())
+        self.assertFalse(Path(self.root, "dataset", "exp_b", "images_64").exists())
+        experiment = dataset.get_experiment("exp_b")
+        self.assertEqual(sorted(experiment.available_sizes()), ["32", "64"])
+        # Images of size 64 are read from the archive
+        for size in ["32", "64"]:
+            folder = Path(self.staging, "exp_b", f"images_{size}")
+            expected = np.array(
+                [np.array(Image.open(Path(folder, f"image_{i}.jpg"))) for i in range(5)]
+            )
+            images = experiment.as_image_array(size, n_jobs=2)
+            self.assertTrue((images == expected).all())
+            batch = experiment.get_images([4, 0], size)
+            self.assertTrue((batch == expected[[4, 0]]).all())
+        # Closing the dataset closes the archive
+        dataset.close()
+        self.assertIsNone(dataset._archive._zipfile)
+        # Extract the rest from the downloaded archive
+        dataset = Dataset("dataset", self.root)
+        self.assertEqual(dataset.available_experiments(), ["exp_b"])
+        dataset = Dataset("dataset", self.root, experiments=["exp_a", "exp_b"])
+        self.assertEqual(sorted(dataset.available_experiments()), ["exp_a", "exp_b"])
+        self.assertTrue(Path(self.root, "dataset", "exp_b", "images_64").is_dir())
+        gets = [r for r in self.server.received if r[0] == "GET"]
+        self.assertEqual(len(gets), 1)
+
+    def test_shared_cache(self):
+        with Dataset("dataset", image_sizes=["32"]) as dataset:
+            cache = Path(self.directory, "cache", "datasets")
+            self.assertEqual(dataset.root.parent, cache)
+            names = sorted(dataset.available_experiments())
+            self.assertEqual(names, ["exp_a", "exp_b"])
+            images = dataset.get_experiment("exp_a").as_image_array("64")
+            self.assertEqual(images.shape, (5, 64, 64, 3))
+        # The second time, the dataset is not downloaded again
+        Dataset("dataset", download=False).close()
+        gets = [r for r in self.server.received if r[0] == "GET"]
+        self.assertEqual(len(gets), 1)
+        # Closed datasets do not keep their entry from being evicted
+        cache = datasets_utils.SharedCache(max_size=0)
+        self.assertEqual(cache.evict(), [dataset.checksum])
+
+    def test_partial_cache_entry(self):
+        with Dataset("dataset", experiments=["exp_a"], image_sizes=["32"]) as dataset:
+            self.assertEqual(dataset.available_experiments(), ["exp_a"])
+        # A dataset without selection completes the partial entry
+        with Dataset("dataset") as dataset:
+            names = sorted(dataset.available_experiments())
+            self.assertEqual(names, ["exp_a", "exp_b"])
+            experiment = dataset.get_experiment("exp_b")
+            self.assertEqual(experiment.image_folders.keys(), {"32", "64"})
+            self.assertEqual(experiment.as_image_array("64").shape, (5, 64, 64, 3))
+        marker = datasets_utils.SharedCache().entries()[dataset.checksum]
+        self.assertFalse(marker["partial"])
+        gets = [r for r in self.server.received if r[0] == "GET"]
+        self.assertEqual(len(gets), 1)
+
+    def test_manifest(self):
+        dataset = Dataset("dataset", self.root, image_sizes=["32"])
+        self.assertTrue(dataset.manifest_path.is_file())
+        # Opening the dataset again only reads the manifest
+        with unittest.mock.patch.object(datasets_main.pd, "read_csv") as read_csv:
+            dataset = Dataset("dataset", self.root)
+            names = sorted(dataset.available_experiments())
+            self.assertEqual(names, ["exp_a", "exp_b"])
+            experiment = dataset.get_experiment("exp_a")
+            self.assertEqual(experiment.n_rows, 5)
+            self.assertEqual(experiment.image_folders.keys(), {"32"})
+            self.assertEqual(experiment.columns[:3], ["timestamp", "red", "ir_1"])
+            read_csv.assert_not_called()
+        self.assertIs(dataset.get_experiment("exp_a"), experiment)
+        # Extracting more files updates the manifest
+        dataset = Dataset("dataset", self.root, image_sizes=["32", "64"])
+        experiment = dataset.get_experiment("exp_b")
+        self.assertEqual(experiment.image_folders.keys(), {"32", "64"})
+        self.assertEqual(len(experiment.as_pandas_dataframe()), experiment.n_rows)
+        dataset = Dataset("dataset", self.root)
+        experiment = dataset.get_experiment("exp_b")
+        self.assertEqual(experiment.image_folders.keys(), {"32", "64"})
+
+    def test_manifest_scans(self):
+        Dataset("dataset", self.root, experiments=["exp_a"], image_sizes=["32"])
+        read_csv = unittest.mock.patch.object(
+            datasets_main.pd, "read_csv", wraps=datasets_main.pd.read_csv
+        )
+        count_rows = unittest.mock.patch.object(
+            datasets_main, "_count_rows", wraps=datasets_main._count_rows
+        )
+        with read_csv as read_csv, count_rows as count_rows:
+            # Selecting files which were already extracted reads no .csv file
+            Dataset("dataset", self.root, experiments=["exp_a"], image_sizes=["32"])
+            read_csv.assert_not_called()
+            # Extracting more files only reads the headers of the .csv files
+            dataset = Dataset("dataset", self.root, image_sizes=["32"])
+            self.assertEqual(dataset.available_experiments(), ["exp_a", "exp_b"])
+            self.assertEqual(read_csv.call_count, 2)
+            for call in read_csv.call_args_list:
+                self.assertEqual(call.kwargs, {"nrows": 0})
+            # The rows are only counted when requested
+            count_rows.assert_not_called()
+            self.assertEqual(dataset.get_experiment("exp_b").n_rows, 5)
+            count_rows.assert_called_once()
+            # Changing an experiment only scans it again
+            csv_path = Path(self.root, "dataset", "exp_a", "exp_a.csv")
+            df = pd.read_csv(csv_path)
+            df["extra"] = 1
+            df.to_csv(csv_path, index=False)
+            stat = os.stat(csv_path)
+            os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            read_csv.reset_mock()
+            dataset = Dataset("dataset", self.root)
+            self.assertEqual(dataset.get_experiment("exp_a").columns[-1], "extra")
+            self.assertEqual(read_csv.call_count, 1)
+            self.assertEqual(read_csv.call_args.args[0], csv_path)
+
+
+def _acquire(cache_path, key, url):
+    """Acquire (and release) an entry of a shared cache, in a subprocess."""
+    lease = datasets_utils.SharedCache(cache_path).acquire(key, url, verbose=False)
+    lease.release()
+
+
+def _evict(cache_path, barrier, evicted):
+    """Evict all entries of a shared cache, at the same time as other
+    processes waiting on barrier."""
+    cache = datasets_utils.SharedCache(cache_path, max_size=0)
+    barrier.wait()
+    evicted.put(cache.evict())
+
+
+def _use_read_only(cache_path, name, key, url):
+    """Use a complete entry of a cache without write access to it, in a
+    subprocess; as root ignores file permissions, it runs as nobody."""
+    if os.geteuid() == 0:
+        os.setgid(65534)
+        os.setuid(65534)
+    cache = datasets_utils.SharedCache(cache_path, max_size=0)
+    with cache.acquire(key, url, download=False, verbose=False) as lease:
+        csv_path = Path(lease.path, name, "experiment.csv")
+        assert csv_path.read_text() == "a,b\n1,2\n"
+    # Entries cannot be evicted
+    assert cache.evict() == []
+
+
+@unittest.skipIf(datasets_utils.fcntl is None, "file locking is not available")
+class SharedCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        served = Path(self.directory, "served")
+        served.mkdir()
+        self.server = _serve(served)
+        # Two archives with a dataset each, and random (incompressible) contents
+        rng = np.random.default_rng(0)
+        self.entries = []
+        for name in ["dataset_a", "dataset_b"]:
+            path = Path(served, f"{name}.zip")
+            with zipfile.ZipFile(path, "w") as f:
+                f.writestr(f"{name}/experiment.csv", "a,b\n1,2\n")
+                f.writestr(f"{name}/noise.bin", rng.bytes(100000))
+            key = hashlib.md5(path.read_bytes()).hexdigest()
+            url = f"http://127.0.0.1:{self.server.server_port}/{name}.zip"
+            self.entries.append((name, key, url))
+        self.cache_path = Path(self.directory, "cache")
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def test_acquire(self):
+        cache = datasets_utils.SharedCache(self.cache_path)
+        name, key, url = self.entries[0]
+        with self.assertRaises(FileNotFoundError):
+            cache.acquire(key, url, download=False, verbose=False)
+        # Concurrent processes download the entry only once
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_acquire, args=(self.cache_path, key, url))
+            for _ in range(4)
+        ]
+        for p in processes:
+            p.start()
+        for p in processes:
+            p.join()
+            self.assertEqual(p.exitcode, 0)
+        gets = [r for r in self.server.received if r[0] == "GET"]
+        self.assertEqual(len(gets), 1)
+        lease = cache.acquire(key, url, download=False, verbose=False)
+        csv_path = Path(lease.path, name, "experiment.csv")
+        self.assertEqual(csv_path.read_text(), "a,b\n1,2\n")
+        self.assertEqual(list(cache.entries()), [key])
+        self.assertEqual(cache.entries()[key]["checksum"], key)
+        self.assertGreater(cache.size(), 200000)
+        lease.release()
+
+    def test_eviction(self):
+        (_, key_a, url_a), (_, key_b, url_b) = self.entries
+        cache = datasets_utils.SharedCache(self.cache_path, max_size=300000)
+        lease_a = cache.acquire(key_a, url_a, verbose=False)
+        # Entries in use are not evicted
+        lease_b = cache.acquire(key_b, url_b, verbose=False)
+        self.assertEqual(sorted(cache.entries()), sorted([key_a, key_b]))
+        lease_a.release()
+        lease_b.release()
+        self.assertEqual(cache.evict(), [key_a])
+        self.assertEqual(list(cache.entries()), [key_b])
+        self.assertFalse(Path(self.cache_path, key_a).exists())
+        # Without a maximum size, nothing is evicted
+        cache = datasets_utils.SharedCache(self.cache_path)
+        cache.acquire(key_a, url_a, verbose=False).release()
+        self.assertEqual(cache.evict(), [])
+        self.assertEqual(len(cache.entries()), 2)
+
+    def test_concurrent_eviction(self):
+        (_, key, url), _ = self.entries
+        cache = datasets_utils.SharedCache(self.cache_path)
+        cache.acquire(key, url, verbose=False).release()
+        context = multiprocessing.get_context("fork")
+        for _ in range(5):
+            keys = [f"{key}-{i}" for i in range(8)]
+            for k in keys:
+                shutil.copytree(Path(self.cache_path, key), Path(self.cache_path, k))
+            # Each entry is evicted by exactly one of the processes
+            barrier, evicted = context.Barrier(4), context.Queue()
+            processes = [
+                context.Process(target=_evict, args=(self.cache_path, barrier, evicted))
+                for _ in range(4)
+            ]
+            for p in processes:
+                p.start()
+            results = [evicted.get(timeout=60) for _ in processes]
+            for p in processes:
+                p.join()
+                self.assertEqual(p.exitcode, 0)
+            self.assertEqual(sorted(sum(results, [])), sorted(keys + [key]))
+            self.assertEqual(cache.entries(), {})
+            self.assertEqual(list(self.cache_path.glob(".*.trash*")), [])
+            cache.acquire(key, url, verbose=False).release()
+
+    def test_eviction_leftovers(self):
+        (_, key_a, url_a), (_, key_b, url_b) = self.entries
+        cache = datasets_utils.SharedCache(self.cache_path, max_size=0)
+        cache.acquire(key_a, url_a, verbose=False).release()
+        # The trash of a crashed eviction, and an entry being staged
+        trash = Path(self.cache_path, f".{key_a}.trash")
+        shutil.copytree(Path(self.cache_path, key_a), trash)
+        staging = Path(self.cache_path, f".{key_b}.partial")
+        shutil.copytree(Path(self.cache_path, key_a), staging)
+        self.assertEqual(list(cache.entries()), [key_a])
+        self.assertEqual(cache.evict(), [key_a])
+        self.assertFalse(trash.exists())
+        self.assertTrue(staging.exists())
+        # Failing evictions do not prevent acquiring an entry
+        with unittest.mock.patch.object(
+            datasets_utils.SharedCache, "evict", side_effect=OSError
+        ):
+            lease = cache.acquire(key_a, url_a, verbose=False)
+        self.assertEqual(cache.evict(), [])
+        lease.release()
+        self.assertEqual(cache.evict(), [key_a])
+
+    def test_read_only(self):
+        (name, key, url), _ = self.entries
+        cache = datasets_utils.SharedCache(self.cache_path)
+        cache.acquire(key, url, verbose=False).release()
+        # A cache shared read-only by another user
+        os.chmod(self.directory, 0o755)
+        paths = list(self.cache_path.glob(f"{key}*lock")) + [self.cache_path]
+        for path in paths:
+            path.chmod(0o555 if path.is_dir() else 0o444)
+        try:
+            context = multiprocessing.get_context("fork")
+            process = context.Process(
+                target=_use_read_only, args=(self.cache_path, name, key, url)
+            )
+            process.start()
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        finally:
+            for path in paths:
+                path.chmod(0o755 if path.is_dir() else 0o644)
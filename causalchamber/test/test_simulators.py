@@ -0,0 +1,404 @@
+# MIT License
+
+# Copyright (c) 2025 Causal Chamber GmbH
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+# Authors:
+#   - Juan L. Gamella [juan@causalchamber.ai]
+
+import importlib.util
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import causalchamber.simulators.wt as wt
+from causalchamber.simulators.wt.main import model_a2
+
+# Parameters for model A2, as in the tutorial for models A and B
+C_MIN = 0.166
+C_MAX = 0.27
+L_MIN = 0.1
+OMEGA_MAX = 3000
+I = 3.481e-05
+T = 0.05
+K = 5.268701549401565e-08
+
+
+def tau(load, C_min=C_MIN, C_max=C_MAX, L_min=L_MIN, T=T):
+    load = np.atleast_1d(load)
+    torques = T * (C_min + np.maximum(L_min, load) ** 3 * (C_max - C_min) - C_min)
+    torques[load == 0] = 0
+    return torques if len(load) > 1 else torques[0]
+
+
+def _model_a2_reference(loads, I, tau, K, omega_0, timestamps, simulation_steps):
+    """The original implementation of model A2"""
+    torques = tau(loads)
+    omegas = np.zeros_like(loads, dtype=float)
+    omegas[0] = omega_0
+    for i in range(1, len(loads)):
+        timestep = timestamps[i] - timestamps[i - 1]
+        torque = torques[i]
+        omega = omegas[i - 1]
+        dt = timestep / simulation_steps
+        for _ in range(simulation_steps):
+            d_omega = 1 / I * (torque - K * omega**2)
+            omega += dt * d_omega
+        omegas[i] = omega
+    return omegas
+
+
+def _wt_inputs(n=500, random_state=42):
+    rng = np.random.default_rng(random_state)
+    loads_in = np.repeat(rng.uniform(0, 1, n // 10), 10)
+    loads_in[rng.uniform(size=n) < 0.05] = 0
+    return pd.DataFrame(
+        {
+            "load": loads_in,
+            "load_in": loads_in,
+            "load_out": rng.permutation(loads_in),
+            "hatch": rng.uniform(0, 45, n),
+            "pressure_ambient": 96000.0,
+            "timestamp": np.cumsum(rng.uniform(0.05, 0.15, n)),
+        }
+    )
+
+
+class ModelA2Tests(unittest.TestCase):
+    def test_euler_matches_reference(self):
+        df = _wt_inputs()
+        omega_0 = L_MIN * OMEGA_MAX * np.pi / 30
+        args = (df.load.values, I, tau, K, omega_0, df.timestamp.values, 100)
+        expected = _model_a2_reference(*args)
+        self.assertTrue(np.array_equal(expected, model_a2(*args)))
+
+    def test_exact_solver(self):
+        df = _wt_inputs()
+        omega_0 = L_MIN * OMEGA_MAX * np.pi / 30
+        args = (df.load.values, I, tau, K, omega_0, df.timestamp.values)
+        fine = model_a2(*args, simulation_steps=5000)
+        exact = model_a2(*args, simulation_steps=None, solver="exact")
+        np.testing.assert_allclose(exact, fine, rtol=1e-5)
+
+    def test_exact_solver_edge_cases(self):
+        timestamps = np.arange(4.0)
+        # No drag: linear acceleration
+        omegas = model_a2(np.ones(4), 2.0, lambda l: l, 0, 0, timestamps, 1, "exact")
+        np.testing.assert_allclose(omegas, [0, 0.5, 1, 1.5])
+        # No torque: omega' = omega / (1 + K dt omega / I)
+        omegas = model_a2(
+            np.zeros(4), 1.0, lambda l: l, 1.0, 1.0, timestamps, 1, "exact"
+        )
+        np.testing.assert_allclose(omegas, [1, 1 / 2, 1 / 3, 1 / 4])
+
+    def test_unknown_solver(self):
+        with self.assertRaises(ValueError):
+            wt.ModelA2(I, tau, K, 300, solver="rk4").simulate_from_inputs(_wt_inputs())
+
+    def test_simulators_solver(self):
+        df = _wt_inputs()
+        parameters = dict(I=I, tau=tau, K=K, omega_0=L_MIN * OMEGA_MAX)
+        euler = wt.ModelA2(**parameters, simulation_steps=2000)
+        exact = wt.ModelA2(**parameters, solver="exact")
+        np.testing.assert_allclose(
+            exact.simulate_from_inputs(df), euler.simulate_from_inputs(df), rtol=1e-4
+        )
+
+
+class BatchTests(unittest.TestCase):
+    def test_model_a2_batch(self):
+        df = _wt_inputs(200)
+        Ks = K * np.array([0.5, 1, 2])
+        omega_0s = np.array([0, 300, 600])
+        for solver in ["euler", "exact"]:
+            sim = wt.ModelA2(I, tau, K, 0, simulation_steps=10, solver=solver)
+            batch = sim.simulate_batch(df, K=Ks, omega_0=omega_0s)
+            self.assertEqual(batch.shape, (3, len(df)))
+            for k, omega_0, rpms in zip(Ks, omega_0s, batch):
+                single = wt.ModelA2(I, tau, k, omega_0, 10, solver)
+                self.assertTrue(np.array_equal(rpms, single.simulate_from_inputs(df)))
+
+    def test_model_a2_batch_frames(self):
+        frames = [_wt_inputs(100, random_state=i) for i in range(3)]
+        taus = [tau, lambda l: tau(l, T=0.04), lambda l: tau(l, T=0.06)]
+        sim = wt.ModelA2(I, tau, K, 300, solver="exact")
+        batch = sim.simulate_batch(frames, tau=taus)
+        for df, t, rpms in zip(frames, taus, batch):
+            single = wt.ModelA2(I, t, K, 300, solver="exact")
+            self.assertTrue(np.array_equal(rpms, single.simulate_from_inputs(df)))
+        with self.assertRaises(ValueError):
+            sim.simulate_batch([_wt_inputs(100), _wt_inputs(110)])
+        # One torque function per frame
+        with self.assertRaises(ValueError):
+            sim.simulate_batch(frames, tau=taus[:2])
+        with self.assertRaises(ValueError):
+            sim.simulate_batch(frames, K=[K, K])
+        with self.assertRaises(TypeError):
+            sim.simulate_batch(frames, L_min=0.1)
+
+    def test_sim_a2_c3_batch(self):
+        df = _wt_inputs(100)
+        parameters = dict(I=I, tau=tau, K=K, omega_in_0=300, omega_out_0=300)
+        parameters.update(S_max=300, omega_max=3000, Q_max=0.1, r_0=0.5, beta=0.1)
+        parameters.update(barometer_error=0, barometer_precision=1, solver="exact")
+        sim = wt.SimA2C3(**parameters)
+        batch = sim.simulate_batch(df, r_0=[0.5, 0.6])
+        single = sim.simulate_from_inputs(df)
+        for b, s in zip(batch, single):
+            self.assertEqual(b.shape, (2, len(df)))
+            np.testing.assert_allclose(b[0], s)
+
+
+class ModelFTests(unittest.TestCase):
+    def test_hexagon_mask_cache(self):
+        from causalchamber.simulators.lt.image import models_f
+
+        geometry = (0.5, 0.5, 0.22, 0.1, 64)
+        mask = models_f.hexagon_mask(*geometry)
+        self.assertFalse(mask.flags.writeable)
+        self.assertIs(mask, models_f.hexagon_mask(*geometry))
+        # The cache only holds a bounded number of masks
+        for size in range(65, 65 + models_f._cached_hexagon_mask.cache_info().maxsize):
+            models_f.hexagon_mask(*geometry[:4], size)
+        self.assertIsNot(mask, models_f.hexagon_mask(*geometry))
+        self.assertTrue(np.array_equal(mask, models_f.hexagon_mask(*geometry)))
+
+    def test_dtype_and_out(self):
+        df = _lt_inputs(20)
+        for sim in _models_f(image_size=32):
+            images = sim.simulate_from_inputs(df)
+            self.assertEqual(images.dtype, np.float64)
+            self.assertTrue(((images >= 0) & (images <= 1)).all())
+            images_32 = sim.simulate_from_inputs(df, dtype=np.float32)
+            self.assertEqual(images_32.dtype, np.float32)
+            np.testing.assert_allclose(images_32, images, atol=1e-6)
+            images_8 = sim.simulate_from_inputs(df, dtype=np.uint8)
+            self.assertTrue(np.array_equal(images_8, np.rint(images * 255)))
+            out = np.ones((20, 32, 32, 3), dtype=np.float32)
+            self.assertIs(sim.simulate_from_inputs(df, out=out), out)
+            self.assertTrue(np.array_equal(out, images_32))
+            with self.assertRaises(ValueError):
+                sim.simulate_from_inputs(df, out=np.empty((20, 32, 32)))
+
+    def test_chunked_simulation(self):
+        df = _lt_inputs(25)
+        with tempfile.TemporaryDirectory() as root:
+            for sim in _models_f(image_size=16):
+                images = sim.simulate_from_inputs(df, dtype=np.uint8)
+                chunks = list(sim.iter_simulate(df, chunk_size=10, dtype=np.uint8))
+                self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+                self.assertTrue(np.array_equal(np.concatenate(chunks), images))
+                path = sim.simulate_to_file(df, Path(root, "images.npy"), 7, np.uint8)
+                self.assertTrue(np.array_equal(np.load(path), images))
+                paths = sim.simulate_to_file(
+                    df, Path(root, "images.npy"), 7, np.uint8, sharded=True
+                )
+                self.assertEqual(len(paths), 4)
+                shards = np.concatenate([np.load(p) for p in paths])
+                self.assertTrue(np.array_equal(shards, images))
+
+    def test_parallel_rendering(self):
+        df = _lt_inputs(25)
+        with tempfile.TemporaryDirectory() as root:
+            for sim in _models_f(image_size=16):
+                images = sim.simulate_from_inputs(df)
+                sim.n_jobs = 3
+                self.assertTrue(np.array_equal(sim.simulate_from_inputs(df), images))
+                chunks = list(sim.iter_simulate(df, chunk_size=4, n_jobs=-1))
+                self.assertTrue(np.array_equal(np.concatenate(chunks), images))
+                path = sim.simulate_to_file(df, Path(root, "images.npy"), chunk_size=4)
+                self.assertTrue(np.array_equal(np.load(path), images))
+
+
+class OutputTests(unittest.TestCase):
+    def _check(self, sim, df):
+        n_outputs = len(sim.outputs_names)
+        expected = sim.simulate_from_inputs(df)
+        expected = (expected,) if n_outputs == 1 else expected
+        outputs_32 = sim.simulate_from_inputs(df, dtype=np.float32)
+        outputs_32 = (outputs_32,) if n_outputs == 1 else outputs_32
+        for e, o in zip(expected, outputs_32):
+            self.assertEqual(e.dtype, np.float64)
+            self.assertEqual(o.dtype, np.float32)
+            np.testing.assert_allclose(o, e, rtol=1e-5)
+        out = np.zeros((n_outputs, len(df)), dtype=np.float32)
+        buffers = out[0] if n_outputs == 1 else tuple(out)
+        result = sim.simulate_from_inputs(df, out=buffers)
+        if n_outputs == 1:
+            self.assertIs(result, buffers)
+        else:
+            self.assertTrue(all(r is b for r, b in zip(result, buffers)))
+        self.assertTrue(np.array_equal(out, np.array(outputs_32)))
+        with self.assertRaises(ValueError):
+            sim.simulate_from_inputs(df, out=np.zeros((n_outputs, len(df) + 1)))
+        if n_outputs > 1:
+            with self.assertRaises(ValueError):
+                sim.simulate_from_inputs(df, out=out[1:])
+
+    def test_wind_tunnel(self):
+        df = _wt_inputs(100)
+        parameters = dict(I=I, tau=tau, K=K, omega_in_0=300, omega_out_0=300)
+        parameters.update(S_max=300, omega_max=3000, Q_max=0.1, r_0=0.5, beta=0.1)
+        parameters.update(barometer_error=0, barometer_precision=1, solver="exact")
+        for sim in [
+            wt.ModelA1(L_min=L_MIN, omega_max=OMEGA_MAX),
+            wt.ModelA2(I, tau, K, 300, solver="exact"),
+            wt.ModelB1(C_min=C_MIN, C_max=C_MAX, L_min=L_MIN),
+            wt.SimA2C3(**parameters),
+        ]:
+            self._check(sim, df)
+
+    def test_light_tunnel_sensors(self):
+        import causalchamber.simulators.lt as lt
+
+        df = _deterministic_inputs(100)
+        self._check(lt.Deterministic(**DeterministicTests.PARAMETERS), df)
+
+
+class InputTests(unittest.TestCase):
+    def test_input_types(self):
+        import causalchamber.simulators.lt as lt
+
+        df = _deterministic_inputs(50)
+        sim = lt.Deterministic(**DeterministicTests.PARAMETERS)
+        expected = sim.simulate_from_inputs(df)
+        columns = dict((k, df[k].to_numpy()) for k in df.columns)
+        records = df.to_records(index=False)
+        for inputs in [columns, records]:
+            outputs = sim.simulate_from_inputs(inputs)
+            self.assertTrue(
+                all(np.array_equal(o, e) for o, e in zip(outputs, expected))
+            )
+        with self.assertRaises(KeyError):
+            sim.simulate_from_inputs(df.drop(columns=["red", "v_c"]))
+
+    def test_no_copies(self):
+        from causalchamber.simulators.main import get_columns
+
+        df = _wt_inputs(100)
+        records = df.to_records(index=False)
+        for data in [df, records]:
+            columns = get_columns(data, ["load", "hatch"])
+            self.assertTrue(np.shares_memory(columns["load"], data["load"]))
+            self.assertTrue(np.shares_memory(columns["hatch"], data["hatch"]))
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_arrow(self):
+        import pyarrow as pa
+
+        df = _wt_inputs(100)
+        sim = wt.ModelA1(L_min=L_MIN, omega_max=OMEGA_MAX)
+        table = pa.Table.from_pandas(df)
+        expected = sim.simulate_from_inputs(df)
+        self.assertTrue(np.array_equal(sim.simulate_from_inputs(table), expected))
+
+    def test_batch_and_chunks(self):
+        frames = [_wt_inputs(100, random_state=i) for i in range(2)]
+        sim = wt.ModelA2(I, tau, K, 300, solver="exact")
+        expected = sim.simulate_batch(frames)
+        records = [df.to_records(index=False) for df in frames]
+        self.assertTrue(np.array_equal(sim.simulate_batch(records), expected))
+        df = _lt_inputs(25)
+        columns = dict((k, df[k].to_numpy()) for k in df.columns)
+        for sim in _models_f(image_size=16):
+            images = sim.simulate_from_inputs(df)
+            chunks = list(sim.iter_simulate(columns, chunk_size=10))
+            self.assertTrue(np.array_equal(np.concatenate(chunks), images))
+
+
+def _deterministic_reference(red, green, blue, pol_1, pol_2, gains, parameters):
+    """The original implementation of lt.Deterministic (sensors and current)"""
+    S, Ts, Tp, Tc = (parameters[k] for k in ["S", "Ts", "Tp", "Tc"])
+    d1, d2, d3, Q, C0 = (parameters[k] for k in ["d1", "d2", "d3", "Q", "C0"])
+    RGB = np.array([red, green, blue])
+    first = gains[0] * (S @ RGB)
+    second = gains[1] * (S @ np.diag(Ts) @ ((d1 / d2) ** 2 * RGB))
+    malus = np.atleast_2d(np.cos(np.deg2rad(pol_1 - pol_2)) ** 2)
+    CRGB = (d1 / d3) ** 2 * RGB
+    CRGB = np.diag(Tp - Tc) @ (malus * CRGB) + np.diag(Tc) @ CRGB
+    third = gains[2] * (S @ CRGB)
+    return np.vstack([first, second, third, Q @ RGB + C0])
+
+
+class DeterministicTests(unittest.TestCase):
+    PARAMETERS = dict(
+        S=np.array([[4.34, 2.86, 1.92], [0.89, 1.59, 2.68]]),
+        d1=np.array(0.1),
+        d2=np.array(0.17),
+        d3=np.array(0.25),
+        Ts=np.array([0.43, 0.41, 0.47]),
+        Tp=np.array([0.29, 0.3, 0.31]),
+        Tc=np.array([0.004, 0.014, 0.02]),
+        Q=np.array([0.128, 0.129, 0.131]),
+        C0=np.array(58.1),
+        A=np.array(1.42),
+        a1=np.array(506.8),
+        a2=np.array(511.0),
+    )
+
+    def test_matches_reference(self):
+        import causalchamber.simulators.lt as lt
+
+        names = ["ir_1", "vis_1", "ir_2", "vis_2", "ir_3", "vis_3"]
+        for dtype in [int, float]:
+            df = _deterministic_inputs(100, dtype)
+            outputs = lt.Deterministic(**self.PARAMETERS).simulate_from_inputs(df)
+            exponents = [df["diode_" + n] + df["t_" + n] for n in names]
+            gains = 2.0 ** np.array(exponents).reshape(3, 2, -1)
+            args = (df.red, df.green, df.blue, df.pol_1, df.pol_2)
+            reference = _deterministic_reference(*args, gains, self.PARAMETERS)
+            np.testing.assert_allclose(np.vstack(outputs[:7]), reference, rtol=1e-12)
+
+
+def _lt_inputs(n, random_state=42):
+    rng = np.random.default_rng(random_state)
+    df = pd.DataFrame(
+        dict((k, rng.uniform(0, 255, n)) for k in ["red", "green", "blue"])
+    )
+    df["pol_1"], df["pol_2"] = rng.uniform(-180, 180, (2, n))
+    return df
+
+
+def _deterministic_inputs(n, dtype=int, random_state=42):
+    df = _lt_inputs(n, random_state)
+    rng = np.random.default_rng(random_state)
+    for name in ["ir_1", "vis_1", "ir_2", "vis_2", "ir_3", "vis_3"]:
+        df["diode_" + name] = rng.integers(0, 3, n).astype(dtype)
+        df["t_" + name] = rng.integers(0, 4, n).astype(dtype)
+    df["v_c"], df["v_angle_1"], df["v_angle_2"] = 5.0, 2.56, 1.1
+    return df
+
+
+def _models_f(image_size):
+    import causalchamber.simulators.lt as lt
+
+    geometry = dict(
+        center_x=0.5, center_y=0.5, radius=0.22, offset=0, image_size=image_size
+    )
+    camera = dict(S=np.eye(3), w_r=2.6, w_g=1.0, w_b=1.8, exposure=1.5)
+    Tp, Tc = np.array([[0.29, 0.35, 0.33]]).T, np.array([[0.02, 0.08, 0.18]]).T
+    return [
+        lt.ModelF1(**geometry),
+        lt.ModelF2(**camera, **geometry),
+        lt.ModelF3(**camera, Tp=Tp, Tc=Tc, **geometry),
+    ]